@@ -0,0 +1,53 @@
+"""
+Microbenchmark of the generated straight-line evaluator against the NumPy
+matrix plan, for genomes of the size this project evolves.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_codegen
+"""
+
+import random
+import timeit
+
+import numpy as np
+
+from src.genome import Genome
+from src.NEATnetwork import NEATNetwork
+
+NUM_INPUTS = 13
+NUM_OUTPUTS = 2
+CALLS = 20000
+
+
+def build_genome(hidden_nodes: int) -> Genome:
+    random.seed(hidden_nodes)
+    genome = Genome(0, NUM_INPUTS, NUM_OUTPUTS)
+    while sum(node.node_type == "hidden" for node in genome.nodes) < hidden_nodes:
+        genome.mutate_nodes()
+    return genome
+
+
+def time_call(call) -> float:
+    """Best time of one call in µs."""
+    return min(timeit.repeat(call, number=CALLS, repeat=5)) / CALLS * 1e6
+
+
+def main():
+    x = np.random.default_rng(0).normal(0, 100, NUM_INPUTS)
+    print(f"{'hidden':>6s} {'forward':>10s} {'forward_into':>13s} {'codegen':>10s}")
+    for hidden_nodes in (0, 2, 5, 10, 20):
+        genome = build_genome(hidden_nodes)
+        matrix = NEATNetwork(genome, backend="matrix")
+        generated = NEATNetwork(genome, backend="codegen")
+        out = np.zeros(NUM_OUTPUTS, dtype=generated.state.dtype)
+        print(
+            f"{hidden_nodes:6d}"
+            f" {time_call(lambda: matrix.forward(x)):8.2f}µs"
+            f" {time_call(lambda: matrix.forward_into(x)):11.2f}µs"
+            f" {time_call(lambda: generated.forward_into(x, out)):8.2f}µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmark of evaluating one generation serially and with ParallelEvaluator.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_evaluation
+"""
+
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from src.evaluation import ParallelEvaluator
+from src.genome import Genome
+
+POPULATION_SIZE = 32
+
+
+def main():
+    random.seed(0)
+    population = [Genome(genome_id, 13, 2) for genome_id in range(POPULATION_SIZE)]
+
+    # Without the fitness cache, so every genome is simulated in both runs
+    with ParallelEvaluator(workers=0, cache_size=0) as evaluator:
+        start = time.perf_counter()
+        serial = evaluator.evaluate_population(population)
+        print(f"serial:     {time.perf_counter() - start:6.2f} s")
+
+    with ParallelEvaluator(cache_size=0) as evaluator:
+        # Start the workers before timing
+        evaluator.evaluate_population(population[: evaluator.workers])
+        start = time.perf_counter()
+        parallel = evaluator.evaluate_population(population)
+        print(
+            f"{evaluator.workers:2d} workers: {time.perf_counter() - start:6.2f} s,"
+            f" identical: {parallel == serial}"
+        )
+
+
+if __name__ == "__main__":
+    main()
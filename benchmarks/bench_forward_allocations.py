@@ -0,0 +1,112 @@
+"""
+Benchmark of the memory allocated per simulation step by the network input
+and forward pass, comparing the list based path main.evaluate_genome used
+before with the preallocated float32 path.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_forward_allocations
+"""
+
+import random
+import time
+import tracemalloc
+
+import numpy as np
+import pymunk
+
+from src.agent_parts.creature import Creature
+from src.agent_parts.rectangle import Point
+from src.agent_parts.vision import Vision
+from src.genome import Genome
+from src.NEATnetwork import NEATNetwork
+
+STEPS = 400
+
+
+def build_creature() -> Creature:
+    space = pymunk.Space()
+    space.gravity = (0, 981)
+    creature = Creature(space, Vision(Point(0, 0)))
+    limb1 = creature.add_limb(100, 20, (300, 300), mass=1)
+    limb2 = creature.add_limb(100, 20, (350, 300), mass=3)
+    limb3 = creature.add_limb(80, 40, (400, 300), mass=5)
+    creature.add_motor_on_limbs(limb1, limb2, (325, 300))
+    creature.add_motor_on_limbs(limb2, limb3, (375, 300))
+    return creature
+
+
+def build_genome(num_inputs: int, num_outputs: int) -> Genome:
+    random.seed(0)
+    genome = Genome(0, num_inputs, num_outputs)
+    for _ in range(6):
+        genome.mutate_nodes()
+    return genome
+
+
+def list_step(creature: Creature, network: NEATNetwork, genome: Genome):
+    """The input handling and forward pass main.evaluate_genome used before."""
+    inputs = []
+    inputs.extend(
+        [
+            creature.vision.get_near_periphery().x,
+            creature.vision.get_near_periphery().y,
+            creature.vision.get_far_periphery().x,
+            creature.vision.get_far_periphery().y,
+        ]
+    )
+    inputs.extend(creature.get_joint_rates())
+    for limb in creature.limbs:
+        inputs.extend([limb.body.position.x, limb.body.position.y])
+    inputs = np.array(inputs)
+    if len(inputs) < genome.num_inputs:
+        inputs = np.pad(inputs, (0, genome.num_inputs - len(inputs)), "constant")
+    else:
+        inputs = inputs[: genome.num_inputs]
+    return network.forward(inputs)
+
+
+def measure(step) -> tuple[float, float]:
+    """Average peak bytes allocated by one call of `step`, and its time in µs."""
+    step()
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(STEPS):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        step()
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - current
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        step()
+    elapsed = time.perf_counter() - start
+    return allocated / STEPS, elapsed / STEPS * 1e6
+
+
+def main():
+    creature = build_creature()
+    genome = build_genome(creature.get_observation_size(), len(creature.motors))
+    network = NEATNetwork(genome)
+
+    observation = np.zeros(genome.num_inputs, dtype=network.state.dtype)
+    outputs = np.zeros(genome.num_outputs, dtype=network.state.dtype)
+
+    def preallocated_step():
+        creature.fill_observation(observation)
+        return network.forward_into(observation, outputs)
+
+    # What remains of fill_observation comes from reading pymunk body positions
+    for name, step in [
+        ("list + forward", lambda: list_step(creature, network, genome)),
+        ("fill_observation + forward_into", preallocated_step),
+        ("forward_into only", lambda: network.forward_into(observation, outputs)),
+    ]:
+        allocated, micros = measure(step)
+        print(f"{name:34s} {allocated:8.0f} bytes/step {micros:8.1f} µs/step")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark of mutating a whole population: Genome.mutate() per genome
+against the batched mutate_population() stage.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_mutation
+"""
+
+import random
+import time
+
+from src.array_genome import ArrayGenome
+from src.genome import Genome
+from src.innovation import InnovationRegistry
+from src.mutation import mutate_population
+
+POPULATION_SIZE = 1000
+REPEATS = 20
+
+
+def build_population(genome_class, num_inputs, hidden_nodes):
+    random.seed(0)
+    innovation = InnovationRegistry()
+    population = []
+    for genome_id in range(POPULATION_SIZE):
+        genome = genome_class(genome_id, num_inputs, 4, innovation=innovation)
+        for _ in range(hidden_nodes):
+            genome.mutate_nodes()
+        population.append(genome)
+    return population
+
+
+def time_per_genome(function) -> float:
+    start = time.perf_counter()
+    for generation in range(REPEATS):
+        function(generation)
+    return (time.perf_counter() - start) / REPEATS / POPULATION_SIZE * 1e6
+
+
+def main():
+    for genome_class in (Genome, ArrayGenome):
+        for num_inputs, hidden_nodes in ((10, 0), (40, 20)):
+            population = build_population(genome_class, num_inputs, hidden_nodes)
+            connections = len(population[0].connections)
+
+            def per_genome(generation):
+                for genome in population:
+                    genome.mutate()
+
+            def batched(generation):
+                mutate_population(population, 0, generation)
+
+            print(
+                f"{genome_class.__name__:12s} {connections:4d} connections:"
+                f" mutate() {time_per_genome(per_genome):6.2f} us,"
+                f" mutate_population() {time_per_genome(batched):6.2f} us per genome"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark of GeneticAlgorithm.reproduce() time per generation. Fitness
+values are random, so only reproduction and speciation are exercised.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_reproduce
+"""
+
+import random
+import time
+
+import pymunk
+
+from src.agent_parts.creature import Creature
+from src.agent_parts.rectangle import Point
+from src.agent_parts.vision import Vision
+from src.genetic_algorithm import GeneticAlgorithm
+
+GENERATIONS = 10
+
+
+def build_creature() -> Creature:
+    space = pymunk.Space()
+    creature = Creature(space, Vision(Point(0, 0)))
+    limb1 = creature.add_limb(100, 20, (300, 300), mass=1)
+    limb2 = creature.add_limb(100, 20, (350, 300), mass=3)
+    limb3 = creature.add_limb(80, 40, (400, 300), mass=5)
+    creature.add_motor_on_limbs(limb1, limb2, (325, 300))
+    creature.add_motor_on_limbs(limb2, limb3, (375, 300))
+    return creature
+
+
+def main():
+    for population_size in (100, 1000):
+        random.seed(0)
+        ga = GeneticAlgorithm(population_size, build_creature())
+        elapsed = 0.0
+        for _ in range(GENERATIONS):
+            for genome in ga.population:
+                genome.fitness = random.uniform(0, 100)
+            ga.adjust_fitness()
+            ga.reassign_species()
+            start = time.perf_counter()
+            ga.reproduce()
+            elapsed += time.perf_counter() - start
+        print(
+            f"population {population_size:5d}:"
+            f" {elapsed / GENERATIONS * 1000:8.2f} ms per reproduce()"
+        )
+
+
+if __name__ == "__main__":
+    main()
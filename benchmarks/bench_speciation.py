@@ -0,0 +1,138 @@
+"""
+Benchmark and agreement report of approximate MinHash/LSH speciation
+against exact speciation, both through GeneticAlgorithm.determine_species.
+
+A population is evolved for a few generations with random fitness and extra
+structural mutations, so that it is as diverse as large populations late in
+a run, and the state before every speciation pass is recorded: the
+population, the species every genome was born into and the species with
+their members. Every recorded pass is then replayed with
+APPROXIMATE_SPECIATION off and on, so both start from the same species and
+check the species of the parents first, as in training. A disagreement is a
+genome that ends up in another existing species, or in a new species in
+only one of the two passes. MinHash and LSH use MINHASH_PERMUTATIONS and
+LSH_BANDS from src/globals.py.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_speciation
+"""
+
+import copy
+import random
+import time
+
+from src.genetic_algorithm import GeneticAlgorithm
+from src.globals import LSH_BANDS, MINHASH_PERMUTATIONS
+
+POPULATION_SIZE = 2000
+GENERATIONS = 15
+STRUCTURAL_MUTATIONS = 3  # Extra structural mutations per genome and generation
+SPECIATION_THRESHOLD = 1.0
+
+
+class BenchmarkCreature:
+    def get_amount_of_joints(self):
+        return 4
+
+    def get_amount_of_limb(self):
+        return 5
+
+
+def record_passes(ga):
+    """Evolve the population and record the state before every speciation pass."""
+    recorded = []
+    for _ in range(GENERATIONS):
+        for genome in ga.population:
+            genome.fitness = random.random()
+        species = {}
+        for species_id, existing in ga.species.items():
+            species[species_id] = copy.copy(existing)
+            species[species_id].members = list(existing.members)
+        recorded.append(
+            (
+                list(ga.population),
+                [genome.species for genome in ga.population],
+                species,
+                ga.next_species_id,
+            )
+        )
+        ga.reassign_species()
+        ga.adjust_fitness()
+        ga.reproduce()
+        for genome in ga.population:
+            for _ in range(STRUCTURAL_MUTATIONS):
+                genome.mutate_nodes()
+                genome.mutate_connections()
+    return recorded
+
+
+def replay(ga, recorded_pass, approximate):
+    """
+    Run a recorded speciation pass again.
+
+    Returns:
+        The species of every genome, None for new species, and the seconds
+        the pass took.
+    """
+    population, born_into, species, next_species_id = recorded_pass
+    for genome, species_id in zip(population, born_into):
+        genome.species = species_id
+    ga.population = population
+    ga.species = {}
+    for species_id, recorded_species in species.items():
+        ga.species[species_id] = copy.copy(recorded_species)
+        ga.species[species_id].members = list(recorded_species.members)
+    ga.next_species_id = next_species_id
+    ga.approximate_speciation = approximate
+
+    start = time.perf_counter()
+    ga.assign_species_to_population()
+    elapsed = time.perf_counter() - start
+    assigned = [
+        genome.species if genome.species < next_species_id else None
+        for genome in population
+    ]
+    return assigned, elapsed
+
+
+def main():
+    random.seed(0)
+    ga = GeneticAlgorithm(
+        POPULATION_SIZE,
+        BenchmarkCreature(),
+        speciation_threshold=SPECIATION_THRESHOLD,
+        seed=0,
+    )
+    recorded = record_passes(ga)
+    genomes = sum(len(population) for population, *_ in recorded)
+    species = [len(recorded_species) for _, _, recorded_species, _ in recorded[1:]]
+    print(
+        f"{len(recorded)} recorded passes of {POPULATION_SIZE} genomes,"
+        f" {min(species)}-{max(species)} species"
+    )
+
+    results = {}
+    for approximate in (False, True):
+        assigned, seconds = zip(
+            *(replay(ga, recorded_pass, approximate) for recorded_pass in recorded)
+        )
+        results[approximate] = assigned
+        print(
+            f"{'approximate' if approximate else 'exact':11s}"
+            f" {sum(seconds) / genomes * 1e6:7.1f} us/genome"
+        )
+
+    disagreements = sum(
+        exact != approximate
+        for exact_pass, approximate_pass in zip(results[False], results[True])
+        for exact, approximate in zip(exact_pass, approximate_pass)
+    )
+    print(
+        f"{MINHASH_PERMUTATIONS} permutations, {LSH_BANDS} bands:"
+        f" {disagreements / genomes:6.2%} of the genomes disagree"
+    )
+
+
+if __name__ == "__main__":
+    main()
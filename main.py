@@ -1,4 +1,4 @@
-import numpy as np
+import math
 import pygame
 import pymunk
 import os
@@ -13,9 +13,10 @@ from src.globals import FONT_SIZE, SEGMENT_WIDTH, BLACK, RED
 from src.agent_parts.rectangle import Point
 from src.environment import Environment, GroundType
 from src.agent_parts.creature import Creature
-from src.NEATnetwork import NEATNetwork
 from src.genome import Genome
 from src.genome import Innovation
+from src.simulation import Simulation
+from src.evaluation import ParallelEvaluator
 from src.interface import Button
 from pygame_widgets.dropdown import Dropdown
 import pygame_widgets
@@ -25,7 +26,6 @@ from src.globals import (
     POPULATION_SIZE,
     SPECIATION_THRESHOLD,
     NUM_GENERATIONS,
-    SIMULATION_STEPS,
 )
 
 
@@ -45,11 +45,6 @@ def display_genome_run(genome: Genome):
     clock = pygame.time.Clock()
     interface = Interface()
 
-    # Initialize Pymunk space and environment for visualization
-    space = pymunk.Space()
-    space.gravity = (0, 981)
-    environment = Environment(screen, space)
-    environment.ground_type = GroundType.BASIC_GROUND
     font = pygame.font.Font(None, 20)
     train_enabled = False
     display_dropdown = False
@@ -127,16 +122,15 @@ def display_genome_run(genome: Genome):
     interface.add_button(display_loaded_button)
 
     if genome:
-        network = NEATNetwork(genome)
-        vision = Vision(Point(0, 0))
-        creature = Creature(space, vision)
-        limb1 = creature.add_limb(100, 20, (300, 300), mass=1)
-        limb2 = creature.add_limb(100, 20, (350, 300), mass=3)
-        limb3 = creature.add_limb(80, 40, (400, 300), mass=5)
-
-        # Add motors between limbs
-        creature.add_motor_on_limbs(limb1, limb2, (325, 300))
-        creature.add_motor_on_limbs(limb2, limb3, (375, 300))
+        # Replay the simulation used in training, with the same termination
+        # criteria and number of steps, so the replay ends at the fitness the
+        # genome got. The world is drawn on a surface wider than the screen,
+        # which follows the creature.
+        world = pygame.Surface((2 * SEGMENT_WIDTH + SCREEN_WIDTH, SCREEN_HEIGHT))
+        simulation = Simulation()
+        run = simulation.start(genome, world)
+        creature = run.creature
+        camera = 0.0
 
     running = True
     while running:
@@ -166,73 +160,37 @@ def display_genome_run(genome: Genome):
             path = save_genome(genome, "best_genome")
             print(f"Genome saved to {path}")
 
-        if genome:
-            # Prepare inputs
-            inputs = []
-            inputs.extend(
-                [
-                    creature.vision.get_near_periphery().x,
-                    creature.vision.get_near_periphery().y,
-                    creature.vision.get_far_periphery().x,
-                    creature.vision.get_far_periphery().y,
-                ]
-            )
-            inputs.extend(creature.get_joint_rates())
-            for limb in creature.limbs:
-                inputs.extend([limb.body.position.x, limb.body.position.y])
-
-            # Ensure inputs match the expected number
-            inputs = np.array(inputs)
-            if len(inputs) != genome.num_inputs:
-                # Handle input size mismatch if necessary
-                # For simplicity, we'll pad with zeros or truncate
-                if len(inputs) < genome.num_inputs:
-                    inputs = np.pad(
-                        inputs, (0, genome.num_inputs - len(inputs)), "constant"
-                    )
-                else:
-                    inputs = inputs[: genome.num_inputs]
-
-            outputs = network.forward(inputs)
-            creature.set_joint_rates(outputs)
-
-            creature.vision.update(
-                Point(
-                    creature.limbs[0].body.position.x, creature.limbs[0].body.position.y
-                ),
-                environment.ground,
-                environment.offset,
-            )
-
-        # Step the physics
-        space.step(1 / 60.0)
-
-        # Move all the bodies in the space as much as the creature has moved
-        for body in space.bodies:
-            creature_offset = creature.limbs[0].body.position.x
-            body.position = (body.position.x - creature_offset / 100, body.position.y)
+        # Step the physics until the simulation would have ended in training
+        if genome and run.terminated is None and run.steps < simulation.steps:
+            run.advance(1)
 
         # Render everything
         screen.fill((135, 206, 235))
-        environment.update()
-        environment.render()
+        if genome:
+            world.fill((135, 206, 235))
+            run.environment.render()
+            creature.render(world)
+            x = creature.limbs[0].body.position.x
+            if math.isfinite(x):
+                camera = min(
+                    max(0.0, x - SCREEN_WIDTH / 3), world.get_width() - SCREEN_WIDTH
+                )
+            screen.blit(world, (-camera, 0))
         interface.render(screen)
         pygame_widgets.update(events)
 
-        if genome:
-            creature.render(screen)
-
         network_position = (SCREEN_WIDTH - 350, 50)
         network_size = (300, 300)
         draw_neural_network(
             genome, screen, position=network_position, size=network_size
         )
-        # Add text with the fitness value and current x position
+        # Add text with the fitness value and the state of the replay
         font = pygame.font.Font(None, FONT_SIZE)
         fitness_text = font.render(f"Fitness: {genome.fitness:.2f}", True, BLACK)
-        x_pos_text = font.render(
-            f"X Position: {creature.limbs[0].body.position.x:.2f}", True, BLACK
-        )
+        status = f"Replay fitness: {run.fitness():.2f} after {run.steps} steps"
+        if run.terminated is not None:
+            status += f", ended by {run.terminated}"
+        x_pos_text = font.render(status, True, BLACK)
         screen.blit(fitness_text, (10, 10))
         screen.blit(x_pos_text, (10, 30))
 
@@ -336,13 +294,13 @@ def load_genome(filename: str) -> Genome:
     genome = Genome.from_dict(data)
     Innovation.get_instance().from_dict(
         {
-            "_global_innovation_counter": max(
+            "counter": max(
                 conn["innovation_number"] for conn in data["connections"]
             ),
-            "_innovation_history": {
-                (conn["in_node"], conn["out_node"]): conn["innovation_number"]
+            "history": [
+                [conn["in_node"], conn["out_node"], conn["innovation_number"]]
                 for conn in data["connections"]
-            },
+            ],
         }
     )
     return genome
@@ -350,69 +308,7 @@ def load_genome(filename: str) -> Genome:
 
 def evaluate_genome(genome: Genome) -> float:
     """Evaluate a genome by running a simulation and returning its fitness."""
-    # Initialize Pymunk space
-    space = pymunk.Space()
-    space.gravity = (0, 981)
-
-    # Minimal screen for Pymunk (no rendering during evaluation)
-    screen = pygame.Surface((1, 1))
-
-    # Initialize environment
-    environment = Environment(screen, space)
-    environment.ground_type = GroundType.BASIC_GROUND
-
-    # Instantiate NEATNetwork and Creature
-    network = NEATNetwork(genome)
-    vision = Vision(Point(0, 0))
-    creature = Creature(space, vision)
-    # Initialize creature's limbs and motors
-    limb1 = creature.add_limb(100, 20, (300, 300), mass=1)
-    limb2 = creature.add_limb(100, 20, (350, 300), mass=3)
-    limb3 = creature.add_limb(80, 40, (400, 300), mass=5)
-    creature.add_motor_on_limbs(limb1, limb2, (325, 300))
-    creature.add_motor_on_limbs(limb2, limb3, (375, 300))
-
-    # Run simulation for a certain number of steps
-    for _ in range(SIMULATION_STEPS):
-        inputs = []
-        # Prepare inputs
-        inputs.extend(
-            [
-                creature.vision.get_near_periphery().x,
-                creature.vision.get_near_periphery().y,
-                creature.vision.get_far_periphery().x,
-                creature.vision.get_far_periphery().y,
-            ]
-        )
-        inputs.extend(creature.get_joint_rates())
-        for limb in creature.limbs:
-            inputs.extend([limb.body.position.x, limb.body.position.y])
-
-        # Ensure inputs match the expected number
-        inputs = np.array(inputs)
-        if len(inputs) != genome.num_inputs:
-            # Handle input size mismatch if necessary
-            # For simplicity, we'll pad with zeros or truncate
-            if len(inputs) < genome.num_inputs:
-                inputs = np.pad(
-                    inputs, (0, genome.num_inputs - len(inputs)), "constant"
-                )
-            else:
-                inputs = inputs[: genome.num_inputs]
-
-        outputs = network.forward(inputs)
-        creature.set_joint_rates(outputs)
-
-        creature.vision.update(
-            Point(creature.limbs[0].body.position.x, creature.limbs[0].body.position.y),
-            environment.ground,
-            environment.offset,
-        )
-        space.step(1 / 60.0)
-
-    # Evaluate fitness (e.g., distance traveled)
-    fitness = creature.limbs[0].body.position.x
-    return fitness
+    return Simulation().evaluate(genome)
 
 
 def train() -> Genome:
@@ -467,8 +363,9 @@ def train() -> Genome:
         speciation_threshold=SPECIATION_THRESHOLD,
     )
 
-    # Run Evolution
-    ga.evolve(generations=NUM_GENERATIONS, evaluate_function=evaluate_genome)
+    # Run Evolution, evaluating the population in worker processes
+    with ParallelEvaluator() as evaluator:
+        ga.evolve(generations=NUM_GENERATIONS, evaluate_function=evaluator)
 
     # After evolution, select the best genome
     best_genome = max(ga.population, key=lambda g: g.fitness, default=None)
@@ -1,17 +1,238 @@
 # src/NEATnetwork.py
 
 from collections import defaultdict, deque
+from dataclasses import dataclass
 import numpy as np
 from src.genome import Genome, Node, Connection
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple
+from src.globals import PLAN_CACHE_SIZE, INFERENCE_DTYPE, NETWORK_BACKEND
+from src.lru_cache import LRUCache
+
+# (input node ids, output node ids, sorted enabled (in_node, out_node) edges)
+StructureKey = Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[Tuple[int, int], ...]]
+
+
+@dataclass
+class LayerPlan:
+    """
+    One layer of a compiled network: a contiguous block of node slots whose
+    values only depend on slots computed in earlier layers.
+    """
+
+    start: int  # First slot written by this layer
+    stop: int  # One past the last slot written by this layer
+    sources: np.ndarray  # Slots gathered as input to this layer
+    rows: np.ndarray  # Target row (slot - start) of every edge in the layer
+    cols: np.ndarray  # Column in `sources` of every edge in the layer
+    edges: np.ndarray  # Index of every edge in the plan's edge list
+
+
+@dataclass
+class NetworkPlan:
+    """Weight-independent evaluation plan compiled from a genome's topology."""
+
+    num_inputs: int  # Input values occupy slots [0, num_inputs)
+    num_slots: int  # Total slots, the last one is always zero
+    edges: Tuple[Tuple[int, int], ...]  # Enabled (in_node, out_node) edges, sorted
+    layers: List[LayerPlan]
+    output_slots: np.ndarray  # Slot of every output node, in genome order
+    topological_order: List[int]
+    # Whether every connection target is evaluated, False for a feed-forward
+    # plan of connections that form cycles
+    complete: bool = True
+    evaluator: Optional[Callable] = None  # Generated code, see `_generate_evaluator`
+
+
+@dataclass
+class PruneReport:
+    """What pruning removed from a genome before compilation."""
+
+    nodes: int  # Hidden nodes that cannot reach an output node
+    edges: int  # Enabled connections that cannot reach an output node
+
+
+def structure_key(genome: Genome) -> Tuple[StructureKey, List[float]]:
+    """
+    Describe the structure of a genome independently of its weights.
+
+    Returns:
+        The structure key (input node ids, output node ids and the sorted
+        enabled (in_node, out_node) edges) and the weight of every edge.
+    """
+    enabled = sorted(
+        (conn.in_node, conn.out_node, conn.weight)
+        for conn in genome.connections
+        if conn.enabled
+    )
+    key = (
+        tuple(node.id for node in genome.nodes if node.node_type == "input"),
+        tuple(node.id for node in genome.nodes if node.node_type == "output"),
+        tuple((in_node, out_node) for in_node, out_node, _ in enabled),
+    )
+    weights = [weight for _, _, weight in enabled]
+    return key, weights
+
+
+def prune_structure(
+    genome: Genome, key: StructureKey, weights: List[float]
+) -> Tuple[StructureKey, List[float], PruneReport]:
+    """
+    Remove the parts of a genome that cannot influence its outputs.
+
+    A connection is kept only if its target can reach an output node through
+    enabled connections. Hidden nodes that only hang off dead or disabled
+    connections therefore disappear from the compiled network. The outputs
+    are unchanged, since no kept node reads a pruned one.
+
+    Args:
+        genome: Genome the structure key was built from.
+        key: Structure key of the genome, see `structure_key`.
+        weights: Weight of every edge in the key.
+    Returns:
+        The pruned structure key, its weights and a PruneReport.
+    """
+    input_ids, output_ids, edges = key
+    sources = defaultdict(list)
+    for in_node, out_node in edges:
+        sources[out_node].append(in_node)
+
+    relevant = set(output_ids)
+    stack = list(output_ids)
+    while stack:
+        for in_node in sources[stack.pop()]:
+            if in_node not in relevant:
+                relevant.add(in_node)
+                stack.append(in_node)
+
+    kept = [i for i, (_, out_node) in enumerate(edges) if out_node in relevant]
+    hidden_ids = {node.id for node in genome.nodes if node.node_type == "hidden"}
+    report = PruneReport(
+        nodes=len(hidden_ids - relevant), edges=len(edges) - len(kept)
+    )
+    if len(kept) == len(edges):
+        return key, weights, report
+    pruned_key = (input_ids, output_ids, tuple(edges[i] for i in kept))
+    return pruned_key, [weights[i] for i in kept], report
+
+
+def _pruned_structure(genome: Genome) -> Tuple[StructureKey, List[float], PruneReport]:
+    """Structure key and weights of a genome after pruning, see `prune_structure`."""
+    key, weights = structure_key(genome)
+    return prune_structure(genome, key, weights)
+
+
+class PruningStats:
+    """Running totals of what pruning removed, e.g. over one generation."""
+
+    def __init__(self):
+        self.reset_stats()
+
+    def record(self, report: PruneReport):
+        """Add the report of one compiled genome."""
+        self.networks += 1
+        self.nodes += report.nodes
+        self.edges += report.edges
+
+    def stats(self) -> dict:
+        """Pruned node and edge totals since the last reset."""
+        return {"networks": self.networks, "nodes": self.nodes, "edges": self.edges}
+
+    def reset_stats(self):
+        """Reset the totals, e.g. at the start of a generation."""
+        self.networks = 0
+        self.nodes = 0
+        self.edges = 0
+
+
+default_pruning_stats = PruningStats()
+
+
+class InferenceState:
+    """
+    Preallocated buffers for evaluating a compiled plan step by step.
+
+    The activation buffer, the per-layer scratch buffers and the output
+    buffer are allocated once, so a step writes its arrays into existing
+    memory. What a step still allocates are short-lived Python objects of
+    the calls themselves, about 40 bytes per step as measured by
+    benchmarks/bench_forward_allocations.py, against some 1.4 kB for the
+    list based inputs and `forward`.
+    """
+
+    def __init__(self, plan: NetworkPlan, layer_weights: List[np.ndarray], dtype):
+        self.dtype = np.dtype(dtype)
+        self.values = np.zeros(plan.num_slots, dtype=self.dtype)
+        self.output = np.zeros(len(plan.output_slots), dtype=self.dtype)
+        self.output_slots = plan.output_slots
+        self._input_values = self.values[: plan.num_inputs]
+        self._layers = [
+            (
+                layer.sources,
+                weights.astype(self.dtype),
+                np.zeros(len(layer.sources), dtype=self.dtype),
+                np.zeros(layer.stop - layer.start, dtype=self.dtype),
+                self.values[layer.start : layer.stop],
+            )
+            for layer, weights in zip(plan.layers, layer_weights)
+        ]
+        # 0-d arrays, NumPy converts Python scalars on every ufunc call
+        self._zero = np.zeros((), dtype=self.dtype)
+        self._scale = np.array(200, dtype=self.dtype)
+
+    def step(self, x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Evaluate every layer once, reading the inputs from `x`.
+        Args:
+            x: Input array, only the first num_inputs values are read
+            out: Optional array with this state's dtype to write the outputs
+                to, defaults to the buffer owned by the state
+        Returns:
+            The array holding the normalized outputs
+        """
+        if len(x) == len(self._input_values):
+            np.copyto(self._input_values, x)
+        else:
+            self._input_values[:] = x[: len(self._input_values)]
+
+        # Positional out arguments, keyword parsing dominates for tiny arrays
+        values = self.values
+        for sources, weights, gathered, node_sums, node_values in self._layers:
+            values.take(sources, None, gathered, "clip")
+            np.dot(weights, gathered, node_sums)
+            np.maximum(node_sums, self._zero, node_values)
+
+        if out is None:
+            out = self.output
+        values.take(self.output_slots, None, out, "clip")
+        np.divide(out, self._scale, out)  # Normalize the output
+        return out
 
 
 class NEATNetwork:
 
-    def __init__(self, genome: Genome):
+    def __init__(
+        self,
+        genome: Genome,
+        plan_cache: Optional["PlanCache"] = None,
+        dtype=INFERENCE_DTYPE,
+        backend: str = NETWORK_BACKEND,
+        compiled: Optional[Tuple[NetworkPlan, List[float], PruneReport]] = None,
+    ):
+        """
+        Args:
+            genome: Genome to build the network of.
+            plan_cache: Cache the plan is looked up in, the default cache if None.
+            dtype: Dtype of the inference buffers.
+            backend: "matrix" or "codegen".
+            compiled: Plan, pruned weights and PruneReport of the genome that
+                were already looked up, as done by `create_network`.
+        """
 
         # Store genome information
         self.genome = genome
+        if backend not in ("matrix", "codegen"):
+            raise ValueError(f"Unknown network backend '{backend}'.")
+        self.backend = backend
 
         # Create dictionaries for nodes and connections
         self.node_dict = {node.id: node for node in genome.nodes}
@@ -19,8 +240,31 @@ class NEATNetwork:
             conn.innovation_number: conn for conn in genome.connections if conn.enabled
         }
 
+        # Compile the genome into flat index/weight arrays, reusing the plan of
+        # an earlier genome with the same structure when possible
+        if compiled is None:
+            if plan_cache is None:
+                plan_cache = default_plan_cache
+            key, weights, pruning = _pruned_structure(genome)
+            # Depths are only needed to compile, so a cache hit skips computing them
+            plan = plan_cache.get(key, getattr(genome, "node_depths", None))
+            compiled = (plan, weights, pruning)
+        self.plan, weights, self.pruning = compiled
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.layer_weights = self._bind_weights(self.plan, self.weights)
+
+        # Buffers of the preallocated inference path, see `forward_into`
+        self.state = InferenceState(self.plan, self.layer_weights, dtype)
+
+        # The generated evaluator is compiled once per plan and shared by all
+        # networks with the same structure, only the weights are per network
+        if backend == "codegen":
+            if self.plan.evaluator is None:
+                self.plan.evaluator = self._generate_evaluator(self.plan)
+            self.weight_tuple = tuple(self.weights.tolist())
+
         # Topologically sort nodes based on connections
-        self.topological_order = self._topological_sort()
+        self.topological_order = self.plan.topological_order
 
     def sigmoid(self, x: np.ndarray) -> np.ndarray:
         """Sigmoid activation function."""
@@ -34,20 +278,28 @@ class NEATNetwork:
         """
         Performs topological sorting on the nodes based on their connections.
         """
+        return self._kahn_order(
+            [node.id for node in self.genome.nodes if node.node_type == "input"],
+            [(conn.in_node, conn.out_node) for conn in self.genome.connections if conn.enabled],
+        )
+
+    @staticmethod
+    def _kahn_order(input_ids: List[int], edges: List[Tuple[int, int]]) -> List[int]:
+        """
+        Kahn's algorithm starting from the input nodes. Nodes that sit on or
+        behind a cycle, or behind a hidden node without incoming connections,
+        are never reached and are left out of the order.
+        """
         in_degree = defaultdict(int)
         adjacency_list = defaultdict(list)
 
         # Build graph
-        for conn in self.genome.connections:
-            if conn.enabled:
-                adjacency_list[conn.in_node].append(conn.out_node)
-                in_degree[conn.out_node] += 1
+        for in_node, out_node in edges:
+            adjacency_list[in_node].append(out_node)
+            in_degree[out_node] += 1
 
         # Initialize the queue with input nodes (no incoming connections)
-        input_nodes = [
-            node.id for node in self.genome.nodes if node.node_type == "input"
-        ]
-        queue = deque([node_id for node_id in input_nodes if in_degree[node_id] == 0])
+        queue = deque([node_id for node_id in input_ids if in_degree[node_id] == 0])
 
         topological_order = []
         while queue:
@@ -62,6 +314,180 @@ class NEATNetwork:
 
         return topological_order
 
+    @classmethod
+    def _compile(
+        cls, key: StructureKey, depths: Optional[Dict[int, int]] = None
+    ) -> NetworkPlan:
+        """
+        Compile the topology of a genome into a layered evaluation plan.
+
+        Every node reached by the topological sort gets a slot in a flat value
+        buffer. Input nodes take the first slots, the remaining nodes are
+        grouped into layers by their depth so that a layer only reads slots
+        written by earlier layers. Nodes that are never reached keep the
+        value zero, exactly like the original per-node evaluation.
+
+        Args:
+            key: Structure key of the genome, see `structure_key`.
+            depths: Node depths maintained by the genome, see
+                `Genome.node_depths`. Without them, or if they do not match
+                the key, the nodes are sorted here.
+        Returns:
+            The compiled NetworkPlan.
+        """
+        input_ids, output_ids, edges = key
+
+        incoming = defaultdict(list)
+        for index, (in_node, out_node) in enumerate(edges):
+            incoming[out_node].append(index)
+
+        # Input values are assigned directly, even if the node has incoming
+        # edges, so input nodes always have depth 0
+        input_set = set(input_ids)
+        if depths is not None and not cls._depths_match(key, depths, input_set):
+            depths = None
+        if depths is None:
+            depths = {}
+            for node_id in cls._kahn_order(input_ids, edges):
+                if node_id in input_set:
+                    depths[node_id] = 0
+                else:
+                    depths[node_id] = 1 + max(
+                        depths[edges[i][0]] for i in incoming[node_id]
+                    )
+
+        slots = {node_id: slot for slot, node_id in enumerate(input_ids)}
+        layer_nodes = defaultdict(list)
+        for node_id in sorted(incoming):
+            if node_id in depths and node_id not in input_set:
+                layer_nodes[depths[node_id]].append(node_id)
+        topological_order = [node_id for node_id in input_ids if node_id in depths] + [
+            node_id for level in sorted(layer_nodes) for node_id in layer_nodes[level]
+        ]
+
+        next_slot = len(input_ids)
+        for level in sorted(layer_nodes):
+            for node_id in layer_nodes[level]:
+                slots[node_id] = next_slot
+                next_slot += 1
+        zero_slot = next_slot
+
+        layers = []
+        for level in sorted(layer_nodes):
+            nodes = layer_nodes[level]
+            start = slots[nodes[0]]
+            edge_ids = [i for node_id in nodes for i in incoming[node_id]]
+            sources = sorted({slots[edges[i][0]] for i in edge_ids})
+            columns = {slot: col for col, slot in enumerate(sources)}
+            layers.append(
+                LayerPlan(
+                    start=start,
+                    stop=start + len(nodes),
+                    sources=np.array(sources, dtype=np.intp),
+                    rows=np.array(
+                        [slots[edges[i][1]] - start for i in edge_ids], dtype=np.intp
+                    ),
+                    cols=np.array(
+                        [columns[slots[edges[i][0]]] for i in edge_ids], dtype=np.intp
+                    ),
+                    edges=np.array(edge_ids, dtype=np.intp),
+                )
+            )
+
+        return NetworkPlan(
+            num_inputs=len(input_ids),
+            num_slots=zero_slot + 1,
+            edges=edges,
+            layers=layers,
+            output_slots=np.array(
+                [slots.get(node_id, zero_slot) for node_id in output_ids],
+                dtype=np.intp,
+            ),
+            topological_order=topological_order,
+            complete=all(out_node in depths for _, out_node in edges),
+        )
+
+    @staticmethod
+    def _depths_match(key: StructureKey, depths: Dict[int, int], input_set: set) -> bool:
+        """
+        Check node depths from a genome against a structure key in one pass.
+
+        Every reached non-input node must be deeper than all of its sources,
+        and every unreached target must wait on an unreached source. This
+        catches depths that went stale because the genome's connection list
+        was edited directly.
+        """
+        input_ids, _, edges = key
+        blocked = set()
+        targets = set()
+        for in_node, out_node in edges:
+            targets.add(out_node)
+            if in_node not in depths:
+                blocked.add(out_node)
+            elif (
+                out_node in depths
+                and out_node not in input_set
+                and depths[in_node] >= depths[out_node]
+            ):
+                return False
+        for node_id in targets:
+            if (node_id in depths) == (node_id in blocked):
+                return False
+        return all(node_id in depths for node_id in input_ids if node_id not in targets)
+
+    @staticmethod
+    def _generate_evaluator(plan: NetworkPlan) -> Callable:
+        """
+        Generate a straight-line Python function evaluating a plan.
+
+        The function takes the inputs and the edge weights as sequences and
+        returns the normalized outputs as a tuple. Every node becomes one
+        multiply-add expression followed by a ReLU, which for the small
+        networks evolved here beats the call overhead of NumPy.
+
+        Args:
+            plan: Compiled plan of the network.
+        Returns:
+            The compiled `evaluate(x, w)` function.
+        """
+        lines = ["def evaluate(x, w):"]
+        for slot in range(plan.num_inputs):
+            lines.append(f"    v{slot} = x[{slot}]")
+        for layer in plan.layers:
+            terms = defaultdict(list)
+            for row, col, edge in zip(layer.rows, layer.cols, layer.edges):
+                terms[row].append(f"w[{edge}] * v{layer.sources[col]}")
+            for row in range(layer.stop - layer.start):
+                lines.append(f"    s = {' + '.join(terms[row])}")
+                lines.append(f"    v{layer.start + row} = s if s > 0.0 else 0.0")
+        zero_slot = plan.num_slots - 1
+        outputs = [
+            "0.0" if slot == zero_slot else f"v{slot} / 200" for slot in plan.output_slots
+        ]
+        lines.append(f"    return ({', '.join(outputs)},)")
+
+        namespace = {}
+        exec(compile("\n".join(lines), "<NEATNetwork evaluator>", "exec"), namespace)
+        return namespace["evaluate"]
+
+    @staticmethod
+    def _bind_weights(plan: NetworkPlan, weights: np.ndarray) -> List[np.ndarray]:
+        """
+        Scatter the edge weights into one dense matrix per layer.
+
+        Args:
+            plan: Compiled plan of the network.
+            weights: Weight of every edge in `plan.edges`.
+        Returns:
+            A (layer size x number of sources) matrix for every layer.
+        """
+        layer_weights = []
+        for layer in plan.layers:
+            matrix = np.zeros((layer.stop - layer.start, len(layer.sources)))
+            np.add.at(matrix, (layer.rows, layer.cols), weights[layer.edges])
+            layer_weights.append(matrix)
+        return layer_weights
+
     def forward(self, x: np.ndarray) -> np.ndarray:
         """
         Perform a forward pass through the network given an input.
@@ -74,42 +500,446 @@ class NEATNetwork:
             raise ValueError(
                 "Input array 'x' is empty. Check if 'num_inputs' is set correctly in the genome."
             )
-
-        # Dictionary to store outputs of each node
-        node_outputs = {}
+        if self.backend == "codegen":
+            return np.array(self._evaluate_generated(x))
 
         # Assume input nodes are provided in the correct order
-        input_nodes = [node for node in self.genome.nodes if node.node_type == "input"]
-        output_nodes = [
-            node for node in self.genome.nodes if node.node_type == "output"
+        values = np.zeros(self.plan.num_slots)
+        values[: self.plan.num_inputs] = x[: self.plan.num_inputs]
+
+        # Process the layers in order, applying ReLU for hidden and output nodes
+        for layer, weights in zip(self.plan.layers, self.layer_weights):
+            values[layer.start : layer.stop] = self.ReLU(weights @ values[layer.sources])
+
+        # Collect the outputs for final output nodes
+        return values[self.plan.output_slots] / 200  # Normalize the output
+
+    def forward_into(self, x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Forward pass in the network's inference dtype that reuses buffers.
+
+        All intermediate arrays live in buffers owned by the network, so a
+        simulation loop can call this every step without allocating arrays;
+        see InferenceState for the few bytes a step still allocates.
+        Args:
+            x: Input array to the network
+            out: Optional output array with the network's dtype, defaults to
+                a buffer owned by the network that is reused on every call
+        Returns:
+            Output array from the network
+        """
+        if len(x) == 0:
+            raise ValueError(
+                "Input array 'x' is empty. Check if 'num_inputs' is set correctly in the genome."
+            )
+        if self.backend == "codegen":
+            if out is None:
+                out = self.state.output
+            out[:] = self._evaluate_generated(x)
+            return out
+        return self.state.step(x, out)
+
+    def _evaluate_generated(self, x) -> tuple:
+        """Run the generated evaluator, NumPy scalars make its arithmetic slow."""
+        if isinstance(x, np.ndarray):
+            x = x.tolist()
+        return self.plan.evaluator(x, self.weight_tuple)
+
+    def forward_batch(self, x: np.ndarray) -> np.ndarray:
+        """
+        Perform a forward pass for every row of an input matrix at once, e.g.
+        a recorded (T x num_inputs) observation trace.
+        Args:
+            x: Input matrix, one network input per row
+        Returns:
+            Output matrix with the same rows as `forward` would return
+        """
+        x = np.asarray(x)
+        if x.ndim != 2 or x.shape[1] == 0:
+            raise ValueError(
+                f"Expected a (T x num_inputs) input matrix, got shape {x.shape}."
+            )
+
+        values = np.zeros((len(x), self.plan.num_slots))
+        values[:, : self.plan.num_inputs] = x[:, : self.plan.num_inputs]
+
+        for layer, weights in zip(self.plan.layers, self.layer_weights):
+            values[:, layer.start : layer.stop] = self.ReLU(
+                values[:, layer.sources] @ weights.T
+            )
+
+        return values[:, self.plan.output_slots] / 200  # Normalize the output
+
+
+class PlanCache(LRUCache):
+    """
+    Bounded LRU cache of compiled network plans keyed by genome structure.
+
+    Children produced by weight-only mutations, and unchanged elites, share
+    their structure with a parent, so their networks only need to bind new
+    weights to an existing plan instead of being sorted and compiled again.
+    """
+
+    def __init__(self, maxsize: int = PLAN_CACHE_SIZE):
+        # Entries: (recurrent, structure key) -> plan
+        super().__init__(maxsize)
+
+    def get(
+        self,
+        key: StructureKey,
+        depths: Optional[Callable[[], Dict[int, int]]] = None,
+        recurrent: bool = False,
+    ) -> NetworkPlan:
+        """
+        Return the plan for a structure key, compiling it on a miss.
+
+        `depths` is called on a miss only, e.g. `genome.node_depths`, and its
+        result passed on to `NEATNetwork._compile`. With `recurrent` the plan
+        of a RecurrentNEATNetwork is returned instead.
+        """
+        cache_key = (recurrent, key)
+        plan = super().get(cache_key)
+        if plan is not None:
+            return plan
+
+        if recurrent:
+            plan = RecurrentNEATNetwork._compile(key)
+        else:
+            plan = NEATNetwork._compile(key, depths() if depths is not None else None)
+        self.put(cache_key, plan)
+        return plan
+
+
+default_plan_cache = PlanCache()
+
+
+class NetworkBatch:
+    """
+    Evaluates a population of networks in lockstep, one observation each.
+
+    The compiled plans of all networks are packed into a single block-sparse
+    plan: layer d of the batch holds layer d of every network, so one forward
+    call costs a few NumPy operations per depth level, independent of the
+    number of networks or how their topologies differ.
+    """
+
+    def __init__(self, networks: List[NEATNetwork]):
+        if not networks:
+            raise ValueError("NetworkBatch needs at least one network.")
+        num_inputs = {network.plan.num_inputs for network in networks}
+        num_outputs = {len(network.plan.output_slots) for network in networks}
+        if len(num_inputs) != 1 or len(num_outputs) != 1:
+            raise ValueError(
+                "All networks in a batch must have the same number of inputs and outputs."
+            )
+
+        self.size = len(networks)
+        self.num_inputs = num_inputs.pop()
+        self.num_outputs = num_outputs.pop()
+
+        # Size of every depth level across the whole batch
+        depth = max(len(network.plan.layers) for network in networks)
+        level_sizes = [0] * depth
+        for network in networks:
+            for level, layer in enumerate(network.plan.layers):
+                level_sizes[level] += layer.stop - layer.start
+        level_starts = np.cumsum([self.size * self.num_inputs] + level_sizes)
+        zero_slot = int(level_starts[-1])
+
+        level_offsets = [0] * depth
+        sources = [[] for _ in range(depth)]
+        targets = [[] for _ in range(depth)]
+        weights = [[] for _ in range(depth)]
+        output_slots = []
+        for index, network in enumerate(networks):
+            plan = network.plan
+
+            # Map the slots of this network onto the slots of the batch
+            slot_map = np.full(plan.num_slots, zero_slot, dtype=np.intp)
+            slot_map[: plan.num_inputs] = index * self.num_inputs + np.arange(
+                plan.num_inputs
+            )
+            for level, layer in enumerate(plan.layers):
+                start = level_starts[level] + level_offsets[level]
+                slot_map[layer.start : layer.stop] = start + np.arange(
+                    layer.stop - layer.start
+                )
+
+            for level, layer in enumerate(plan.layers):
+                sources[level].append(slot_map[layer.sources[layer.cols]])
+                targets[level].append(level_offsets[level] + layer.rows)
+                weights[level].append(network.weights[layer.edges])
+                level_offsets[level] += layer.stop - layer.start
+            output_slots.append(slot_map[plan.output_slots])
+
+        self.num_slots = zero_slot + 1
+        self.levels = [
+            (
+                int(level_starts[level]),
+                int(level_starts[level + 1]),
+                np.concatenate(sources[level]),
+                np.concatenate(targets[level]),
+                np.concatenate(weights[level]),
+            )
+            for level in range(depth)
         ]
+        self.output_slots = np.concatenate(output_slots)
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        """
+        Perform a forward pass of every network on its own observation.
+        Args:
+            x: (number of networks x num_inputs) observation matrix, row i is
+                the input of network i
+        Returns:
+            (number of networks x num_outputs) output matrix
+        """
+        x = np.asarray(x)
+        if x.ndim != 2 or x.shape[0] != self.size or x.shape[1] == 0:
+            raise ValueError(
+                f"Expected a ({self.size} x {self.num_inputs}) observation matrix, got {x.shape}."
+            )
+
+        values = np.zeros(self.num_slots)
+        values[: self.size * self.num_inputs] = x[:, : self.num_inputs].ravel()
+
+        for start, stop, sources, targets, weights in self.levels:
+            node_sums = np.bincount(
+                targets, weights=values[sources] * weights, minlength=stop - start
+            )
+            values[start:stop] = np.maximum(0, node_sums)
 
-        # Assign input values
-        for i, node in enumerate(input_nodes):
-            node_outputs[node.id] = x[i]
+        outputs = values[self.output_slots].reshape(self.size, self.num_outputs)
+        return outputs / 200  # Normalize the output
 
-        # Process nodes in topological order
-        for node_id in self.topological_order:
-            # Skip input nodes, their values are already set
-            if node_id in node_outputs:
+
+class RecurrentNEATNetwork:
+    """
+    Stateful network for genomes whose connections form cycles.
+
+    NEATNetwork only evaluates the nodes its topological sort reaches, so
+    every node on or behind a cycle outputs zero. This network keeps the
+    activation of every node in a preallocated buffer across calls and
+    advances the whole graph by one step per call. Nodes are layered by
+    depth after removing the back edges found by a depth-first search from
+    the inputs: connections from earlier layers see this step's values,
+    back edges and self-loops see the values of the previous step.
+    """
+
+    def __init__(
+        self,
+        genome: Genome,
+        dtype=INFERENCE_DTYPE,
+        plan_cache: Optional[PlanCache] = None,
+        compiled: Optional[Tuple[NetworkPlan, List[float], PruneReport]] = None,
+    ):
+        """
+        Args:
+            genome: Genome to build the network of.
+            dtype: Dtype of the inference buffers.
+            plan_cache: Cache the plan is looked up in, the default cache if None.
+            compiled: Recurrent plan, pruned weights and PruneReport of the
+                genome that were already looked up, as done by `create_network`.
+        """
+        self.genome = genome
+
+        if compiled is None:
+            if plan_cache is None:
+                plan_cache = default_plan_cache
+            key, weights, pruning = _pruned_structure(genome)
+            compiled = (plan_cache.get(key, recurrent=True), weights, pruning)
+        self.plan, weights, self.pruning = compiled
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.layer_weights = NEATNetwork._bind_weights(self.plan, self.weights)
+
+        # The activations persist in the buffers of the state between steps
+        self.state = InferenceState(self.plan, self.layer_weights, dtype)
+        self.values = self.state.values
+
+    @staticmethod
+    def _compile(key: StructureKey) -> NetworkPlan:
+        """
+        Compile a possibly cyclic topology into a layered evaluation plan.
+
+        Every non-input node with an incoming connection gets a slot. Edges
+        into input nodes are ignored since inputs are overwritten each step.
+
+        Args:
+            key: Structure key of the genome, see `structure_key`.
+        Returns:
+            The compiled NetworkPlan, its topological order is the order in
+            which the nodes are evaluated.
+        """
+        input_ids, output_ids, edges = key
+        inputs = set(input_ids)
+        adjacency_list = defaultdict(list)
+        incoming = defaultdict(list)
+        for index, (in_node, out_node) in enumerate(edges):
+            if out_node in inputs:
+                continue
+            adjacency_list[in_node].append(out_node)
+            incoming[out_node].append(index)
+
+        # Depth-first search from the inputs to find the back edges
+        back_edges = set()
+        state = {}  # node id -> 1 while on the DFS stack, 2 when finished
+        roots = list(input_ids) + sorted(incoming)
+        for root in roots:
+            if root in state:
                 continue
+            state[root] = 1
+            stack = [(root, iter(adjacency_list[root]))]
+            while stack:
+                node, neighbors = stack[-1]
+                for neighbor in neighbors:
+                    if neighbor not in state:
+                        state[neighbor] = 1
+                        stack.append((neighbor, iter(adjacency_list[neighbor])))
+                        break
+                    if state[neighbor] == 1:
+                        back_edges.add((node, neighbor))
+                else:
+                    state[node] = 2
+                    stack.pop()
 
-            # Compute the value of this node based on incoming connections
-            incoming_connections = [
-                conn
-                for conn in self.genome.connections
-                if conn.out_node == node_id and conn.enabled
-            ]
+        # Longest path depth over the remaining acyclic edges. Hidden nodes
+        # without incoming connections never get a slot and always read zero.
+        has_value = inputs.union(incoming)
+        forward_in_degree = defaultdict(int)
+        for out_node, edge_ids in incoming.items():
+            for i in edge_ids:
+                if edges[i] not in back_edges and edges[i][0] in has_value:
+                    forward_in_degree[out_node] += 1
+        depth = {node_id: 0 for node_id in input_ids}
+        queue = deque(
+            node_id for node_id in sorted(incoming) if forward_in_degree[node_id] == 0
+        )
+        for node_id in queue:
+            depth[node_id] = 1
+        for node_id in input_ids:
+            queue.appendleft(node_id)
 
-            node_sum = 0
-            for conn in incoming_connections:
-                in_node = conn.in_node
-                weight = conn.weight
-                node_sum += node_outputs.get(in_node, 0) * weight
+        evaluation_order = []
+        while queue:
+            node = queue.popleft()
+            if node not in inputs:
+                evaluation_order.append(node)
+            for neighbor in adjacency_list[node]:
+                if (node, neighbor) in back_edges:
+                    continue
+                depth[neighbor] = max(depth.get(neighbor, 1), depth.get(node, 0) + 1)
+                forward_in_degree[neighbor] -= 1
+                if forward_in_degree[neighbor] == 0:
+                    queue.append(neighbor)
 
-            # Apply activation (ReLU for hidden and output nodes)
-            node_outputs[node_id] = self.ReLU(node_sum)
+        layer_nodes = defaultdict(list)
+        for node_id in evaluation_order:
+            layer_nodes[depth[node_id]].append(node_id)
 
-        # Collect the outputs for final output nodes
-        output = np.array([node_outputs.get(node.id, 0) for node in output_nodes])
-        return output / 200  # Normalize the output
+        slots = {node_id: slot for slot, node_id in enumerate(input_ids)}
+        next_slot = len(input_ids)
+        for level in sorted(layer_nodes):
+            for node_id in layer_nodes[level]:
+                slots[node_id] = next_slot
+                next_slot += 1
+        zero_slot = next_slot
+
+        layers = []
+        for level in sorted(layer_nodes):
+            nodes = layer_nodes[level]
+            start = slots[nodes[0]]
+            edge_ids = [i for node_id in nodes for i in incoming[node_id]]
+            source_slots = [slots.get(edges[i][0], zero_slot) for i in edge_ids]
+            sources = sorted(set(source_slots))
+            columns = {slot: col for col, slot in enumerate(sources)}
+            layers.append(
+                LayerPlan(
+                    start=start,
+                    stop=start + len(nodes),
+                    sources=np.array(sources, dtype=np.intp),
+                    rows=np.array(
+                        [slots[edges[i][1]] - start for i in edge_ids], dtype=np.intp
+                    ),
+                    cols=np.array([columns[slot] for slot in source_slots], dtype=np.intp),
+                    edges=np.array(edge_ids, dtype=np.intp),
+                )
+            )
+
+        return NetworkPlan(
+            num_inputs=len(input_ids),
+            num_slots=zero_slot + 1,
+            edges=edges,
+            layers=layers,
+            output_slots=np.array(
+                [slots.get(node_id, zero_slot) for node_id in output_ids],
+                dtype=np.intp,
+            ),
+            topological_order=[
+                node_id for level in sorted(layer_nodes) for node_id in layer_nodes[level]
+            ],
+        )
+
+    def reset(self):
+        """Clear the activation state, e.g. before a new simulation."""
+        self.values.fill(0)
+
+    def forward(self, x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Advance the network by one step.
+        Args:
+            x: Input array to the network
+            out: Optional output array with the network's dtype
+        Returns:
+            Output array from the network
+        """
+        if out is None:
+            out = np.empty(len(self.plan.output_slots), dtype=self.state.dtype)
+        return self.forward_into(x, out)
+
+    def forward_into(self, x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Version of `forward` that reuses the buffers of the state, see
+        InferenceState.
+        Args:
+            x: Input array to the network
+            out: Optional output array with the network's dtype, defaults to
+                a buffer owned by the network that is reused on every call
+        Returns:
+            Output array from the network
+        """
+        if len(x) == 0:
+            raise ValueError(
+                "Input array 'x' is empty. Check if 'num_inputs' is set correctly in the genome."
+            )
+        return self.state.step(x, out)
+
+
+def create_network(
+    genome: Genome,
+    dtype=INFERENCE_DTYPE,
+    backend: str = NETWORK_BACKEND,
+    plan_cache: Optional[PlanCache] = None,
+):
+    """
+    Create the network used to run a genome in the simulation.
+
+    The backend only applies to feed-forward networks, recurrent networks
+    always use the matrix plan. Whether the genome needs a recurrent network
+    is read from its cached feed-forward plan, so the structure of a cyclic
+    genome is only compiled as feed-forward once.
+
+    Returns:
+        A NEATNetwork if its topological sort reaches every connected node,
+        otherwise a RecurrentNEATNetwork so that nodes on cycles still compute.
+    """
+    if plan_cache is None:
+        plan_cache = default_plan_cache
+    key, weights, pruning = _pruned_structure(genome)
+    default_pruning_stats.record(pruning)
+    plan = plan_cache.get(key, getattr(genome, "node_depths", None))
+    if plan.complete:
+        return NEATNetwork(
+            genome, dtype=dtype, backend=backend, compiled=(plan, weights, pruning)
+        )
+    plan = plan_cache.get(key, recurrent=True)
+    return RecurrentNEATNetwork(genome, dtype=dtype, compiled=(plan, weights, pruning))
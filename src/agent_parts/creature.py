@@ -162,3 +162,35 @@ class Creature:
 
     def get_limb_positions(self) -> list[tuple[float, float]]:
         return [(limb.body.position.x, limb.body.position.y) for limb in self.limbs]
+
+    def get_observation_size(self) -> int:
+        """Return the number of values written by fill_observation."""
+        return 4 + len(self.motors) + 2 * len(self.limbs)
+
+    def fill_observation(self, observation) -> None:
+        """
+        Write the current sensor readings into a preallocated array.
+
+        The layout is the vision points, the joint rates and the limb
+        positions, the same as the network inputs built in main.py. The
+        array is reused, but reading the pymunk body positions creates
+        Vec2d objects, about 130 bytes per call with three limbs.
+        Args:
+        - observation: Array with at least get_observation_size() entries.
+        """
+        near_periphery = self.vision.get_near_periphery()
+        far_periphery = self.vision.get_far_periphery()
+        observation[0] = near_periphery.x
+        observation[1] = near_periphery.y
+        observation[2] = far_periphery.x
+        observation[3] = far_periphery.y
+
+        index = 4
+        for motor in self.motors:
+            observation[index] = motor.motor.rate
+            index += 1
+        for limb in self.limbs:
+            position = limb.body.position
+            observation[index] = position.x
+            observation[index + 1] = position.y
+            index += 2
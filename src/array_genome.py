@@ -0,0 +1,384 @@
+# src/array_genome.py
+
+import random
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.compatibility import compatibility_distance
+from src.genome import Connection, Genome, Innovation, Node
+from src.innovation import InnovationRegistry
+from src.globals import (
+    MUTATION_RATE_WEIGHT,
+    MUTATION_RATE_CONNECTION,
+    MUTATION_RATE_NODE,
+    FEED_FORWARD,
+)
+
+NODE_TYPES = ("input", "hidden", "output")
+INPUT, HIDDEN, OUTPUT = range(len(NODE_TYPES))
+
+
+class ArrayGenome:
+    """
+    Compact struct-of-arrays alternative to Genome.
+
+    Connections are stored as parallel NumPy arrays sorted by innovation
+    number and nodes as typed id/type arrays, so copying, crossover and
+    distance computations work on whole arrays instead of walking one
+    dataclass instance per gene. The public API matches Genome, and the
+    `nodes` and `connections` properties build Node and Connection lists
+    for code like NEATNetwork that reads them.
+    """
+
+    def __init__(
+        self,
+        genome_id: int,
+        num_inputs: int = 0,
+        num_outputs: int = 0,
+        innovation: Optional[InnovationRegistry] = None,
+        feed_forward: Optional[bool] = None,
+    ):
+        self.id = genome_id
+        self.feed_forward = FEED_FORWARD if feed_forward is None else feed_forward
+        self.fitness: float = 0.0
+        self.species: int = 0
+        self.adjusted_fitness: float = 0.0
+        self.innovation = innovation if innovation is not None else Innovation.get_instance()
+
+        # Store number of inputs and outputs
+        self.num_inputs = num_inputs
+        self.num_outputs = num_outputs
+
+        # Input nodes followed by output nodes
+        self.node_ids = np.arange(num_inputs + num_outputs, dtype=np.int64)
+        self.node_types = np.array(
+            [INPUT] * num_inputs + [OUTPUT] * num_outputs, dtype=np.int8
+        )
+
+        # Connect each input node to each output node with a random weight
+        in_nodes = np.repeat(np.arange(num_inputs, dtype=np.int64), num_outputs)
+        out_nodes = np.tile(
+            np.arange(num_inputs, num_inputs + num_outputs, dtype=np.int64), num_inputs
+        )
+        innovations = np.array(
+            [
+                self.innovation.get_innovation_number(int(in_node), int(out_node))
+                for in_node, out_node in zip(in_nodes, out_nodes)
+            ],
+            dtype=np.int64,
+        )
+        self._set_connections(
+            in_nodes,
+            out_nodes,
+            np.random.uniform(-1.0, 1.0, len(in_nodes)),
+            innovations,
+            np.ones(len(in_nodes), dtype=bool),
+        )
+
+    def _set_connections(self, in_nodes, out_nodes, weights, innovations, enabled):
+        """Store connection arrays, sorted by innovation number."""
+        order = np.argsort(innovations, kind="stable")
+        self.in_nodes = np.asarray(in_nodes, dtype=np.int64)[order]
+        self.out_nodes = np.asarray(out_nodes, dtype=np.int64)[order]
+        self.weights = np.asarray(weights, dtype=np.float64)[order]
+        self.innovations = np.asarray(innovations, dtype=np.int64)[order]
+        self.enabled = np.asarray(enabled, dtype=bool)[order]
+
+    def _add_connection(self, in_node: int, out_node: int, weight: float):
+        """Insert a connection at its place in innovation order."""
+        innovation_number = self.innovation.get_innovation_number(in_node, out_node)
+        index = np.searchsorted(self.innovations, innovation_number)
+        self.in_nodes = np.insert(self.in_nodes, index, in_node)
+        self.out_nodes = np.insert(self.out_nodes, index, out_node)
+        self.weights = np.insert(self.weights, index, weight)
+        self.innovations = np.insert(self.innovations, index, innovation_number)
+        self.enabled = np.insert(self.enabled, index, True)
+
+    @property
+    def nodes(self) -> List[Node]:
+        """Node list in Genome form. Changing it does not change the genome."""
+        return [
+            Node(id=int(node_id), node_type=NODE_TYPES[node_type])
+            for node_id, node_type in zip(self.node_ids, self.node_types)
+        ]
+
+    @property
+    def connections(self) -> List[Connection]:
+        """Connection list in Genome form. Changing it does not change the genome."""
+        return [
+            Connection(
+                in_node=int(in_node),
+                out_node=int(out_node),
+                weight=float(weight),
+                innovation_number=int(innovation_number),
+                enabled=bool(enabled),
+            )
+            for in_node, out_node, weight, innovation_number, enabled in zip(
+                self.in_nodes, self.out_nodes, self.weights, self.innovations, self.enabled
+            )
+        ]
+
+    def remap_innovations(self, mapping: Dict[int, int]):
+        """Replace innovation numbers, e.g. provisional ones after a shard merge."""
+        innovations = np.array(
+            [mapping.get(int(number), int(number)) for number in self.innovations],
+            dtype=np.int64,
+        )
+        self._set_connections(
+            self.in_nodes, self.out_nodes, self.weights, innovations, self.enabled
+        )
+
+    def weight_array(self) -> np.ndarray:
+        """Weights of all connections, in innovation order."""
+        return self.weights
+
+    def set_weight_array(self, weights: np.ndarray):
+        """Write back weights in the order of `weight_array`."""
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+    def mutate_weights(self, delta: float = 0.1):
+        """Mutate the weights of the connections."""
+        replace = np.random.random(len(self.weights)) < 0.1
+        self.weights = np.where(
+            replace,
+            np.random.uniform(-1.0, 1.0, len(self.weights)),
+            self.weights + np.random.normal(0, delta, len(self.weights)),
+        )
+
+    def mutate_connections(self, rng=random):
+        """Add a new connection between two nodes."""
+        in_node = int(self.node_ids[rng.randrange(len(self.node_ids))])
+        out_node = int(self.node_ids[rng.randrange(len(self.node_ids))])
+        if in_node == out_node:
+            return  # Avoid self-loops
+        # Check if connection already exists
+        if np.any((self.in_nodes == in_node) & (self.out_nodes == out_node)):
+            return
+        if self.feed_forward and (
+            self.node_types[self.node_ids == out_node][0] == INPUT
+            or self._reaches(out_node, in_node)
+        ):
+            return
+        self._add_connection(in_node, out_node, rng.uniform(-1.0, 1.0))
+
+    def _reaches(self, source: int, target: int) -> bool:
+        """Whether target can be reached from source over enabled connections."""
+        in_nodes = self.in_nodes[self.enabled]
+        out_nodes = self.out_nodes[self.enabled]
+        seen = np.array([source], dtype=np.int64)
+        frontier = seen
+        while len(frontier):
+            frontier = np.setdiff1d(out_nodes[np.isin(in_nodes, frontier)], seen)
+            if np.any(frontier == target):
+                return True
+            seen = np.union1d(seen, frontier)
+        return False
+
+    def _break_cycles(self):
+        """
+        Disable connections that close a cycle, keeping the earlier one in
+        innovation order. Only crossover or hand-edited genomes can contain
+        cycles in feed-forward mode.
+        """
+        enabled = self.enabled.copy()
+        self.enabled[:] = False
+        for index in np.flatnonzero(enabled):
+            if not self._reaches(int(self.out_nodes[index]), int(self.in_nodes[index])):
+                self.enabled[index] = True
+
+    def mutate_nodes(self, rng=random):
+        """Add a new node by splitting an existing connection."""
+        if len(self.innovations) == 0:
+            return
+        index = rng.randrange(len(self.innovations))
+        if not self.enabled[index]:
+            return
+        self.enabled[index] = False
+        in_node = int(self.in_nodes[index])
+        out_node = int(self.out_nodes[index])
+        weight = float(self.weights[index])
+
+        new_node_id = int(self.node_ids.max()) + 1
+        self.node_ids = np.append(self.node_ids, new_node_id)
+        self.node_types = np.append(self.node_types, np.int8(HIDDEN))
+
+        self._add_connection(in_node, new_node_id, 1.0)
+        self._add_connection(new_node_id, out_node, weight)
+
+    def mutate(self):
+        """Apply mutations to the genome."""
+
+        if random.random() < MUTATION_RATE_WEIGHT:
+            self.mutate_weights(delta=0.1)
+        if random.random() < MUTATION_RATE_CONNECTION:
+            self.mutate_connections()
+        if random.random() < MUTATION_RATE_NODE:
+            self.mutate_nodes()
+
+    def gene_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Innovation numbers and weights of all connections, sorted by innovation."""
+        return self.innovations, self.weights
+
+    def compute_compatibility_distance(self, other, c1=1.0, c2=1.0, c3=0.4) -> float:
+        """Calculate the genetic distance (delta) between two genomes."""
+        return compatibility_distance(*self.gene_arrays(), *other.gene_arrays(), c1, c2, c3)
+
+    def crossover(self, other):
+        """Perform crossover between two genomes."""
+        # Assume self is the more fit parent
+        child = self._empty_like(genome_id=-1)  # Temporary ID
+
+        # Ensure all nodes from other are present
+        missing = ~np.isin(other.node_ids, self.node_ids)
+        child.node_ids = np.concatenate([self.node_ids, other.node_ids[missing]])
+        child.node_types = np.concatenate([self.node_types, other.node_types[missing]])
+
+        # Matching genes are taken from a random parent, the others from the
+        # parent that has them
+        _, index1, index2 = np.intersect1d(
+            self.innovations, other.innovations, assume_unique=True, return_indices=True
+        )
+        from_other = np.random.random(len(index1)) >= 0.5
+        self_genes = np.ones(len(self.innovations), dtype=bool)
+        self_genes[index1[from_other]] = False
+        other_genes = np.ones(len(other.innovations), dtype=bool)
+        other_genes[index2[~from_other]] = False
+
+        child._set_connections(
+            *(
+                np.concatenate([mine[self_genes], theirs[other_genes]])
+                for mine, theirs in (
+                    (self.in_nodes, other.in_nodes),
+                    (self.out_nodes, other.out_nodes),
+                    (self.weights, other.weights),
+                    (self.innovations, other.innovations),
+                    (self.enabled, other.enabled),
+                )
+            )
+        )
+        if child.feed_forward:
+            child._break_cycles()
+        return child
+
+    def _empty_like(self, genome_id: int) -> "ArrayGenome":
+        """Create a genome with this genome's inputs and outputs but no genes."""
+        genome = ArrayGenome.__new__(ArrayGenome)
+        genome.id = genome_id
+        genome.feed_forward = self.feed_forward
+        genome.fitness = 0.0
+        genome.species = 0
+        genome.adjusted_fitness = 0.0
+        genome.innovation = self.innovation
+        genome.num_inputs = self.num_inputs
+        genome.num_outputs = self.num_outputs
+        return genome
+
+    def copy(self):
+        """Create a deep copy of the genome."""
+        new_genome = self._empty_like(genome_id=self.id)
+        new_genome.node_ids = self.node_ids.copy()
+        new_genome.node_types = self.node_types.copy()
+        new_genome.in_nodes = self.in_nodes.copy()
+        new_genome.out_nodes = self.out_nodes.copy()
+        new_genome.weights = self.weights.copy()
+        new_genome.innovations = self.innovations.copy()
+        new_genome.enabled = self.enabled.copy()
+        new_genome.fitness = self.fitness
+        new_genome.adjusted_fitness = self.adjusted_fitness
+        new_genome.species = self.species
+        return new_genome
+
+    def __str__(self):
+        return f"Genome ID: {self.id}, Fitness: {self.fitness}, Species: {self.species}, Adjusted Fitness: {self.adjusted_fitness}"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __eq__(self, other):
+        return self.id == other.id
+
+    def __lt__(self, other):
+        return self.fitness < other.fitness
+
+    def to_dict(self):
+        """Serialize the genome to a dictionary in the same format as Genome."""
+        return {
+            'id': self.id,
+            'fitness': self.fitness,
+            'adjusted_fitness': self.adjusted_fitness,
+            'species': self.species,
+            'num_inputs': self.num_inputs,
+            'num_outputs': self.num_outputs,
+            'feed_forward': self.feed_forward,
+            'nodes': [node.__dict__ for node in self.nodes],
+            'connections': [conn.__dict__ for conn in self.connections],
+        }
+
+    def to_payload(self) -> tuple:
+        """Serialize the genome to the compact tuple format of Genome."""
+        return (
+            self.id,
+            self.num_inputs,
+            self.num_outputs,
+            self.feed_forward,
+            [
+                (node_id, NODE_TYPES[node_type])
+                for node_id, node_type in zip(
+                    self.node_ids.tolist(), self.node_types.tolist()
+                )
+            ],
+            list(
+                zip(
+                    self.in_nodes.tolist(),
+                    self.out_nodes.tolist(),
+                    self.weights.tolist(),
+                    self.innovations.tolist(),
+                    self.enabled.tolist(),
+                )
+            ),
+        )
+
+    @classmethod
+    def from_dict(cls, data, innovation: Optional[InnovationRegistry] = None):
+        """Deserialize a genome from a dictionary written by either genome class."""
+        genome = cls.__new__(cls)
+        genome.id = data['id']
+        genome.fitness = data['fitness']
+        genome.adjusted_fitness = data['adjusted_fitness']
+        genome.species = data['species']
+        genome.innovation = innovation if innovation is not None else Innovation.get_instance()
+        genome.num_inputs = data['num_inputs']
+        genome.num_outputs = data['num_outputs']
+        genome.feed_forward = data.get('feed_forward', False)
+
+        # Reconstruct nodes
+        genome.node_ids = np.array(
+            [node['id'] for node in data['nodes']], dtype=np.int64
+        )
+        genome.node_types = np.array(
+            [NODE_TYPES.index(node['node_type']) for node in data['nodes']],
+            dtype=np.int8,
+        )
+
+        # Reconstruct connections
+        connections = data['connections']
+        genome._set_connections(
+            [conn['in_node'] for conn in connections],
+            [conn['out_node'] for conn in connections],
+            [conn['weight'] for conn in connections],
+            [conn['innovation_number'] for conn in connections],
+            [conn.get('enabled', True) for conn in connections],
+        )
+        if genome.feed_forward:
+            genome._break_cycles()
+        return genome
+
+    @classmethod
+    def from_genome(cls, genome: Genome) -> "ArrayGenome":
+        """Convert a Genome to the array representation."""
+        return cls.from_dict(genome.to_dict(), innovation=genome.innovation)
+
+    def to_genome(self) -> Genome:
+        """Convert the genome to the object representation."""
+        return Genome.from_dict(self.to_dict(), innovation=self.innovation)
@@ -0,0 +1,173 @@
+# src/compatibility.py
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+
+@dataclass
+class PackedGenes:
+    """Gene arrays of several genomes concatenated for one-vs-many distances."""
+
+    innovations: np.ndarray  # Innovation numbers, sorted within every genome
+    weights: np.ndarray  # Weight of every gene
+    owners: np.ndarray  # Index of the genome every gene belongs to
+    lengths: np.ndarray  # Number of genes of every genome
+    starts: np.ndarray  # Index of the first gene of every genome
+    max_innovations: np.ndarray  # Highest innovation number of every genome, 0 if none
+
+
+def pack_genes(genomes: List) -> PackedGenes:
+    """
+    Concatenate the gene arrays of several genomes.
+
+    Args:
+        genomes: Genomes providing `gene_arrays()`.
+    Returns:
+        The PackedGenes of the genomes, in the given order.
+    """
+    arrays = [genome.gene_arrays() for genome in genomes]
+    lengths = np.array([len(innovations) for innovations, _ in arrays], dtype=np.int64)
+    return PackedGenes(
+        innovations=np.concatenate(
+            [innovations for innovations, _ in arrays] + [np.empty(0, dtype=np.int64)]
+        ),
+        weights=np.concatenate([weights for _, weights in arrays] + [np.empty(0)]),
+        owners=np.repeat(np.arange(len(arrays)), lengths),
+        lengths=lengths,
+        starts=np.cumsum(lengths) - lengths,
+        max_innovations=np.array(
+            [innovations[-1] if len(innovations) else 0 for innovations, _ in arrays],
+            dtype=np.int64,
+        ),
+    )
+
+
+def select_genes(packed: PackedGenes, indices: List[int]) -> PackedGenes:
+    """
+    Packed genes of a subset of the packed genomes, without packing again.
+
+    Args:
+        packed: Packed genes, e.g. of all species representatives.
+        indices: Positions of the genomes to keep, in the order wanted.
+    Returns:
+        The PackedGenes of the selected genomes.
+    """
+    indices = np.asarray(indices, dtype=np.intp)
+    lengths = packed.lengths[indices]
+    starts = np.cumsum(lengths) - lengths
+    # Gene i of the selection is gene i - starts[k] + packed.starts[k] of genome k
+    positions = np.arange(lengths.sum()) + np.repeat(
+        packed.starts[indices] - starts, lengths
+    )
+    return PackedGenes(
+        innovations=packed.innovations[positions],
+        weights=packed.weights[positions],
+        owners=np.repeat(np.arange(len(indices)), lengths),
+        lengths=lengths,
+        starts=starts,
+        max_innovations=packed.max_innovations[indices],
+    )
+
+
+def compatibility_distance(
+    innovations1: np.ndarray,
+    weights1: np.ndarray,
+    innovations2: np.ndarray,
+    weights2: np.ndarray,
+    c1: float = 1.0,
+    c2: float = 1.0,
+    c3: float = 0.4,
+) -> float:
+    """
+    Genetic distance (delta) between two genomes given as sorted gene arrays.
+
+    Genes beyond the highest innovation number of the other genome are
+    excess, other non-matching genes are disjoint.
+
+    Args:
+        innovations1, weights1: Sorted unique innovation numbers and weights
+            of the first genome.
+        innovations2, weights2: The same for the second genome.
+        c1, c2, c3: Weights of excess genes, disjoint genes and the average
+            weight difference of matching genes.
+    Returns:
+        The compatibility distance.
+    """
+    packed = PackedGenes(
+        innovations=innovations2,
+        weights=weights2,
+        owners=np.zeros(len(innovations2), dtype=np.intp),
+        lengths=np.array([len(innovations2)]),
+        starts=np.zeros(1, dtype=np.int64),
+        max_innovations=np.array([innovations2[-1] if len(innovations2) else 0]),
+    )
+    return float(
+        compatibility_distances(innovations1, weights1, packed, c1, c2, c3)[0]
+    )
+
+
+def compatibility_distances(
+    innovations: np.ndarray,
+    weights: np.ndarray,
+    others: PackedGenes,
+    c1: float = 1.0,
+    c2: float = 1.0,
+    c3: float = 0.4,
+) -> np.ndarray:
+    """
+    Genetic distance between one genome and every genome in `others`.
+
+    Matching genes are found with a single searchsorted over all packed
+    genes, and the per-genome counts are summed with bincount.
+
+    Args:
+        innovations, weights: Sorted unique gene arrays of the genome.
+        others: Packed genes of the genomes to compare against.
+        c1, c2, c3: See `compatibility_distance`.
+    Returns:
+        The distance to every packed genome, in packing order.
+    """
+    count = len(others.lengths)
+    length = len(innovations)
+    max_innovation = innovations[-1] if length else 0
+
+    if length:
+        positions = np.minimum(
+            np.searchsorted(innovations, others.innovations), length - 1
+        )
+        matches = innovations[positions] == others.innovations
+        weight_differences = np.where(
+            matches, np.abs(others.weights - weights[positions]), 0.0
+        )
+    else:
+        matches = np.zeros(len(others.innovations), dtype=bool)
+        weight_differences = np.zeros(len(others.innovations))
+
+    matching_genes = np.bincount(others.owners, weights=matches, minlength=count)
+    weight_difference_sum = np.bincount(
+        others.owners, weights=weight_differences, minlength=count
+    )
+
+    # Excess genes of the packed genomes lie beyond this genome's last gene,
+    # and excess genes of this genome beyond each packed genome's last gene
+    excess_genes = np.bincount(
+        others.owners, weights=others.innovations > max_innovation, minlength=count
+    ) + (length - np.searchsorted(innovations, others.max_innovations, side="right"))
+    disjoint_genes = length + others.lengths - 2 * matching_genes - excess_genes
+
+    N = np.maximum(length, others.lengths).astype(np.float64)
+    N[N < 20] = 1  # Avoid excessive normalization for small genomes
+
+    average_weight_difference = np.divide(
+        weight_difference_sum,
+        matching_genes,
+        out=np.zeros(count),
+        where=matching_genes > 0,
+    )
+    return (
+        (c1 * excess_genes / N)
+        + (c2 * disjoint_genes / N)
+        + (c3 * average_weight_difference)
+    )
@@ -0,0 +1,332 @@
+# src/distributed.py
+
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing.connection import Client, Connection, Listener, wait
+from typing import List, Optional, Set
+
+from src.genome import Genome
+from src.globals import (
+    DISTRIBUTED_ADDRESS,
+    DISTRIBUTED_AUTHKEY,
+    HEARTBEAT_INTERVAL,
+    HEARTBEAT_TIMEOUT,
+    SIMULATION_STEPS,
+    WORK_ITEM_RETRIES,
+    WORKER_PREFETCH,
+)
+from src.workers import worker_context, worker_simulation
+
+# Messages are tuples whose first element is the message type:
+#   coordinator -> worker: ("config", steps, config), ("evaluate", batch, item, payload),
+#       ("stop",)
+#   worker -> coordinator: ("ready", config), ("result", batch, item, fitness),
+#       ("heartbeat",)
+# The batch numbers the evaluate_population call, so results that arrive
+# after their call failed are not taken for genomes of the next call.
+
+
+def run_worker(address, authkey: bytes = DISTRIBUTED_AUTHKEY):
+    """
+    Connect to a coordinator and evaluate genomes until it says stop.
+
+    A background thread sends a heartbeat every HEARTBEAT_INTERVAL seconds,
+    also while a genome is being simulated, so the coordinator can tell a
+    slow worker from a lost one.
+
+    Args:
+        address: (host, port) of a TCP coordinator or the path of a Unix socket.
+        authkey: Shared secret of the coordinator.
+    """
+    connection = Client(address, authkey=authkey)
+    send_lock = threading.Lock()
+    stopped = threading.Event()
+
+    def send(message):
+        with send_lock:
+            connection.send(message)
+
+    def heartbeat():
+        while not stopped.wait(HEARTBEAT_INTERVAL):
+            try:
+                send(("heartbeat",))
+            except OSError:
+                return
+
+    message = connection.recv()
+    if message[0] == "stop":
+        connection.close()
+        return
+    _, steps, _ = message
+    simulation = worker_simulation(steps)
+    send(("ready", simulation.config()))
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                break
+            if message[0] == "stop":
+                break
+            _, batch, item, payload = message
+            fitness = simulation.evaluate(Genome.from_payload(payload))
+            send(("result", batch, item, fitness))
+    finally:
+        stopped.set()
+        connection.close()
+
+
+def _stop(connection: Connection):
+    """Tell a worker to stop and close its connection."""
+    try:
+        connection.send(("stop",))
+    except OSError:
+        pass
+    connection.close()
+
+
+@dataclass(eq=False)
+class _WorkerLink:
+    """Coordinator side of a worker connection."""
+
+    connection: Connection
+    last_seen: float
+    ready: bool = False
+    items: Set[int] = field(default_factory=set)  # Work items in flight
+
+
+class EvaluationCoordinator:
+    """
+    Evaluates populations on worker processes connected over sockets.
+
+    Workers connect with `run_worker`, or with
+    `python -m src.distributed HOST PORT` on another host, at any time, and
+    get the evaluation config. A worker whose simulation config differs, e.g.
+    because of another INFERENCE_DTYPE, is turned away. Genomes are streamed
+    to the workers as `to_payload` tuples, WORKER_PREFETCH at a time per
+    worker, and the fitness values come back in population order.
+
+    A worker that disconnects or misses heartbeats for HEARTBEAT_TIMEOUT
+    seconds is dropped and its work items are sent to other workers, up to
+    WORK_ITEM_RETRIES times per item.
+
+    The coordinator is a drop-in replacement for ParallelEvaluator in
+    `GeneticAlgorithm.evolve`. Closing it tells the connected workers to
+    stop and closes the listener, so remote workers exit as well.
+    """
+
+    def __init__(
+        self,
+        address=DISTRIBUTED_ADDRESS,
+        authkey: bytes = DISTRIBUTED_AUTHKEY,
+        local_workers: int = 0,
+        steps: int = SIMULATION_STEPS,
+        heartbeat_timeout: float = HEARTBEAT_TIMEOUT,
+        retries: int = WORK_ITEM_RETRIES,
+        prefetch: int = WORKER_PREFETCH,
+    ):
+        """
+        Args:
+            address: (host, port) to listen on, port 0 for any free port, or
+                the path of a Unix socket.
+            authkey: Shared secret workers must present.
+            local_workers: Worker processes to spawn on this machine, e.g.
+                for tests.
+            steps: Simulation steps per genome.
+            heartbeat_timeout: Seconds of silence after which a worker is
+                considered lost.
+            retries: Times a work item is sent again after its worker was lost.
+            prefetch: Work items in flight per worker.
+        """
+        if local_workers < 0 or retries < 0 or prefetch < 1:
+            raise ValueError("local_workers, retries must be >= 0 and prefetch >= 1")
+        self.steps = steps
+        self.heartbeat_timeout = heartbeat_timeout
+        self.retries = retries
+        self.prefetch = prefetch
+        self.authkey = authkey
+        # A backlog of one would make workers that connect at the same time
+        # wait for TCP retransmissions
+        self._listener = Listener(address, backlog=64, authkey=authkey)
+        self.address = self._listener.address
+        self._accepted: "queue.Queue[Connection]" = queue.Queue()
+        self._links: List[_WorkerLink] = []
+        self._config = None
+        self._batch = 0  # Number of the current evaluate_population call
+        self._closed = False
+        self._close_lock = threading.Lock()  # Orders close() and new connections
+
+        # Local workers are forked before the accept thread starts, and after
+        # the simulation is imported, so they neither inherit a lock held by
+        # another thread nor import the simulation again
+        self._expected_config()
+        self._processes = [
+            worker_context().Process(target=run_worker, args=(self.address, authkey), daemon=True)
+            for _ in range(local_workers)
+        ]
+        for process in self._processes:
+            process.start()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        """Accept worker connections until the listener is closed."""
+        while True:
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                return
+            except Exception:
+                # Failed handshakes, e.g. a wrong authkey, are ignored
+                continue
+            with self._close_lock:
+                if not self._closed:
+                    self._accepted.put(connection)
+                    continue
+            _stop(connection)
+            return
+
+    def _expected_config(self) -> tuple:
+        if self._config is None:
+            from src.simulation import Simulation
+
+            self._config = Simulation(self.steps).config()
+        return self._config
+
+    def _add_workers(self):
+        """Send the config to newly connected workers."""
+        while True:
+            try:
+                connection = self._accepted.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                connection.send(("config", self.steps, self._expected_config()))
+            except OSError:
+                connection.close()
+                continue
+            self._links.append(_WorkerLink(connection, time.monotonic()))
+
+    def _drop(self, link: _WorkerLink, pending: deque, attempts: List[int]):
+        """Disconnect a worker and queue its work items again."""
+        self._links.remove(link)
+        link.connection.close()
+        for item in sorted(link.items):
+            attempts[item] += 1
+            if attempts[item] > self.retries:
+                raise RuntimeError(
+                    f"Work item {item} failed on {attempts[item]} workers"
+                )
+            pending.appendleft(item)
+
+    def evaluate_population(self, genomes: List[Genome]) -> List[float]:
+        """
+        Evaluate genomes on the connected workers and return their fitness
+        values in the same order.
+
+        Raises:
+            RuntimeError: If no worker is connected for `heartbeat_timeout`
+                seconds, or a work item was lost more than `retries` times.
+        """
+        self._batch += 1
+        batch = self._batch
+        # Items of an earlier call that failed may still be in flight, their
+        # results are ignored and must not count against the prefetch
+        for link in self._links:
+            link.items.clear()
+        payloads = [genome.to_payload() for genome in genomes]
+        fitnesses: List[Optional[float]] = [None] * len(payloads)
+        attempts = [0] * len(payloads)
+        pending = deque(range(len(payloads)))
+        remaining = len(payloads)
+        idle_since = time.monotonic()
+
+        while remaining:
+            self._add_workers()
+            now = time.monotonic()
+            if not any(link.ready for link in self._links):
+                if now - idle_since > self.heartbeat_timeout:
+                    raise RuntimeError("No evaluation worker connected")
+            else:
+                idle_since = now
+
+            # Keep every ready worker busy
+            for link in list(self._links):
+                while link.ready and pending and len(link.items) < self.prefetch:
+                    item = pending.popleft()
+                    try:
+                        link.connection.send(("evaluate", batch, item, payloads[item]))
+                    except OSError:
+                        pending.appendleft(item)
+                        self._drop(link, pending, attempts)
+                        break
+                    link.items.add(item)
+
+            links = {link.connection: link for link in self._links}
+            for connection in wait(list(links), timeout=0.1):
+                link = links[connection]
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    self._drop(link, pending, attempts)
+                    continue
+                link.last_seen = time.monotonic()
+                if message[0] == "ready":
+                    if message[1] == self._expected_config():
+                        link.ready = True
+                    else:
+                        self._drop(link, pending, attempts)
+                elif message[0] == "result":
+                    _, result_batch, item, fitness = message
+                    if result_batch != batch:
+                        continue
+                    link.items.discard(item)
+                    if fitnesses[item] is None:
+                        fitnesses[item] = fitness
+                        remaining -= 1
+
+            now = time.monotonic()
+            for link in list(self._links):
+                if now - link.last_seen > self.heartbeat_timeout:
+                    self._drop(link, pending, attempts)
+        return fitnesses
+
+    def __call__(self, genome: Genome) -> float:
+        """Evaluate a single genome on whichever worker takes it."""
+        return self.evaluate_population([genome])[0]
+
+    def close(self):
+        """Stop the workers and the listener."""
+        with self._close_lock:
+            self._closed = True
+        self._listener.close()
+        connections = [link.connection for link in self._links]
+        while not self._accepted.empty():
+            connections.append(self._accepted.get_nowait())
+        for connection in connections:
+            _stop(connection)
+        self._links = []
+        for process in self._processes:
+            process.join(self.heartbeat_timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def __enter__(self) -> "EvaluationCoordinator":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    # Remote worker: python -m src.distributed HOST PORT, the authkey is read
+    # from the CRAWLAI_AUTHKEY environment variable if set
+    host, port = sys.argv[1], int(sys.argv[2])
+    authkey = os.environ.get("CRAWLAI_AUTHKEY", "").encode() or DISTRIBUTED_AUTHKEY
+    run_worker((host, port), authkey)
@@ -0,0 +1,229 @@
+# src/evaluation.py
+
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from src.fitness_cache import FitnessCache, genome_hash
+from src.genome import Genome
+from src.globals import (
+    EVALUATION_WORKERS,
+    EVALUATION_CHUNK_SIZE,
+    FITNESS_CACHE_SIZE,
+    SIMULATION_STEPS,
+)
+from src.NEATnetwork import default_plan_cache, default_pruning_stats
+from src.workers import worker_context, worker_simulation
+
+# Plan cache and pruning counters that workers report back, see _counted
+NETWORK_STATS = ("hits", "misses", "networks", "nodes", "edges")
+
+# Simulation of the current worker process, created by _init_worker
+_simulation = None
+
+
+def _init_worker(steps: int):
+    """Create the long-lived simulation of a worker process."""
+    global _simulation
+    _simulation = worker_simulation(steps)
+
+
+def _evaluate_payload(payload: tuple) -> float:
+    """Evaluate a genome sent as a `Genome.to_payload` tuple."""
+    return _simulation.evaluate(Genome.from_payload(payload))
+
+
+def _timed_evaluations(simulation, payloads: List[tuple]) -> List[Tuple[float, float]]:
+    """Evaluate genomes and return (fitness, seconds) for every genome."""
+    results = []
+    for payload in payloads:
+        start = time.perf_counter()
+        fitness = simulation.evaluate(Genome.from_payload(payload))
+        results.append((fitness, time.perf_counter() - start))
+    return results
+
+
+def _counted(function: Callable, *args) -> Tuple[object, dict]:
+    """
+    Call a function and return its result together with the plan cache and
+    pruning counters it added in the current process.
+    """
+    default_plan_cache.reset_stats()
+    default_pruning_stats.reset_stats()
+    result = function(*args)
+    stats = {**default_plan_cache.stats(), **default_pruning_stats.stats()}
+    return result, {name: stats[name] for name in NETWORK_STATS}
+
+
+def _evaluate_batch(payloads: List[tuple]) -> Tuple[List[Tuple[float, float]], dict]:
+    """
+    Evaluate a batch of genomes in a worker process.
+
+    Returns:
+        The (fitness, seconds) of every genome and the network counters of
+        the batch, as the counters of a worker never reach the main process.
+    """
+    return _counted(_timed_evaluations, _simulation, payloads)
+
+
+class ParallelEvaluator:
+    """
+    Evaluates whole populations in a pool of long-lived worker processes.
+
+    Genomes are sent as compact `to_payload` tuples and every worker runs
+    them through its own Simulation, the same code that evaluates genomes in
+    the main process, so the fitness values are identical to serial
+    evaluation. Results come back in population order.
+
+    Genomes whose enabled connections and weights were already evaluated,
+    such as elites and clones that escaped mutation, take their fitness from
+    a FitnessCache instead of being simulated again.
+
+    The plan cache and pruning counters live in the worker processes, so
+    every batch reports the counters it added, and `network_stats` holds
+    their totals over the last population.
+
+    Workers keep their Simulation, but not a prepared pymunk space, ground
+    and creature: a space carries solver state over from earlier steps, so
+    every genome gets a newly built one to keep the fitness identical to
+    serial evaluation. Building it takes about 1 ms against some 200 ms for
+    the 400 simulation steps.
+
+    Pass an instance as `evaluate_function` to `GeneticAlgorithm.evolve`,
+    and close it, or use it as a context manager, when training is done.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = EVALUATION_WORKERS,
+        chunk_size: int = EVALUATION_CHUNK_SIZE,
+        steps: int = SIMULATION_STEPS,
+        cache_size: int = FITNESS_CACHE_SIZE,
+    ):
+        """
+        Args:
+            workers: Number of worker processes, None for one per CPU and 0
+                to evaluate in the main process.
+            chunk_size: Genomes sent to a worker at a time.
+            steps: Simulation steps per genome.
+            cache_size: Fitness values kept in the fitness cache, 0 to
+                simulate every genome.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 0 or chunk_size < 1:
+            raise ValueError("workers must be >= 0 and chunk_size >= 1")
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.steps = steps
+        self.fitness_cache = FitnessCache(cache_size)
+        self.skipped = 0  # Genomes of the last population that were not simulated
+        # Plan cache and pruning totals of the last population
+        self.network_stats = dict.fromkeys(NETWORK_STATS, 0)
+        self._simulation = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _local_simulation(self):
+        """Simulation of the main process, for the cache key and workers=0."""
+        if self._simulation is None:
+            from src.simulation import Simulation
+
+            self._simulation = Simulation(self.steps)
+        return self._simulation
+
+    def _start(self) -> ProcessPoolExecutor:
+        """Start the worker processes on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=worker_context(),
+                initializer=_init_worker,
+                initargs=(self.steps,),
+            )
+        return self._executor
+
+    def evaluate_population(self, genomes: List[Genome]) -> List[float]:
+        """
+        Evaluate genomes and return their fitness values in the same order.
+
+        Genomes found in the fitness cache, and duplicates within the
+        population, are not simulated; `skipped` counts them.
+        """
+        config = self._local_simulation().config()
+        fitnesses: List[Optional[float]] = [None] * len(genomes)
+        pending = {}  # cache key -> indices of the genomes with that key
+        for index, genome in enumerate(genomes):
+            key = genome_hash(genome, config)
+            if key in pending:
+                pending[key].append(index)
+                continue
+            fitness = self.fitness_cache.get(key)
+            if fitness is None:
+                pending[key] = [index]
+            else:
+                fitnesses[index] = fitness
+        self.skipped = len(genomes) - len(pending)
+        self.network_stats = dict.fromkeys(NETWORK_STATS, 0)
+
+        results = self._simulate([genomes[indices[0]] for indices in pending.values()])
+        for (key, indices), fitness in zip(pending.items(), results):
+            self.fitness_cache.put(key, fitness)
+            for index in indices:
+                fitnesses[index] = fitness
+        return fitnesses
+
+    def _simulate(self, genomes: List[Genome]) -> List[float]:
+        """Simulate genomes in the worker processes, or locally for workers=0."""
+        payloads = [genome.to_payload() for genome in genomes]
+        if not payloads:
+            return []
+        if self.workers == 0:
+            batches = [
+                _counted(_timed_evaluations, self._local_simulation(), payloads)
+            ]
+        else:
+            batches = self._start().map(
+                _evaluate_batch,
+                [
+                    payloads[start : start + self.chunk_size]
+                    for start in range(0, len(payloads), self.chunk_size)
+                ],
+            )
+        fitnesses = []
+        for timed, stats in batches:
+            fitnesses.extend(fitness for fitness, _ in timed)
+            self._add_network_stats(stats)
+        return fitnesses
+
+    def _add_network_stats(self, stats: dict):
+        """Add the network counters reported for a batch of genomes."""
+        for name in NETWORK_STATS:
+            self.network_stats[name] += stats[name]
+
+    def submit(self, genome: Genome) -> Future:
+        """
+        Start evaluating a single genome and return a Future of its fitness,
+        for steady-state evolution. The fitness cache is not used.
+        """
+        if self.workers == 0:
+            future = Future()
+            future.set_result(self._local_simulation().evaluate(genome))
+            return future
+        return self._start().submit(_evaluate_payload, genome.to_payload())
+
+    def __call__(self, genome: Genome) -> float:
+        """Evaluate a single genome, like `main.evaluate_genome`."""
+        return self.evaluate_population([genome])[0]
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "ParallelEvaluator":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
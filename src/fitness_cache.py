@@ -0,0 +1,49 @@
+# src/fitness_cache.py
+
+import hashlib
+from typing import Hashable
+
+import numpy as np
+
+from src.NEATnetwork import structure_key
+from src.globals import FITNESS_CACHE_SIZE
+from src.lru_cache import LRUCache
+
+
+def genome_hash(genome, config: Hashable = ()) -> bytes:
+    """
+    Canonical content hash of everything a genome's fitness depends on.
+
+    Two genomes get the same hash if they have the same input and output
+    nodes and the same enabled connections with bit-identical weights, no
+    matter their ids, connection order, disabled genes or innovation
+    numbers, since those build the same network.
+
+    Args:
+        genome: Genome or ArrayGenome.
+        config: Evaluation settings the fitness also depends on, e.g.
+            `Simulation.config()`.
+    Returns:
+        A 16 byte digest.
+    """
+    (input_ids, output_ids, edges), weights = structure_key(genome)
+    digest = hashlib.blake2b(repr(config).encode(), digest_size=16)
+    digest.update(np.array([len(input_ids), len(output_ids)], dtype=np.int64).tobytes())
+    digest.update(np.array(input_ids + output_ids, dtype=np.int64).tobytes())
+    digest.update(np.array(edges, dtype=np.int64).tobytes())
+    digest.update(np.array(weights, dtype=np.float64).tobytes())
+    return digest.digest()
+
+
+class FitnessCache(LRUCache):
+    """
+    Bounded LRU cache of fitness values keyed by `genome_hash`.
+
+    Elites and unmutated clones are copied into the next generation
+    unchanged, and only need to be simulated once. Cached values are only
+    valid because the simulation is deterministic: every genome runs in a
+    fresh space on the same ground.
+    """
+
+    def __init__(self, maxsize: int = FITNESS_CACHE_SIZE):
+        super().__init__(maxsize)
@@ -1,8 +1,25 @@
 # src/genetic_algorithm.py
 
-from typing import List
+from typing import Dict, List, Optional, Set
 from src.genome import Genome
+from src.globals import APPROXIMATE_SPECIATION, STAGNATION_LIMIT
+from src.species import Species
+from src.innovation import InnovationRegistry
+from src.mutation import mutate_population
+from src.compatibility import (
+    PackedGenes,
+    compatibility_distance,
+    compatibility_distances,
+    pack_genes,
+    select_genes,
+)
+from src.minhash import LSHIndex, MinHasher
+from src.NEATnetwork import default_plan_cache, default_pruning_stats
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 import random
+import time
+
+import numpy as np
 
 
 class GeneticAlgorithm:
@@ -11,6 +28,9 @@ class GeneticAlgorithm:
         population_size: int,
         initial_creature: "Creature",
         speciation_threshold: float = 3.0,
+        genome_class: type = Genome,
+        seed: Optional[int] = None,
+        approximate_speciation: bool = APPROXIMATE_SPECIATION,
     ):
         """
         Initialize the Genetic Algorithm with a given population size and initial creature.
@@ -19,15 +39,29 @@ class GeneticAlgorithm:
             population_size (int): Number of genomes in the population.
             initial_creature (Creature): The initial creature to determine inputs and outputs.
             speciation_threshold (float): Threshold for speciation.
+            genome_class (type): Genome representation, Genome or the compact ArrayGenome.
+            seed (int, optional): Seed of the mutation streams, random if not given.
+            approximate_speciation (bool): Only compare genomes to the species found
+                through MinHash/LSH buckets, see `src.minhash`.
         """
         self.population_size = population_size
+        self.genome_class = genome_class
         self.initial_creature = initial_creature
         self.speciation_threshold = speciation_threshold
-        self.speciation = {}  # species_id -> List[Genome]
-        self.species_representatives = {}  # species_id -> Genome
+        self.species: Dict[int, Species] = {}  # species_id -> Species
+        self.next_species_id = 1
+        self._packed_representatives = None  # Gene arrays of the representatives
+        self._representative_ids: List[int] = []  # Species id of every packed genome
+        self._representative_index: Dict[int, int] = {}  # Species id -> packed position
+        self.approximate_speciation = approximate_speciation
+        self._minhash = MinHasher()
+        self._lsh_index: Optional[LSHIndex] = None  # LSH buckets of the representatives
         self.population: List[Genome] = []
-        self.innovation = None
+        self.innovation = InnovationRegistry()  # Innovation numbers of this run
         self.genome_id_counter = 0
+        self._stagnant: Set[int] = set()  # Culled species of steady-state evolution
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.generation = 0
 
         # Determine number of inputs and outputs based on initial creature
         self.num_inputs, self.num_outputs = self.determine_io()
@@ -61,76 +95,171 @@ class GeneticAlgorithm:
         """Initialize a population of genomes."""
         population = []
         for _ in range(self.population_size):
-            genome = Genome(
+            genome = self.genome_class(
                 genome_id=self.genome_id_counter,
                 num_inputs=self.num_inputs,
                 num_outputs=self.num_outputs,
+                innovation=self.innovation,
             )
             population.append(genome)
             self.genome_id_counter += 1
         return population
 
+    @property
+    def speciation(self) -> Dict[int, List[Genome]]:
+        """Members of every species, species_id -> List[Genome]."""
+        return {
+            species_id: species.members for species_id, species in self.species.items()
+        }
+
+    @property
+    def species_representatives(self) -> Dict[int, Genome]:
+        """Representative of every species, species_id -> Genome."""
+        return {
+            species_id: species.representative
+            for species_id, species in self.species.items()
+        }
+
     def assign_species_to_population(self):
-        """Assign genomes in the population to species."""
-        self.speciation.clear()
-        self.species_representatives.clear()
+        """
+        Assign genomes in the population to species.
+
+        Species persist between generations: every species keeps its id and
+        takes its fittest member as the representative for the new
+        population. Species left without members go extinct.
+        """
+        for species in self.species.values():
+            species.start_generation()
+        self._packed_representatives = None
+        if self.approximate_speciation:
+            self._lsh_index = LSHIndex()
+            for species_id, species in self.species.items():
+                self._lsh_index.add(
+                    species_id,
+                    self._minhash.signature(species.representative.gene_arrays()[0]),
+                )
         for genome in self.population:
             self.assign_to_species(genome)
+        self.species = {
+            species_id: species
+            for species_id, species in self.species.items()
+            if species.members
+        }
+        self._packed_representatives = None
 
     def assign_to_species(self, genome: Genome):
         """Assign a genome to an existing species or create a new species if none match."""
         species_id = self.determine_species(genome)
-
-        # If the species ID is new, initialize its entry
-        if species_id not in self.speciation:
-            self.speciation[species_id] = []
-
-        # Add the genome to the determined species
-        self.speciation[species_id].append(genome)
-        genome.species = species_id
+        self.species[species_id].add_member(genome)
 
     def determine_species(self, genome: Genome) -> int:
-        """Determine the species ID for a given genome."""
-        for species_id, representative in self.species_representatives.items():
-            distance = genome.compute_compatibility_distance(representative)
+        """
+        Determine the species ID for a given genome.
+
+        The species the genome was born into is checked first, which settles
+        most genomes with a single distance computation.
+        """
+        innovations, weights = genome.gene_arrays()
+        previous = self.species.get(genome.species)
+        if previous is not None:
+            distance = compatibility_distance(
+                innovations, weights, *previous.representative.gene_arrays()
+            )
             if distance < self.speciation_threshold:
-                return species_id
+                return previous.species_id
+
+        signature = None
+        if self.approximate_speciation:
+            # Exact distances only to the species sharing a bucket, in the
+            # order of the exact search
+            signature = self._minhash.signature(innovations)
+            packed = self._representatives()
+            index = self._representative_index
+            # Steady state removes species that may still have LSH buckets
+            candidates = sorted(
+                species_id
+                for species_id in self._lsh_index.candidates(signature)
+                if species_id in index
+            )
+            if candidates:
+                distances = compatibility_distances(
+                    innovations,
+                    weights,
+                    select_genes(packed, [index[species_id] for species_id in candidates]),
+                )
+                matches = np.flatnonzero(distances < self.speciation_threshold)
+                if len(matches):
+                    return candidates[matches[0]]
+        elif self.species:
+            # Distances to all representatives in one vectorized call
+            distances = compatibility_distances(
+                innovations, weights, self._representatives()
+            )
+            matches = np.flatnonzero(distances < self.speciation_threshold)
+            if len(matches):
+                return self._representative_ids[matches[0]]
 
         # If no existing species matches, create a new species
-        new_species_id = len(self.species_representatives) + 1
-        self.species_representatives[new_species_id] = genome
+        new_species_id = self.next_species_id
+        self.next_species_id += 1
+        self.species[new_species_id] = Species(new_species_id, genome, self.generation)
+        self._packed_representatives = None
+        if signature is not None:
+            self._lsh_index.add(new_species_id, signature)
         return new_species_id
 
+    def _representatives(self) -> PackedGenes:
+        """
+        Gene arrays of all species representatives, packed again only after
+        the species changed, so once per speciation pass plus once per new
+        species.
+        """
+        if self._packed_representatives is None:
+            self._representative_ids = list(self.species)
+            self._representative_index = {
+                species_id: position
+                for position, species_id in enumerate(self._representative_ids)
+            }
+            self._packed_representatives = pack_genes(
+                [species.representative for species in self.species.values()]
+            )
+        return self._packed_representatives
+
     def reassign_species(self):
         """Reassign genomes to species after a generation."""
-        self.speciation.clear()
-        self.species_representatives.clear()
-        for genome in self.population:
-            self.assign_to_species(genome)
+        self.assign_species_to_population()
 
     def evaluate_population(self, evaluate_function) -> float:
         """
         Evaluate the entire population's fitness.
 
         Parameters:
-            evaluate_function (callable): Function to evaluate fitness of a genome.
+            evaluate_function (callable): Function to evaluate fitness of a genome,
+                or an object with an `evaluate_population(genomes)` method returning
+                the fitness of every genome, like ParallelEvaluator.
 
         Returns:
             float: The average fitness of the population.
         """
+        if hasattr(evaluate_function, "evaluate_population"):
+            fitnesses = evaluate_function.evaluate_population(self.population)
+        else:
+            fitnesses = [evaluate_function(genome) for genome in self.population]
         total_fitness = 0.0
-        for genome in self.population:
-            genome.fitness = evaluate_function(genome)
+        for genome, fitness in zip(self.population, fitnesses):
+            genome.fitness = fitness
             total_fitness += genome.fitness
         average_fitness = total_fitness / len(self.population) if self.population else 0
         return average_fitness
 
     def adjust_fitness(self):
-        """Adjust the fitness of each genome based on species size."""
-        for species_id, members in self.speciation.items():
-            species_size = len(members)
-            for genome in members:
-                genome.adjusted_fitness = genome.fitness / species_size
+        """
+        Adjust the fitness of each genome based on species size, and track
+        the stagnation of every species.
+        """
+        for species in self.species.values():
+            species.adjust_fitness()
+            species.update_stagnation(self.generation)
 
     def tournament_selection(
         self, members: List[Genome], tournament_size: int = 3
@@ -140,9 +269,28 @@ class GeneticAlgorithm:
         tournament.sort(key=lambda g: g.fitness, reverse=True)
         return tournament[0]
 
-    def reproduce(self):
-        """Create a new generation through reproduction."""
-        new_population = []
+    def stagnant_species(self) -> Set[int]:
+        """
+        Ids of the species whose best fitness has not improved for more than
+        STAGNATION_LIMIT generations, except the species of the fittest genome.
+        """
+        fittest = max(self.population, key=lambda genome: genome.fitness)
+        return {
+            species_id
+            for species_id, species in self.species.items()
+            if species.stagnation(self.generation) > STAGNATION_LIMIT
+            and fittest.species != species_id
+        }
+
+    def offspring_counts(self) -> Dict[int, int]:
+        """
+        Number of offspring of every species, in proportion to the summed
+        adjusted fitness of its members. Stagnant species get no offspring,
+        unless they hold the best genome of the population.
+
+        Returns:
+            Dict[int, int]: species_id -> number of offspring.
+        """
         total_adjusted_fitness = sum(
             genome.adjusted_fitness for genome in self.population
         )
@@ -150,17 +298,27 @@ class GeneticAlgorithm:
         if total_adjusted_fitness == 0:
             total_adjusted_fitness = 1  # Prevent division by zero
 
-        # Calculate offspring counts for each species
+        stagnant = self.stagnant_species()
         offspring_counts = {}
-        for species_id, members in self.speciation.items():
+        for species_id, species in self.species.items():
+            if species_id in stagnant:
+                offspring_counts[species_id] = 0
+                continue
             species_adjusted_fitness = sum(
-                genome.adjusted_fitness for genome in members
+                genome.adjusted_fitness for genome in species.members
             )
             offspring_count = int(
                 (species_adjusted_fitness / total_adjusted_fitness)
                 * self.population_size
             )
             offspring_counts[species_id] = offspring_count
+        return offspring_counts
+
+    def reproduce(self):
+        """Create a new generation through reproduction."""
+        new_population = []
+        offspring = []  # Mutated together after selection
+        offspring_counts = self.offspring_counts()
 
         # Generate offspring for each species
         for species_id, members in self.speciation.items():
@@ -182,7 +340,6 @@ class GeneticAlgorithm:
                 if random.random() < 0.25:
                     # Mutation without crossover
                     child = parent1.copy()
-                    child.mutate()
                 else:
                     parent2 = self.tournament_selection(members)
                     # Ensure the more fit parent is parent1
@@ -191,31 +348,205 @@ class GeneticAlgorithm:
 
                     # Perform crossover
                     child = parent1.crossover(parent2)
-                    child.mutate()
 
-                # Assign a new genome ID
+                # Assign a new genome ID, the child is checked against the
+                # species of its parents first
                 child.id = self.genome_id_counter
+                child.species = species_id
                 self.genome_id_counter += 1
                 new_population.append(child)
+                offspring.append(child)
 
         # If the new population is smaller due to rounding, fill it up
         while len(new_population) < self.population_size:
             parent = random.choice(self.population)
             child = parent.copy()
-            child.mutate()
             child.id = self.genome_id_counter
             self.genome_id_counter += 1
             new_population.append(child)
+            offspring.append(child)
+
+        mutate_population(offspring, self.seed, self.generation)
 
         # Update the population
         self.population = new_population
+        self.generation += 1
 
     def evolve(self, generations: int, evaluate_function):
         """Run the evolution process for a specified number of generations."""
         for generation in range(generations):
             print(f"Generation {generation + 1}")
+            default_plan_cache.reset_stats()
+            default_pruning_stats.reset_stats()
             average_fitness = self.evaluate_population(evaluate_function)
             print(f"Average Fitness: {average_fitness}")
-            self.adjust_fitness()
+            # Evaluators with worker processes report the counters of the
+            # workers, the counters of this process stay at zero
+            network_stats = getattr(evaluate_function, "network_stats", None)
+            if network_stats is None:
+                network_stats = {
+                    **default_plan_cache.stats(),
+                    **default_pruning_stats.stats(),
+                }
+            print(
+                f"Plan cache: {network_stats['hits']} hits,"
+                f" {network_stats['misses']} misses"
+            )
+            print(
+                f"Pruned: {network_stats['nodes']} nodes, {network_stats['edges']} edges"
+                f" from {network_stats['networks']} networks"
+            )
+            skipped = getattr(evaluate_function, "skipped", None)
+            if skipped is not None:
+                print(
+                    f"Fitness cache: {skipped} of {len(self.population)} simulations skipped"
+                )
+            reports = getattr(evaluate_function, "reports", None)
+            if reports:
+                print(
+                    f"Simulation steps: {reports[-1]['steps']} of {reports[-1]['full_steps']}"
+                    f" ({reports[-1]['saved']:.0%} saved)"
+                )
+            metrics = getattr(evaluate_function, "metrics", None)
+            if metrics:
+                print(
+                    f"Utilization: {metrics[-1]['utilization']:.0%},"
+                    f" tail wait {metrics[-1]['tail']:.2f} s"
+                )
             self.reassign_species()
+            self.adjust_fitness()
             self.reproduce()
+
+    def breed_child(self) -> Genome:
+        """
+        Breed and mutate one child from the current population, for
+        steady-state evolution. The first parent is chosen by tournament
+        from the whole population, the second from its species. Members of
+        stagnant species are not chosen as parents.
+        """
+        candidates = [
+            genome for genome in self.population if genome.species not in self._stagnant
+        ]
+        parent1 = self.tournament_selection(candidates or self.population)
+        members = self.species[parent1.species].members
+        if random.random() < 0.25 or len(members) < 2:
+            # Mutation without crossover
+            child = parent1.copy()
+        else:
+            parent2 = self.tournament_selection(members)
+            if parent2.fitness > parent1.fitness:
+                parent1, parent2 = parent2, parent1
+            child = parent1.crossover(parent2)
+        child.id = self.genome_id_counter
+        self.genome_id_counter += 1
+        child.species = parent1.species
+        # Genome ids are unique, so every child has its own mutation stream
+        mutate_population([child], self.seed, self.generation)
+        return child
+
+    def replace_worst(self, child: Genome):
+        """
+        Put an evaluated child in place of the genome with the lowest
+        adjusted fitness, never the fittest one, and update the two species
+        involved instead of re-speciating the population. Members of
+        stagnant species are replaced first.
+        """
+        fittest = max(self.population, key=lambda genome: genome.fitness)
+        position, worst = min(
+            (
+                (position, genome)
+                for position, genome in enumerate(self.population)
+                if genome is not fittest
+            ),
+            key=lambda item: (
+                item[1].species not in self._stagnant,
+                item[1].adjusted_fitness,
+            ),
+        )
+        self.population[position] = child
+
+        species = self.species[worst.species]
+        species.members.remove(worst)
+        if species.members:
+            species.adjust_fitness()
+        else:
+            del self.species[worst.species]
+            self._packed_representatives = None
+
+        self.assign_to_species(child)
+        species = self.species[child.species]
+        species.adjust_fitness()
+        species.update_stagnation(self.generation)
+
+    def evolve_steady_state(self, evaluations: int, evaluate_function) -> Genome:
+        """
+        Run steady-state evolution for a number of child evaluations.
+
+        There are no generations to wait for: the evaluator is kept busy
+        with one child per worker, and whenever a fitness comes back the
+        child replaces the worst genome. After every population_size
+        children the generation counter advances and the population is
+        re-speciated, which refreshes the species representatives. Species
+        that are stagnant at that point are culled like in `evolve`: they
+        get no children and their members are replaced first, until they
+        die out.
+
+        Args:
+            evaluations (int): Number of children to evaluate.
+            evaluate_function: Evaluator with `submit(genome)` returning a
+                Future, like ParallelEvaluator, or a function evaluating a
+                genome, which is called synchronously.
+
+        Returns:
+            Genome: The fittest genome of the final population.
+        """
+        def submit(genome: Genome) -> Future:
+            if hasattr(evaluate_function, "submit"):
+                return evaluate_function.submit(genome)
+            future = Future()
+            future.set_result(evaluate_function(genome))
+            return future
+
+        average_fitness = self.evaluate_population(evaluate_function)
+        print(f"Initial Average Fitness: {average_fitness}")
+        self.reassign_species()
+        self.adjust_fitness()
+        self._stagnant = self.stagnant_species()
+
+        start = time.perf_counter()
+
+        workers = max(getattr(evaluate_function, "workers", 1), 1)
+        in_flight = {}  # Future -> child
+        submitted = 0
+        replaced = 0
+        while submitted < evaluations or in_flight:
+            while submitted < evaluations and len(in_flight) < workers:
+                child = self.breed_child()
+                in_flight[submit(child)] = child
+                submitted += 1
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                child = in_flight.pop(future)
+                child.fitness = future.result()
+                self.replace_worst(child)
+                replaced += 1
+                if replaced % self.population_size == 0:
+                    self.generation += 1
+                    self.reassign_species()
+                    self.adjust_fitness()
+                    self._stagnant = self.stagnant_species()
+                    average_fitness = sum(
+                        genome.fitness for genome in self.population
+                    ) / len(self.population)
+                    print(
+                        f"Evaluations: {replaced}, Average Fitness: {average_fitness},"
+                        f" Species: {len(self.species)}"
+                    )
+
+        elapsed = time.perf_counter() - start
+        if elapsed > 0:
+            print(
+                f"{evaluations} evaluations in {elapsed:.1f} s"
+                f" ({evaluations / elapsed:.1f} per second)"
+            )
+        return max(self.population, key=lambda genome: genome.fitness)
@@ -2,20 +2,30 @@
 
 import random
 from dataclasses import dataclass
-from typing import List
-from copy import deepcopy
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.compatibility import compatibility_distance
+from src.innovation import InnovationRegistry
 
 from src.globals import (
     MUTATION_RATE_WEIGHT,
     MUTATION_RATE_CONNECTION,
     MUTATION_RATE_NODE,
+    FEED_FORWARD,
 )
 
 
-class Innovation:
+class Innovation(InnovationRegistry):
+    """
+    Process-wide registry used by genomes created without one.
+
+    Evolution runs should own an InnovationRegistry instead, this singleton
+    is kept for loading and displaying saved genomes.
+    """
+
     __instance = None
-    _global_innovation_counter = 0
-    _innovation_history = {}
 
     @staticmethod
     def get_instance():
@@ -27,29 +37,9 @@ class Innovation:
         if Innovation.__instance is not None:
             raise Exception("This is a singleton.")
         else:
+            super().__init__()
             Innovation.__instance = self
 
-    def get_innovation_number(self, in_node, out_node):
-        key = (in_node, out_node)
-        if key in Innovation._innovation_history:
-            return Innovation._innovation_history[key]
-        else:
-            Innovation._global_innovation_counter += 1
-            Innovation._innovation_history[key] = Innovation._global_innovation_counter
-            return Innovation._innovation_history[key]
-    
-    def to_dict(self):
-        """Serialize the Innovation singleton."""
-        return {
-            '_global_innovation_counter': self._global_innovation_counter,
-            '_innovation_history': self._innovation_history
-        }
-
-    def from_dict(self, data):
-        """Deserialize the Innovation singleton."""
-        self._global_innovation_counter = data['_global_innovation_counter']
-        self._innovation_history = data['_innovation_history']
-
 
 @dataclass
 class Node:
@@ -73,14 +63,23 @@ class Connection:
 
 
 class Genome:
-    def __init__(self, genome_id: int, num_inputs: int = 0, num_outputs: int = 0):
+    def __init__(
+        self,
+        genome_id: int,
+        num_inputs: int = 0,
+        num_outputs: int = 0,
+        innovation: Optional[InnovationRegistry] = None,
+        feed_forward: Optional[bool] = None,
+    ):
         self.id = genome_id
+        self.feed_forward = FEED_FORWARD if feed_forward is None else feed_forward
         self.fitness: float = 0.0
         self.nodes: List[Node] = []
         self.connections: List[Connection] = []
         self.species: int = 0
         self.adjusted_fitness: float = 0.0
-        self.innovation = Innovation.get_instance()
+        self.innovation = innovation if innovation is not None else Innovation.get_instance()
+        self._gene_arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
 
         # Store number of inputs and outputs
         self.num_inputs = num_inputs
@@ -112,48 +111,262 @@ class Genome:
                 )
                 self.connections.append(connection)
 
+        self.rebuild_indexes()
+
+    def rebuild_indexes(self):
+        """
+        Rebuild the structural indexes from the node and connection lists.
+
+        The mutation operators keep these indexes up to date themselves, this
+        is only needed after the lists were replaced or edited directly.
+        """
+        if self.feed_forward:
+            self._break_cycles()
+        self._node_index = {node.id: node for node in self.nodes}
+        self._edges = {(conn.in_node, conn.out_node) for conn in self.connections}
+        self._next_node_id = max(self._node_index, default=-1) + 1
+        self._outgoing = None  # Built on demand, see _adjacency
+        self._depth = None  # Computed on demand, see node_depths
+        self._input_targets = False  # Set together with the depths
+        self._gene_arrays = None
+
+    def node_depths(self) -> Dict[int, int]:
+        """
+        Depth of every node the network evaluation reaches, keyed by node id.
+
+        Input nodes have depth 0, since their value is assigned directly,
+        and every other node is one deeper than its deepest source. Nodes on
+        or behind a cycle, or behind a non-input node without incoming
+        connections, are not reached and have no depth. The depths are
+        updated incrementally by the mutation methods and recomputed here
+        only after they were invalidated. The returned dict must not be
+        modified.
+        """
+        if self._depth is None:
+            self._depth = self._compute_depths()
+        return self._depth
+
+    def _adjacency(self) -> Dict[int, List[int]]:
+        """Targets of the enabled connections of every node, built on demand."""
+        if self._outgoing is None:
+            self._outgoing = {}
+            for conn in self.connections:
+                if conn.enabled:
+                    self._outgoing.setdefault(conn.in_node, []).append(conn.out_node)
+        return self._outgoing
+
+    def _compute_depths(self) -> Dict[int, int]:
+        """Longest-path depths from the input nodes, with Kahn's algorithm."""
+        outgoing = self._adjacency()
+        in_degree = {}
+        for targets in outgoing.values():
+            for node_id in targets:
+                in_degree[node_id] = in_degree.get(node_id, 0) + 1
+        input_ids = {node.id for node in self.nodes if node.node_type == "input"}
+        # Depths only increase along connections that do not end in an input
+        self._input_targets = not input_ids.isdisjoint(in_degree)
+
+        depth = {}
+        queue = [node_id for node_id in input_ids if node_id not in in_degree]
+        candidate = dict.fromkeys(queue, 0)
+        while queue:
+            node_id = queue.pop()
+            depth[node_id] = 0 if node_id in input_ids else candidate[node_id]
+            for target in outgoing.get(node_id, ()):
+                candidate[target] = max(candidate.get(target, 0), depth[node_id] + 1)
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    queue.append(target)
+        return depth
+
+    def _creates_cycle(self, in_node: int, out_node: int) -> bool:
+        """
+        Whether a new enabled in_node -> out_node connection closes a cycle,
+        i.e. whether in_node is reachable from out_node.
+
+        A path to a reached node only passes through reached nodes of lower
+        depth, so known depths usually answer this without a search and
+        otherwise limit the search to the nodes below in_node. Connections
+        into input nodes break that order, and disable the shortcut.
+        """
+        limit = None
+        if self._depth is not None and not self._input_targets:
+            limit = self._depth.get(in_node)
+        if limit is not None and self._depth.get(out_node, limit) >= limit:
+            return False
+
+        outgoing = self._adjacency()
+        stack = [out_node]
+        seen = {out_node}
+        while stack:
+            for target in outgoing.get(stack.pop(), ()):
+                if target == in_node:
+                    return True
+                if target in seen:
+                    continue
+                if limit is not None and self._depth.get(target, limit) >= limit:
+                    continue
+                seen.add(target)
+                stack.append(target)
+        return False
+
+    def _link(self, in_node: int, out_node: int):
+        """Record a new enabled connection in the adjacency and the depths."""
+        if self._node_index[out_node].node_type == "input":
+            self._input_targets = True
+            self._depth = None
+        if self._outgoing is None:
+            return  # Nothing derived from the connections yet
+        if self._depth is not None:
+            if in_node not in self._depth:
+                # The target now waits on an unreached node
+                if out_node in self._depth:
+                    self._depth = None
+            elif out_node in self._depth:
+                if not self.feed_forward and self._creates_cycle(in_node, out_node):
+                    self._depth = None
+                else:
+                    self._raise_depth(out_node, self._depth[in_node] + 1)
+        self._outgoing.setdefault(in_node, []).append(out_node)
+
+    def _raise_depth(self, node_id: int, depth: int):
+        """Raise the depth of a reached node and propagate it downstream."""
+        stack = [(node_id, depth)]
+        while stack:
+            node_id, depth = stack.pop()
+            if self._depth.get(node_id, depth) >= depth:
+                continue
+            if self._node_index[node_id].node_type == "input":
+                continue
+            self._depth[node_id] = depth
+            for target in self._outgoing.get(node_id, ()):
+                stack.append((target, depth + 1))
+
+    def _break_cycles(self):
+        """
+        Disable connections that close a cycle, keeping the earlier one of
+        each pair. Only crossover or hand-edited genomes can contain cycles
+        in feed-forward mode, and acyclic genomes are recognized in linear
+        time before any search.
+        """
+        outgoing = {}
+        in_degree = {}
+        for conn in self.connections:
+            if conn.enabled:
+                outgoing.setdefault(conn.in_node, []).append(conn.out_node)
+                in_degree[conn.out_node] = in_degree.get(conn.out_node, 0) + 1
+        queue = [node_id for node_id in outgoing if node_id not in in_degree]
+        while queue:
+            for target in outgoing.get(queue.pop(), ()):
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    queue.append(target)
+        if not any(in_degree.values()):
+            return
+
+        self._outgoing = {}
+        self._depth = None
+        for conn in self.connections:
+            if conn.enabled:
+                if self._creates_cycle(conn.in_node, conn.out_node):
+                    conn.enabled = False
+                else:
+                    self._outgoing.setdefault(conn.in_node, []).append(conn.out_node)
+
+    def gene_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Innovation numbers and weights of all connections, sorted by innovation.
+
+        The arrays are cached until one of the mutation methods changes the
+        genome, code that edits connections directly must call
+        `invalidate_gene_arrays` or `rebuild_indexes`.
+        """
+        if self._gene_arrays is None:
+            genes = sorted(
+                {conn.innovation_number: conn.weight for conn in self.connections}.items()
+            )
+            self._gene_arrays = (
+                np.array([innovation for innovation, _ in genes], dtype=np.int64),
+                np.array([weight for _, weight in genes], dtype=np.float64),
+            )
+        return self._gene_arrays
+
+    def invalidate_gene_arrays(self):
+        """Drop the cached gene arrays after the connections changed."""
+        self._gene_arrays = None
+
+    def remap_innovations(self, mapping: Dict[int, int]):
+        """Replace innovation numbers, e.g. provisional ones after a shard merge."""
+        for conn in self.connections:
+            conn.innovation_number = mapping.get(
+                conn.innovation_number, conn.innovation_number
+            )
+        self._gene_arrays = None
+
+    def weight_array(self) -> np.ndarray:
+        """Weights of all connections, in connection order."""
+        return np.array([conn.weight for conn in self.connections], dtype=np.float64)
+
+    def set_weight_array(self, weights: np.ndarray):
+        """Write back weights in the order of `weight_array`."""
+        for conn, weight in zip(self.connections, weights.tolist()):
+            conn.weight = weight
+        self._gene_arrays = None
+
     def mutate_weights(self, delta: float = 0.1):
         """Mutate the weights of the connections."""
+        self._gene_arrays = None
         for conn in self.connections:
             if random.random() < 0.1:
                 conn.weight = random.uniform(-1.0, 1.0)
             else:
                 conn.weight += random.gauss(0, delta)
 
-    def mutate_connections(self):
+    def mutate_connections(self, rng=random):
         """Add a new connection between two nodes."""
-        possible_in_nodes = list(self.nodes)
-        possible_out_nodes = list(self.nodes)
-        in_node = random.choice(possible_in_nodes)
-        out_node = random.choice(possible_out_nodes)
+        in_node = rng.choice(self.nodes)
+        out_node = rng.choice(self.nodes)
         if in_node.id == out_node.id:
             return  # Avoid self-loops
         # Check if connection already exists
-        for conn in self.connections:
-            if conn.in_node == in_node.id and conn.out_node == out_node.id:
-                return
+        if (in_node.id, out_node.id) in self._edges:
+            return
+        if self.feed_forward and (
+            out_node.node_type == "input" or self._creates_cycle(in_node.id, out_node.id)
+        ):
+            return
         innovation_number = self.innovation.get_innovation_number(
             in_node.id, out_node.id
         )
         new_conn = Connection(
             in_node=in_node.id,
             out_node=out_node.id,
-            weight=random.uniform(-1.0, 1.0),
+            weight=rng.uniform(-1.0, 1.0),
             innovation_number=innovation_number,
         )
         self.connections.append(new_conn)
+        self._edges.add((in_node.id, out_node.id))
+        self._link(in_node.id, out_node.id)
+        self._gene_arrays = None
 
-    def mutate_nodes(self):
+    def mutate_nodes(self, rng=random):
         """Add a new node by splitting an existing connection."""
         if not self.connections:
             return
-        con = random.choice(self.connections)
+        con = rng.choice(self.connections)
         if not con.enabled:
             return
         con.enabled = False
-        new_node_id = max(node.id for node in self.nodes) + 1
+        if self._outgoing is not None:
+            self._outgoing[con.in_node].remove(con.out_node)
+        new_node_id = self._next_node_id
+        self._next_node_id += 1
         new_node = Node(id=new_node_id, node_type="hidden")
         self.nodes.append(new_node)
+        self._node_index[new_node_id] = new_node
+        # Splitting keeps the reached nodes and can only deepen the target
+        if self._depth is not None and con.in_node in self._depth:
+            self._depth[new_node_id] = self._depth[con.in_node] + 1
 
         innovation_number1 = self.innovation.get_innovation_number(
             con.in_node, new_node.id
@@ -176,6 +389,11 @@ class Genome:
         )
         self.connections.append(con1)
         self.connections.append(con2)
+        self._edges.add((con1.in_node, con1.out_node))
+        self._edges.add((con2.in_node, con2.out_node))
+        self._link(con1.in_node, con1.out_node)
+        self._link(con2.in_node, con2.out_node)
+        self._gene_arrays = None
 
     def mutate(self):
         """Apply mutations to the genome."""
@@ -189,57 +407,17 @@ class Genome:
 
     def compute_compatibility_distance(self, other, c1=1.0, c2=1.0, c3=0.4) -> float:
         """Calculate the genetic distance (delta) between two genomes."""
-        conn1 = {c.innovation_number: c for c in self.connections}
-        conn2 = {c.innovation_number: c for c in other.connections}
-        all_innovations = set(conn1.keys()).union(set(conn2.keys()))
-
-        excess_genes = 0
-        disjoint_genes = 0
-        matching_genes = 0
-        weight_difference_sum = 0
-
-        N = max(len(conn1), len(conn2))
-        if N < 20:
-            N = 1  # Avoid excessive normalization for small genomes
-
-        max_innovation1 = max(conn1.keys(), default=0)
-        max_innovation2 = max(conn2.keys(), default=0)
-
-        for innovation_number in all_innovations:
-            if innovation_number in conn1 and innovation_number in conn2:
-                matching_genes += 1
-                weight_difference_sum += abs(
-                    conn1[innovation_number].weight - conn2[innovation_number].weight
-                )
-            elif innovation_number in conn1 or innovation_number in conn2:
-                if innovation_number > max(max_innovation1, max_innovation2):
-                    excess_genes += 1
-                else:
-                    disjoint_genes += 1
-
-        average_weight_difference = (
-            (weight_difference_sum / matching_genes) if matching_genes > 0 else 0
-        )
-        delta = (
-            (c1 * excess_genes / N)
-            + (c2 * disjoint_genes / N)
-            + (c3 * average_weight_difference)
-        )
-        return delta
+        return compatibility_distance(*self.gene_arrays(), *other.gene_arrays(), c1, c2, c3)
 
     def crossover(self, other):
         """Perform crossover between two genomes."""
         # Assume self is the more fit parent
-        child = Genome(
-            genome_id=-1,  # Temporary ID
-            num_inputs=self.num_inputs,
-            num_outputs=self.num_outputs,
-        )
-        child.nodes = deepcopy(self.nodes)
+        child = self._blank(genome_id=-1)  # Temporary ID
+        child.nodes = [Node(node.id, node.node_type) for node in self.nodes]
         # Ensure all nodes from other are present
         for node in other.nodes:
-            if node.id not in [n.id for n in child.nodes]:
-                child.nodes.append(deepcopy(node))
+            if node.id not in self._node_index:
+                child.nodes.append(Node(node.id, node.node_type))
 
         # Inherit connections
         self_conn_dict = {conn.innovation_number: conn for conn in self.connections}
@@ -248,40 +426,86 @@ class Genome:
         for innovation_number in set(self_conn_dict.keys()).union(
             other_conn_dict.keys()
         ):
-            conn = None
             if (
                 innovation_number in self_conn_dict
                 and innovation_number in other_conn_dict
             ):
                 # Matching genes - randomly choose
                 if random.random() < 0.5:
-                    conn = deepcopy(self_conn_dict[innovation_number])
+                    conn = self_conn_dict[innovation_number]
                 else:
-                    conn = deepcopy(other_conn_dict[innovation_number])
+                    conn = other_conn_dict[innovation_number]
             elif innovation_number in self_conn_dict:
                 # Excess or disjoint genes from the more fit parent
-                conn = deepcopy(self_conn_dict[innovation_number])
+                conn = self_conn_dict[innovation_number]
             else:
                 # Excess or disjoint genes from the other parent
-                conn = deepcopy(other_conn_dict[innovation_number])
-
-            if conn:
-                child.connections.append(conn)
+                conn = other_conn_dict[innovation_number]
+
+            child.connections.append(
+                Connection(
+                    conn.in_node,
+                    conn.out_node,
+                    conn.weight,
+                    conn.innovation_number,
+                    conn.enabled,
+                )
+            )
 
+        child.rebuild_indexes()
         return child
 
     def copy(self):
         """Create a deep copy of the genome."""
-        new_genome = Genome(
-            genome_id=self.id, num_inputs=self.num_inputs, num_outputs=self.num_outputs
-        )
-        new_genome.nodes = deepcopy(self.nodes)
-        new_genome.connections = deepcopy(self.connections)
+        new_genome = self._blank(genome_id=self.id)
+        new_genome.nodes = [Node(node.id, node.node_type) for node in self.nodes]
+        new_genome.connections = [
+            Connection(
+                conn.in_node,
+                conn.out_node,
+                conn.weight,
+                conn.innovation_number,
+                conn.enabled,
+            )
+            for conn in self.connections
+        ]
+        new_genome._node_index = {node.id: node for node in new_genome.nodes}
+        new_genome._edges = set(self._edges)
+        new_genome._next_node_id = self._next_node_id
+        if self._outgoing is not None:
+            new_genome._outgoing = {
+                node_id: list(targets) for node_id, targets in self._outgoing.items()
+            }
+        else:
+            new_genome._outgoing = None
+        new_genome._depth = dict(self._depth) if self._depth is not None else None
+        new_genome._input_targets = self._input_targets
+        new_genome._gene_arrays = self._gene_arrays
         new_genome.fitness = self.fitness
         new_genome.adjusted_fitness = self.adjusted_fitness
         new_genome.species = self.species
         return new_genome
 
+    def _blank(self, genome_id: int) -> "Genome":
+        """
+        Create a genome with this genome's inputs and outputs but without
+        nodes or connections, skipping the default input to output wiring of
+        __init__. The caller fills in the genes and the indexes.
+        """
+        genome = Genome.__new__(Genome)
+        genome.id = genome_id
+        genome.feed_forward = self.feed_forward
+        genome.fitness = 0.0
+        genome.nodes = []
+        genome.connections = []
+        genome.species = 0
+        genome.adjusted_fitness = 0.0
+        genome.innovation = self.innovation
+        genome._gene_arrays = None
+        genome.num_inputs = self.num_inputs
+        genome.num_outputs = self.num_outputs
+        return genome
+
     def __str__(self):
         return f"Genome ID: {self.id}, Fitness: {self.fitness}, Species: {self.species}, Adjusted Fitness: {self.adjusted_fitness}"
 
@@ -303,18 +527,63 @@ class Genome:
             'species': self.species,
             'num_inputs': self.num_inputs,
             'num_outputs': self.num_outputs,
+            'feed_forward': self.feed_forward,
             'nodes': [node.__dict__ for node in self.nodes],
             'connections': [conn.__dict__ for conn in self.connections],
         }
 
+    def to_payload(self) -> tuple:
+        """
+        Serialize the genome to a compact tuple for sending it to another
+        process. Fitness and species are left out.
+        """
+        return (
+            self.id,
+            self.num_inputs,
+            self.num_outputs,
+            self.feed_forward,
+            [(node.id, node.node_type) for node in self.nodes],
+            [
+                (
+                    conn.in_node,
+                    conn.out_node,
+                    conn.weight,
+                    conn.innovation_number,
+                    conn.enabled,
+                )
+                for conn in self.connections
+            ],
+        )
+
     @classmethod
-    def from_dict(cls, data):
+    def from_payload(
+        cls, payload: tuple, innovation: Optional[InnovationRegistry] = None
+    ):
+        """Deserialize a genome from a tuple written by `to_payload`."""
+        genome_id, num_inputs, num_outputs, feed_forward, nodes, connections = payload
+        genome = cls.__new__(cls)
+        genome.id = genome_id
+        genome.innovation = innovation if innovation is not None else Innovation.get_instance()
+        genome.num_inputs = num_inputs
+        genome.num_outputs = num_outputs
+        genome.feed_forward = feed_forward
+        genome.fitness = 0.0
+        genome.adjusted_fitness = 0.0
+        genome.species = 0
+        genome.nodes = [Node(node_id, node_type) for node_id, node_type in nodes]
+        genome.connections = [Connection(*conn) for conn in connections]
+        genome.rebuild_indexes()
+        return genome
+
+    @classmethod
+    def from_dict(cls, data, innovation: Optional[InnovationRegistry] = None):
         """Deserialize a Genome object from a dictionary."""
-        genome = cls(
-            genome_id=data['id'],
-            num_inputs=data['num_inputs'],
-            num_outputs=data['num_outputs']
-        )
+        genome = cls.__new__(cls)
+        genome.id = data['id']
+        genome.innovation = innovation if innovation is not None else Innovation.get_instance()
+        genome.num_inputs = data['num_inputs']
+        genome.num_outputs = data['num_outputs']
+        genome.feed_forward = data.get('feed_forward', False)
         genome.fitness = data['fitness']
         genome.adjusted_fitness = data['adjusted_fitness']
         genome.species = data['species']
@@ -324,5 +593,6 @@ class Genome:
 
         # Reconstruct connections
         genome.connections = [Connection(**conn_data) for conn_data in data['connections']]
+        genome.rebuild_indexes()
 
         return genome
@@ -21,9 +21,89 @@ SEGMENT_WIDTH = 600  # Width of each terrain segment
 MUTATION_RATE_WEIGHT = 0.2
 MUTATION_RATE_CONNECTION = 0.05
 MUTATION_RATE_NODE = 0.03
+# Reject new connections that would create a cycle, so every node is computed
+FEED_FORWARD = False
 
 POPULATION_SIZE = 100
 NUM_GENERATIONS = 20
 SPECIATION_THRESHOLD = 3.0
+# Generations a species may go without improving its best fitness before it
+# stops getting offspring
+STAGNATION_LIMIT = 15
+
+# Approximate speciation: compare genomes only to the species whose
+# representatives share a MinHash/LSH bucket with them. Measured through
+# GeneticAlgorithm.determine_species with `python -m benchmarks.bench_speciation`
+# (2000 genomes, up to 163 species): the species of the parents settles most
+# genomes first, so it is about 12% slower than exact speciation (155 against
+# 138 us per genome) and puts 0.29% of the genomes in another species. It can
+# only pay off with many more species
+APPROXIMATE_SPECIATION = False
+# MinHash signature length, a multiple of LSH_BANDS
+MINHASH_PERMUTATIONS = 48
+# LSH bands, more bands find more candidate species at a higher cost. Tune
+# them to the speciation threshold with `python -m benchmarks.bench_speciation`
+LSH_BANDS = 16
 
 SIMULATION_STEPS = 400
+
+# Early termination: end the simulation of a genome when its physics blew up,
+# a limb fell below FALL_LIMIT or the creature stopped moving
+EARLY_TERMINATION = True
+# Pixels per second a limb may move before the physics counts as exploded
+EXPLOSION_SPEED = 10000.0
+# Lowest y a limb may reach, the ground surface is around 500
+FALL_LIMIT = SCREEN_HEIGHT
+# Stall detection: the creature stopped when no limb moved more than
+# STALL_DISTANCE pixels during STALL_WINDOW steps, 0 turns it off
+STALL_WINDOW = 120
+STALL_DISTANCE = 2.0
+# Radians the middle limb may rotate before the creature counts as flipped,
+# None turns it off. Walking creatures of the training setup often flip.
+MAX_TILT = None
+
+# Successive halving: total steps at which genomes are compared, the last one
+# being the full simulation, and the share of every species simulated on
+HALVING_RUNGS = (100, 200, 400)
+HALVING_KEEP = 0.5
+
+# Worker processes evaluating the population, None uses one per CPU and 0
+# evaluates in the main process
+EVALUATION_WORKERS = None
+# Genomes sent to a worker at a time
+EVALUATION_CHUNK_SIZE = 4
+# Genomes sent to a worker at a time by the asyncio scheduler, small batches
+# keep all workers busy until the end of a generation
+SCHEDULER_BATCH_SIZE = 1
+
+# Distributed evaluation: address the coordinator listens on, shared secret of
+# the workers (messages are pickled, only use it on trusted networks), seconds
+# between worker heartbeats and of silence before a worker counts as lost,
+# times a lost work item is retried and work items in flight per worker
+DISTRIBUTED_ADDRESS = ("localhost", 6000)
+DISTRIBUTED_AUTHKEY = b"crawlai"
+HEARTBEAT_INTERVAL = 1.0
+HEARTBEAT_TIMEOUT = 10.0
+WORK_ITEM_RETRIES = 3
+WORKER_PREFETCH = 2
+
+# Island model: islands evolving in separate processes, generations between
+# migrations, best genomes sent to every destination and the migration routes
+# ("ring", "bidirectional_ring" or "fully_connected")
+ISLANDS = 4
+MIGRATION_INTERVAL = 5
+MIGRANTS = 2
+ISLAND_TOPOLOGY = "ring"
+
+# Number of compiled network topologies kept in the LRU plan cache
+PLAN_CACHE_SIZE = 1024
+
+# Number of fitness values of evaluated genomes kept in the LRU fitness cache,
+# 0 disables it
+FITNESS_CACHE_SIZE = 4096
+
+# Floating point type of the preallocated inference path used in simulations
+INFERENCE_DTYPE = "float32"
+
+# Feed-forward network backend: "matrix" (NumPy plan) or "codegen" (generated Python)
+NETWORK_BACKEND = "matrix"
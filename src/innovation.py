@@ -0,0 +1,179 @@
+# src/innovation.py
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+InnovationKey = Tuple[int, int]  # (in_node, out_node)
+
+
+class InnovationRegistry:
+    """
+    Innovation numbers of one evolution run, keyed by (in_node, out_node).
+
+    A GeneticAlgorithm owns one registry and hands it to its genomes, so
+    separate runs number their genes independently and the history is
+    dropped together with the run. Worker processes mutate against an
+    InnovationShard from `shard()` and the coordinator folds the shards
+    back in with `merge()`.
+    """
+
+    def __init__(self):
+        self.counter = 0
+        self.history: Dict[InnovationKey, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+    def get_innovation_number(self, in_node: int, out_node: int) -> int:
+        key = (in_node, out_node)
+        if key not in self.history:
+            self.counter += 1
+            self.history[key] = self.counter
+        return self.history[key]
+
+    def adopt(self, genome):
+        """
+        Renumber the genes of a genome from another registry, e.g. a migrant
+        from another island, and attach it to this registry.
+
+        Innovation numbers are keyed by (in_node, out_node), so a gene gets
+        the number this registry already uses for its connection, or a new
+        one in connection order.
+        """
+        mapping = {
+            conn.innovation_number: self.get_innovation_number(conn.in_node, conn.out_node)
+            for conn in genome.connections
+        }
+        genome.remap_innovations(mapping)
+        genome.innovation = self
+
+    def shard(self) -> "InnovationShard":
+        """Create a worker-local shard that sees the current history."""
+        return InnovationShard(dict(self.history))
+
+    def merge(self, shards: List["InnovationShard"]):
+        """
+        Assign final innovation numbers to the genes created in the shards.
+
+        Shards are merged in the given order and the genes of every shard in
+        the order they were created, so the result only depends on the order
+        of `shards`, never on which worker finished first. A gene created in
+        several shards gets the same number in all of them. Afterwards every
+        shard's `mapping` translates its provisional numbers and
+        `InnovationShard.remap` rewrites the genomes mutated against it.
+
+        Args:
+            shards: Shards created by `shard()`, possibly rebuilt with
+                `InnovationShard.from_dict` after crossing a process boundary.
+        """
+        for shard in shards:
+            shard.mapping = {
+                provisional: self.get_innovation_number(*key)
+                for key, provisional in shard.created.items()
+            }
+            shard.registry = self
+
+    def to_dict(self):
+        """Serialize the registry to a JSON-safe dictionary."""
+        return {
+            'counter': self.counter,
+            'history': [
+                [in_node, out_node, innovation_number]
+                for (in_node, out_node), innovation_number in self.history.items()
+            ],
+        }
+
+    def from_dict(self, data):
+        """
+        Replace the registry contents with a dictionary written by `to_dict`.
+
+        The tuple keyed format of the old Innovation singleton is accepted as
+        well.
+        """
+        if '_innovation_history' in data:
+            self.counter = data['_global_innovation_counter']
+            self.history = dict(data['_innovation_history'])
+        else:
+            self.counter = data['counter']
+            self.history = {
+                (in_node, out_node): innovation_number
+                for in_node, out_node, innovation_number in data['history']
+            }
+        return self
+
+    def to_bytes(self) -> bytes:
+        """Serialize the registry as little-endian int64 values."""
+        values = np.empty(1 + 3 * len(self.history), dtype="<i8")
+        values[0] = self.counter
+        values[1:] = np.array(
+            [
+                (in_node, out_node, innovation_number)
+                for (in_node, out_node), innovation_number in self.history.items()
+            ],
+            dtype="<i8",
+        ).reshape(-1)
+        return values.tobytes()
+
+    def from_bytes(self, data: bytes):
+        """Replace the registry contents with bytes written by `to_bytes`."""
+        values = np.frombuffer(data, dtype="<i8")
+        self.counter = int(values[0])
+        self.history = {
+            (in_node, out_node): innovation_number
+            for in_node, out_node, innovation_number in values[1:].reshape(-1, 3).tolist()
+        }
+        return self
+
+
+class InnovationShard:
+    """
+    Worker-local view of an InnovationRegistry.
+
+    Known connections get their registry number. New connections get
+    provisional negative numbers, -1 for the first, until the coordinator
+    merges the shard and `remap` replaces them in the genomes.
+    """
+
+    def __init__(self, history: Optional[Dict[InnovationKey, int]] = None):
+        self.history = history if history is not None else {}
+        self.created: Dict[InnovationKey, int] = {}  # key -> provisional number
+        self.mapping: Dict[int, int] = {}  # provisional -> final number
+        self.registry: Optional[InnovationRegistry] = None
+
+    def get_innovation_number(self, in_node: int, out_node: int) -> int:
+        key = (in_node, out_node)
+        if key in self.history:
+            return self.history[key]
+        if key not in self.created:
+            self.created[key] = -(len(self.created) + 1)
+        return self.created[key]
+
+    def remap(self, genome):
+        """
+        Replace the provisional innovation numbers of a genome mutated
+        against this shard and attach it to the merged registry.
+        """
+        if self.registry is None:
+            raise ValueError("Shard has not been merged yet")
+        genome.remap_innovations(self.mapping)
+        genome.innovation = self.registry
+
+    def to_dict(self):
+        """Serialize the new genes of the shard to a JSON-safe dictionary."""
+        return {
+            'created': [
+                [in_node, out_node, provisional]
+                for (in_node, out_node), provisional in self.created.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a shard for merging from a dictionary written by `to_dict`."""
+        shard = cls()
+        shard.created = {
+            (in_node, out_node): provisional
+            for in_node, out_node, provisional in data['created']
+        }
+        return shard
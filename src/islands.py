@@ -0,0 +1,299 @@
+# src/islands.py
+
+import random
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from typing import Callable, Dict, List, Optional, Union
+
+from src.genetic_algorithm import GeneticAlgorithm
+from src.genome import Genome
+from src.globals import (
+    ISLANDS,
+    ISLAND_TOPOLOGY,
+    MIGRANTS,
+    MIGRATION_INTERVAL,
+    POPULATION_SIZE,
+    SPECIATION_THRESHOLD,
+)
+from src.workers import headless_display, worker_context
+
+Topology = Dict[int, List[int]]  # island -> islands it sends migrants to
+
+
+def island_topology(kind: Union[str, Topology], islands: int) -> Topology:
+    """
+    Migration routes between islands.
+
+    Args:
+        kind: "ring" (to the next island), "bidirectional_ring" (to both
+            neighbours), "fully_connected" (to every other island), or an
+            explicit island -> destinations dictionary.
+        islands: Number of islands.
+    Returns:
+        Dict[int, List[int]]: island -> islands it sends migrants to.
+    """
+    if isinstance(kind, dict):
+        topology = {island: list(kind.get(island, [])) for island in range(islands)}
+    elif kind == "ring":
+        topology = {island: [(island + 1) % islands] for island in range(islands)}
+    elif kind == "bidirectional_ring":
+        topology = {
+            island: sorted({(island - 1) % islands, (island + 1) % islands})
+            for island in range(islands)
+        }
+    elif kind == "fully_connected":
+        topology = {
+            island: [other for other in range(islands) if other != island]
+            for island in range(islands)
+        }
+    else:
+        raise ValueError(f"Unknown island topology: {kind}")
+    for island, destinations in topology.items():
+        topology[island] = [other for other in destinations if other != island]
+        if any(not 0 <= other < islands for other in destinations):
+            raise ValueError(f"Island {island} sends migrants to an unknown island")
+    return topology
+
+
+def _training_creature():
+    """The creature used for training, built in a throwaway space."""
+    headless_display()
+    import pymunk
+    from src.simulation import build_creature
+
+    return build_creature(pymunk.Space())
+
+
+def _simulation_evaluator():
+    """Evaluator of an island: the simulation, run in the island's process."""
+    from src.evaluation import ParallelEvaluator
+
+    return ParallelEvaluator(workers=0)
+
+
+@dataclass
+class IslandSettings:
+    """Settings shared by all islands, sent to every island process."""
+
+    population_size: int = POPULATION_SIZE  # Genomes per island
+    migration_interval: int = MIGRATION_INTERVAL  # Generations between migrations
+    migrants: int = MIGRANTS  # Best genomes an island sends to every destination
+    speciation_threshold: float = SPECIATION_THRESHOLD
+    genome_class: type = Genome
+    seed: int = 0  # Island i uses seed + i
+    # Picklable factories, called in the island process
+    creature_factory: Callable = _training_creature
+    evaluator_factory: Callable = _simulation_evaluator
+
+
+class Island:
+    """
+    One island: a GeneticAlgorithm that evolves on its own between
+    migrations, with its own InnovationRegistry.
+
+    Migrants arrive as `to_payload` tuples numbered by another island's
+    registry and are renumbered with `InnovationRegistry.adopt`, which keys
+    innovation numbers by (in_node, out_node) like within one island.
+    """
+
+    def __init__(self, island_id: int, settings: IslandSettings):
+        self.island_id = island_id
+        self.settings = settings
+        self.ga = GeneticAlgorithm(
+            settings.population_size,
+            settings.creature_factory(),
+            speciation_threshold=settings.speciation_threshold,
+            genome_class=settings.genome_class,
+            seed=settings.seed + island_id,
+        )
+        self.evaluator = settings.evaluator_factory()
+
+    def receive(self, payloads: List[tuple]):
+        """Replace the last genomes of the unevaluated population with migrants."""
+        payloads = payloads[: len(self.ga.population)]
+        for position, payload in enumerate(payloads, len(self.ga.population) - len(payloads)):
+            genome = Genome.from_payload(payload, innovation=self.ga.innovation)
+            self.ga.innovation.adopt(genome)
+            if self.settings.genome_class is not Genome:
+                genome = self.settings.genome_class.from_genome(genome)
+            genome.id = self.ga.genome_id_counter
+            self.ga.genome_id_counter += 1
+            self.ga.population[position] = genome
+
+    def run_epoch(self, immigrants: List[tuple]) -> dict:
+        """
+        Take in migrants and evolve for `migration_interval` generations.
+
+        Returns:
+            Report with the generation reached, the best and average fitness
+            of the last evaluated population and the payloads and fitness
+            values of its best genomes, the emigrants.
+        """
+        self.receive(immigrants)
+        for _ in range(self.settings.migration_interval):
+            average_fitness = self.ga.evaluate_population(self.evaluator)
+            self.ga.reassign_species()
+            self.ga.adjust_fitness()
+            best = sorted(self.ga.population, key=lambda genome: genome.fitness, reverse=True)
+            self.ga.reproduce()
+        emigrants = best[: max(self.settings.migrants, 1)]
+        return {
+            'island': self.island_id,
+            'generation': self.ga.generation,
+            'best_fitness': emigrants[0].fitness,
+            'average_fitness': average_fitness,
+            'emigrants': [(genome.to_payload(), genome.fitness) for genome in emigrants],
+        }
+
+
+def _island_process(connection: Connection, island_id: int, settings: IslandSettings):
+    """Main loop of an island process: run epochs until told to stop."""
+    random.seed(settings.seed + island_id)
+    island = Island(island_id, settings)
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            connection.send(island.run_epoch(message))
+    finally:
+        # Stop the worker processes of e.g. a ParallelEvaluator
+        close = getattr(island.evaluator, "close", None)
+        if close is not None:
+            close()
+        connection.close()
+
+
+class IslandModel:
+    """
+    Evolves several islands in separate processes with periodic migration.
+
+    Islands never wait for each other: whenever an island finishes an epoch
+    of `migration_interval` generations, its best genomes are queued for its
+    destinations and it immediately starts its next epoch with the newest
+    migrants queued for it. Which migrants an island gets therefore depends
+    on timing. With `processes=False` the islands run one epoch at a time in
+    the main process, which is reproducible.
+
+    Island processes are not daemonic, so an island may evaluate its
+    population with worker processes of its own, e.g. a ParallelEvaluator
+    with workers > 0. They are joined, or terminated after an error, before
+    `run` returns.
+    """
+
+    def __init__(
+        self,
+        islands: int = ISLANDS,
+        topology: Union[str, Topology] = ISLAND_TOPOLOGY,
+        settings: Optional[IslandSettings] = None,
+        processes: bool = True,
+    ):
+        """
+        Args:
+            islands: Number of islands.
+            topology: Migration routes, see `island_topology`.
+            settings: Settings of every island.
+            processes: Run every island in its own process.
+        """
+        if islands < 1:
+            raise ValueError("At least one island is needed")
+        self.islands = islands
+        self.topology = island_topology(topology, islands)
+        self.settings = settings if settings is not None else IslandSettings()
+        if self.settings.migration_interval < 1 or self.settings.migrants < 0:
+            raise ValueError("migration_interval must be >= 1 and migrants >= 0")
+        self.processes = processes
+        self.reports: List[dict] = []  # Reports of all epochs, without emigrants
+        self.best_genome: Optional[Genome] = None
+        # destination -> source -> newest emigrant payloads of the source
+        self._inbox: Dict[int, Dict[int, List[tuple]]] = {
+            island: {} for island in range(islands)
+        }
+
+    def _collect(self, report: dict) -> List[tuple]:
+        """
+        Record an epoch report, queue its emigrants for their destinations
+        and return the migrants waiting for the island that sent it.
+        """
+        island = report['island']
+        payload, fitness = report['emigrants'][0]
+        if self.best_genome is None or fitness > self.best_genome.fitness:
+            self.best_genome = Genome.from_payload(payload)
+            self.best_genome.fitness = fitness
+        emigrants = [payload for payload, _ in report['emigrants'][: self.settings.migrants]]
+        for destination in self.topology[island]:
+            self._inbox[destination][island] = emigrants
+        self.reports.append({key: value for key, value in report.items() if key != 'emigrants'})
+        immigrants = [
+            payload
+            for source in sorted(self._inbox[island])
+            for payload in self._inbox[island][source]
+        ]
+        self._inbox[island] = {}
+        return immigrants
+
+    def run(self, epochs: int) -> Genome:
+        """
+        Evolve every island for `epochs` epochs.
+
+        Args:
+            epochs: Epochs per island, at least 1.
+
+        Returns:
+            The fittest genome found on any island, numbered by its island's
+            innovation registry.
+        """
+        if epochs < 1:
+            raise ValueError("epochs must be >= 1")
+        if self.processes:
+            self._run_processes(epochs)
+        else:
+            self._run_local(epochs)
+        return self.best_genome
+
+    def _run_local(self, epochs: int):
+        random.seed(self.settings.seed)
+        islands = [Island(island_id, self.settings) for island_id in range(self.islands)]
+        immigrants = [[] for _ in islands]
+        for _ in range(epochs):
+            for island in islands:
+                report = island.run_epoch(immigrants[island.island_id])
+                immigrants[island.island_id] = self._collect(report)
+
+    def _run_processes(self, epochs: int):
+        context = worker_context()
+        connections = {}
+        workers = []
+        for island in range(self.islands):
+            parent, child = context.Pipe()
+            # Not daemonic: daemonic processes may not start evaluation workers
+            worker = context.Process(
+                target=_island_process, args=(child, island, self.settings)
+            )
+            worker.start()
+            child.close()
+            parent.send([])
+            connections[parent] = island
+            workers.append(worker)
+
+        remaining = {island: epochs for island in range(self.islands)}
+        try:
+            while connections:
+                for connection in wait(list(connections)):
+                    island = connections[connection]
+                    immigrants = self._collect(connection.recv())
+                    remaining[island] -= 1
+                    if remaining[island] > 0:
+                        connection.send(immigrants)
+                    else:
+                        connection.send(None)
+                        connection.close()
+                        del connections[connection]
+        except BaseException:
+            # A failed island would leave the others waiting for work
+            for worker in workers:
+                worker.terminate()
+            raise
+        finally:
+            for worker in workers:
+                worker.join()
@@ -0,0 +1,63 @@
+# src/lru_cache.py
+
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class LRUCache:
+    """
+    Bounded mapping that evicts the least recently used entry and counts
+    hits and misses, the base of PlanCache and FitnessCache.
+    """
+
+    def __init__(self, maxsize: int):
+        """
+        Args:
+            maxsize: Entries kept, 0 or less to keep none.
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[object]:
+        """Return the entry for a key, or None, and count the lookup."""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: object):
+        """Store an entry, evicting the least recently used one if full."""
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Hit/miss statistics since the last reset."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+        }
+
+    def reset_stats(self):
+        """Reset the hit/miss counters, e.g. at the start of a generation."""
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """Drop all entries and reset the statistics."""
+        self._entries.clear()
+        self.reset_stats()
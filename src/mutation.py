@@ -0,0 +1,152 @@
+# src/mutation.py
+
+import random
+from typing import List
+
+import numpy as np
+
+from src.globals import (
+    MUTATION_RATE_WEIGHT,
+    MUTATION_RATE_CONNECTION,
+    MUTATION_RATE_NODE,
+)
+
+WEIGHT_REPLACE_RATE = 0.1  # Share of mutated weights that are redrawn, as in mutate_weights
+
+
+def genome_rng(seed: int, generation: int, genome_id: int) -> np.random.Generator:
+    """
+    Random stream of one genome in one generation.
+
+    The stream only depends on its three arguments, so a genome mutates the
+    same way no matter which process or batch it is mutated in. Streams are
+    Philox counter blocks: the key holds the run seed and generation and the
+    counter starts at the genome id in its third word, so streams of
+    different genomes never overlap.
+
+    Args:
+        seed: Non-negative seed of the evolution run.
+        generation: Generation number.
+        genome_id: Non-negative genome id.
+    """
+    return np.random.Generator(
+        np.random.Philox(counter=[0, 0, genome_id, 0], key=[seed, generation])
+    )
+
+
+def _splitmix64(values: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer on uint64 arrays, wrapping on overflow."""
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def mutation_rolls(seed: int, generation: int, genome_ids: np.ndarray) -> np.ndarray:
+    """
+    Weight, connection and node mutation dice of several genomes.
+
+    The dice are a hash of (seed, generation, genome id), computed for all
+    genomes at once so that only genomes that do mutate need their stream.
+
+    Returns:
+        Array of shape (len(genome_ids), 3) with uniform values in [0, 1).
+    """
+    run = _splitmix64(
+        np.array([seed], dtype=np.uint64)
+        ^ _splitmix64(np.array([generation], dtype=np.uint64))
+    )
+    genomes = _splitmix64(run ^ np.asarray(genome_ids, dtype=np.uint64))
+    dice = _splitmix64(genomes[:, None] + np.arange(1, 4, dtype=np.uint64))
+    return (dice >> np.uint64(11)) * 2.0**-53
+
+
+class _GenomeStreams:
+    """
+    Reusable generator that jumps to the stream of each genome.
+
+    Setting the Philox state is several times cheaper than building a new
+    generator for every genome, and gives the same numbers as `genome_rng`.
+    """
+
+    def __init__(self, seed: int, generation: int):
+        self.bit_generator = np.random.Philox(key=[seed, generation])
+        self.generator = np.random.Generator(self.bit_generator)
+        self.key = np.array([seed, generation], dtype=np.uint64)
+
+    def stream(self, genome_id: int) -> np.random.Generator:
+        self.bit_generator.state = {
+            'bit_generator': 'Philox',
+            'state': {
+                'counter': np.array([0, 0, genome_id, 0], dtype=np.uint64),
+                'key': self.key,
+            },
+            'buffer': np.zeros(4, dtype=np.uint64),
+            'buffer_pos': 4,
+            'has_uint32': 0,
+            'uinteger': 0,
+        }
+        return self.generator
+
+
+def mutate_population(genomes: List, seed: int, generation: int, delta: float = 0.1):
+    """
+    Mutate a batch of genomes like `Genome.mutate`, with per-genome streams.
+
+    The mutation dice of all genomes come from one `mutation_rolls` call.
+    Genomes that mutate draw from `genome_rng(seed, generation, genome.id)`:
+    the weights of all genomes that mutate their weights are concatenated,
+    perturbed or replaced in a few array operations and written back, and
+    structural mutations use a `random.Random` seeded from the same stream.
+
+    Args:
+        genomes: Genomes with non-negative ids, Genome or ArrayGenome.
+        seed: Seed of the evolution run.
+        generation: Generation number, so streams differ between generations.
+        delta: Standard deviation of the weight perturbation.
+    """
+    weight_arrays = []
+    uniforms = []
+    noise = []
+    weight_genomes = []
+    structural = []
+    streams = _GenomeStreams(seed, generation)
+    genome_ids = np.fromiter((genome.id for genome in genomes), np.int64, len(genomes))
+    all_rolls = mutation_rolls(seed, generation, genome_ids)
+    mutating = (
+        (all_rolls[:, 0] < MUTATION_RATE_WEIGHT)
+        | (all_rolls[:, 1] < MUTATION_RATE_CONNECTION)
+        | (all_rolls[:, 2] < MUTATION_RATE_NODE)
+    )
+    for index in np.flatnonzero(mutating).tolist():
+        genome = genomes[index]
+        rolls = all_rolls[index]
+        rng = streams.stream(genome.id)
+        if rolls[1] < MUTATION_RATE_CONNECTION or rolls[2] < MUTATION_RATE_NODE:
+            structural.append(
+                (genome, rolls, random.Random(int(rng.integers(2**63))))
+            )
+        if rolls[0] < MUTATION_RATE_WEIGHT:
+            weights = genome.weight_array()
+            weight_arrays.append(weights)
+            uniforms.append(rng.random((2, len(weights))))
+            noise.append(rng.normal(0.0, delta, len(weights)))
+            weight_genomes.append(genome)
+
+    if weight_genomes:
+        weights = np.concatenate(weight_arrays)
+        uniforms = np.concatenate(uniforms, axis=1)
+        mutated = np.where(
+            uniforms[0] < WEIGHT_REPLACE_RATE,
+            uniforms[1] * 2.0 - 1.0,
+            weights + np.concatenate(noise),
+        )
+        offsets = np.cumsum([len(weights) for weights in weight_arrays])[:-1]
+        for genome, genome_weights in zip(weight_genomes, np.split(mutated, offsets)):
+            genome.set_weight_array(genome_weights)
+
+    for genome, rolls, structure_rng in structural:
+        if rolls[1] < MUTATION_RATE_CONNECTION:
+            genome.mutate_connections(structure_rng)
+        if rolls[2] < MUTATION_RATE_NODE:
+            genome.mutate_nodes(structure_rng)
@@ -0,0 +1,174 @@
+# src/scheduler.py
+
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.evaluation import (
+    ParallelEvaluator,
+    _counted,
+    _evaluate_batch,
+    _timed_evaluations,
+)
+from src.genome import Genome
+from src.globals import (
+    EVALUATION_WORKERS,
+    FITNESS_CACHE_SIZE,
+    SCHEDULER_BATCH_SIZE,
+    SIMULATION_STEPS,
+)
+
+
+class ScheduledEvaluator(ParallelEvaluator):
+    """
+    ParallelEvaluator that schedules genomes dynamically with asyncio.
+
+    Instead of cutting the population into fixed chunks up front, one
+    asyncio task per worker takes the next small batch from a shared queue
+    whenever its previous batch is done, so a worker that drew cheap
+    genomes takes over work a busy one would otherwise do at the end of the
+    generation. The queue is sorted by predicted cost, longest first, so the
+    genomes left at the end are short. A genome whose structure, its enabled
+    connections, was simulated in the previous generation is predicted to
+    take as long as it did then. Children of weight-only mutations keep the
+    structure of their parent, so this covers most of a population even
+    though the fitness cache skips the parents themselves. Other genomes
+    get a linear fit of the previous generation's timings against genome
+    size.
+
+    `evaluate_population` runs its own event loop with `asyncio.run`, so it
+    cannot be called from a coroutine; from asyncio code, run it in a
+    thread, e.g. with `loop.run_in_executor`.
+
+    Every generation appends its utilization metrics to `metrics`.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = EVALUATION_WORKERS,
+        batch_size: int = SCHEDULER_BATCH_SIZE,
+        steps: int = SIMULATION_STEPS,
+        cache_size: int = FITNESS_CACHE_SIZE,
+    ):
+        """
+        Args:
+            workers: Number of worker processes, None for one per CPU and 0
+                to evaluate in the main process.
+            batch_size: Genomes sent to a worker at a time.
+            steps: Simulation steps per genome.
+            cache_size: Fitness values kept in the fitness cache.
+        """
+        super().__init__(workers, batch_size, steps, cache_size)
+        self.metrics: List[dict] = []
+        self._durations: Dict[tuple, float] = {}  # Last generation: structure -> seconds
+        self._cost_model: Optional[Tuple[float, float]] = None  # (slope, intercept)
+
+    @staticmethod
+    def _size(payload: tuple) -> int:
+        """Nodes plus connections of a genome payload, the cost feature."""
+        return len(payload[4]) + len(payload[5])
+
+    @staticmethod
+    def _structure(payload: tuple) -> tuple:
+        """Sorted enabled (in_node, out_node) connections of a genome payload."""
+        return tuple(sorted((conn[0], conn[1]) for conn in payload[5] if conn[4]))
+
+    def predict_costs(self, payloads: List[tuple]) -> np.ndarray:
+        """Predicted simulation seconds of every genome, or sizes before any timing."""
+        sizes = np.array([self._size(payload) for payload in payloads], dtype=np.float64)
+        if self._cost_model is None:
+            return sizes
+        slope, intercept = self._cost_model
+        predicted = slope * sizes + intercept
+        for index, payload in enumerate(payloads):
+            duration = self._durations.get(self._structure(payload))
+            if duration is not None:
+                predicted[index] = duration
+        return predicted
+
+    def _learn(self, payloads: List[tuple], durations: List[float]):
+        """Remember the timings of this generation for the next one."""
+        timings = defaultdict(list)
+        for payload, duration in zip(payloads, durations):
+            timings[self._structure(payload)].append(duration)
+        self._durations = {
+            structure: float(np.mean(values)) for structure, values in timings.items()
+        }
+        sizes = [self._size(payload) for payload in payloads]
+        if len(set(sizes)) > 1:
+            slope, intercept = np.polyfit(sizes, durations, 1)
+            self._cost_model = (float(slope), float(intercept))
+        else:
+            self._cost_model = (0.0, float(np.mean(durations)))
+
+    async def _dispatch(self, payloads: List[tuple], batches: deque) -> tuple:
+        """
+        Run the batches on the worker pool, one asyncio task per worker.
+
+        Returns:
+            The (fitness, seconds) of every genome and the times the tasks
+            ran out of work.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._start()
+        results: Dict[int, Tuple[float, float]] = {}
+        finished: List[float] = []
+
+        async def worker():
+            while batches:
+                batch = batches.popleft()
+                timed, stats = await loop.run_in_executor(
+                    executor, _evaluate_batch, [payloads[index] for index in batch]
+                )
+                self._add_network_stats(stats)
+                results.update(zip(batch, timed))
+            finished.append(time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(self.workers)))
+        return [results[index] for index in range(len(payloads))], finished
+
+    def _simulate(self, genomes: List[Genome]) -> List[float]:
+        """Simulate genomes, longest predicted first, and record the metrics."""
+        payloads = [genome.to_payload() for genome in genomes]
+        if not payloads:
+            self.metrics.append(
+                {'genomes': 0, 'wall': 0.0, 'busy': 0.0, 'utilization': 1.0, 'tail': 0.0}
+            )
+            return []
+        order = np.argsort(-self.predict_costs(payloads), kind="stable").tolist()
+        batches = deque(
+            order[start : start + self.chunk_size]
+            for start in range(0, len(order), self.chunk_size)
+        )
+
+        start = time.perf_counter()
+        if self.workers == 0:
+            timed, stats = _counted(
+                _timed_evaluations, self._local_simulation(), payloads
+            )
+            self._add_network_stats(stats)
+            finished = [time.perf_counter()]
+        else:
+            timed, finished = asyncio.run(self._dispatch(payloads, batches))
+        end = time.perf_counter()
+
+        durations = [seconds for _, seconds in timed]
+        self._learn(payloads, durations)
+        workers = max(self.workers, 1)
+        wall = end - start
+        self.metrics.append(
+            {
+                'genomes': len(payloads),
+                'wall': wall,
+                'busy': sum(durations),
+                # Share of the worker time spent simulating
+                'utilization': sum(durations) / (wall * workers) if wall > 0 else 1.0,
+                # Time between the first worker running out of work and the
+                # end of the generation, the barrier wait
+                'tail': end - min(finished),
+            }
+        )
+        return [fitness for fitness, _ in timed]
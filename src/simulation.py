@@ -0,0 +1,172 @@
+# src/simulation.py
+
+import copy
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pygame
+import pymunk
+
+from src.agent_parts.creature import Creature
+from src.agent_parts.rectangle import Point
+from src.agent_parts.vision import Vision
+from src.environment import Environment, GroundType
+from src.NEATnetwork import create_network
+from src.termination import TerminationCriterion, default_criteria
+from src.globals import SIMULATION_STEPS, INFERENCE_DTYPE, NETWORK_BACKEND
+
+
+def build_creature(space: pymunk.Space) -> Creature:
+    """Build the three-limb, two-motor creature used for training."""
+    creature = Creature(space, Vision(Point(0, 0)))
+    limb1 = creature.add_limb(100, 20, (300, 300), mass=1)
+    limb2 = creature.add_limb(100, 20, (350, 300), mass=3)
+    limb3 = creature.add_limb(80, 40, (400, 300), mass=5)
+    creature.add_motor_on_limbs(limb1, limb2, (325, 300))
+    creature.add_motor_on_limbs(limb2, limb3, (375, 300))
+    return creature
+
+
+class Simulation:
+    """
+    Headless simulation that evaluates genomes, one after another.
+
+    Every genome runs in a fresh pymunk space, so its fitness does not depend
+    on the genomes evaluated before it and a Simulation can be kept alive in
+    a worker process for a whole training run. The simulation of a genome
+    ends early when one of the termination criteria is met.
+    """
+
+    def __init__(
+        self,
+        steps: int = SIMULATION_STEPS,
+        criteria: Optional[Sequence[TerminationCriterion]] = None,
+    ):
+        """
+        Args:
+            steps: Simulation steps per genome.
+            criteria: Termination criteria, None for the ones configured in
+                globals and an empty sequence to always run all steps.
+        """
+        self.steps = steps
+        self.criteria = list(default_criteria() if criteria is None else criteria)
+        # Minimal screen for the environment, nothing is rendered
+        self.screen = pygame.Surface((1, 1))
+
+    def config(self) -> tuple:
+        """
+        Settings besides the genome that the fitness depends on, part of the
+        fitness cache key. The simulation is deterministic, so a genome always
+        gets the same fitness under the same config.
+        """
+        return (
+            "simulation",
+            self.steps,
+            GroundType.BASIC_GROUND.name,
+            INFERENCE_DTYPE,
+            NETWORK_BACKEND,
+            tuple(criterion.config() for criterion in self.criteria),
+        )
+
+    def start(self, genome, screen: Optional[pygame.Surface] = None) -> "SimulationRun":
+        """
+        Set up the simulation of a genome without running any steps.
+
+        Args:
+            genome: Genome to simulate.
+            screen: Surface the environment renders to, e.g. for a replay.
+        """
+        return SimulationRun(genome, screen or self.screen, self.criteria)
+
+    def run(self, genome) -> Tuple[float, int]:
+        """
+        Run the simulation for a genome.
+
+        Returns:
+            Tuple[float, int]: The fitness and the number of steps simulated
+            before the simulation ended.
+        """
+        run = self.start(genome)
+        fitness = run.advance(self.steps)
+        return fitness, run.steps
+
+    def evaluate(self, genome) -> float:
+        """Run the simulation for a genome and return its fitness."""
+        return self.run(genome)[0]
+
+
+class SimulationRun:
+    """
+    The simulation of one genome, which can be advanced a few steps at a
+    time. Advancing 100 and then 300 steps gives exactly the same state as
+    advancing 400 steps at once. Once a termination criterion is met the run
+    is over: `terminated` holds the name of the criterion and advancing does
+    nothing.
+    """
+
+    def __init__(
+        self,
+        genome,
+        screen: pygame.Surface,
+        criteria: Sequence[TerminationCriterion] = (),
+    ):
+        self.space = pymunk.Space()
+        self.space.gravity = (0, 981)
+        self.environment = Environment(screen, self.space)
+        self.environment.ground_type = GroundType.BASIC_GROUND
+
+        self.network = create_network(genome)
+        self.creature = build_creature(self.space)
+        self.steps = 0  # Steps simulated so far
+        self.terminated: Optional[str] = None
+        self._final_fitness: Optional[float] = None
+        # Every run needs its own criterion state
+        self.criteria: List[TerminationCriterion] = [
+            copy.copy(criterion) for criterion in criteria
+        ]
+        for criterion in self.criteria:
+            criterion.reset(self.creature)
+
+        # Preallocate the observation and output buffers. The observation is at
+        # least num_inputs long, so missing readings stay zero and extra
+        # readings are ignored by the network.
+        self.observation = np.zeros(
+            max(genome.num_inputs, self.creature.get_observation_size()),
+            dtype=self.network.state.dtype,
+        )
+        self.outputs = np.zeros(genome.num_outputs, dtype=self.network.state.dtype)
+
+    def advance(self, steps: int) -> float:
+        """Simulate up to `steps` more steps and return the fitness reached."""
+        creature = self.creature
+        for _ in range(steps):
+            if self.terminated is not None:
+                break
+            previous_fitness = self.fitness()
+            creature.fill_observation(self.observation)
+            self.network.forward_into(self.observation, self.outputs)
+            creature.set_joint_rates(self.outputs)
+
+            creature.vision.update(
+                Point(
+                    creature.limbs[0].body.position.x,
+                    creature.limbs[0].body.position.y,
+                ),
+                self.environment.ground,
+                self.environment.offset,
+            )
+            self.space.step(1 / 60.0)
+            self.steps += 1
+            for criterion in self.criteria:
+                if criterion.check(creature):
+                    self.terminated = criterion.name
+                    if criterion.invalidates_step:
+                        self._final_fitness = previous_fitness
+                    break
+        return self.fitness()
+
+    def fitness(self) -> float:
+        """Fitness is the distance traveled"""
+        if self._final_fitness is not None:
+            return self._final_fitness
+        return self.creature.limbs[0].body.position.x
@@ -1,19 +1,66 @@
-import random
-from typing import List
+# src/species.py
+
+import math
+from typing import List, Optional
+
 from src.genome import Genome
 
 
 class Species:
-    def __init__(self, species_id: int):
+    """
+    A species that lives across generations.
+
+    The species keeps its id and a representative between generations, so
+    that genomes can be checked against the species of their parents first,
+    and tracks how long ago its best fitness last improved.
+    """
+
+    def __init__(self, species_id: int, representative: Genome, generation: int = 0):
+        """
+        Args:
+            species_id: Stable id of the species.
+            representative: Genome new members are compared to.
+            generation: Generation the species appeared in.
+        """
         self.species_id = species_id
+        self.representative = representative
         self.members: List[Genome] = []
         self.average_fitness: float = 0.0
+        self.best_fitness: float = -math.inf
+        self.created = generation
+        self.last_improved = generation
 
     def add_member(self, genome: Genome):
         self.members.append(genome)
+        genome.species = self.species_id
 
     def adjust_fitness(self):
         total_fitness = sum(genome.fitness for genome in self.members)
         for genome in self.members:
             genome.adjusted_fitness = genome.fitness / len(self.members)
         self.average_fitness = total_fitness / len(self.members)
+
+    def update_stagnation(self, generation: int):
+        """Record the generation if the members beat the best fitness so far."""
+        best_fitness = max(genome.fitness for genome in self.members)
+        if best_fitness > self.best_fitness:
+            self.best_fitness = best_fitness
+            self.last_improved = generation
+
+    def stagnation(self, generation: int) -> int:
+        """Generations since the best fitness of the species last improved."""
+        return generation - self.last_improved
+
+    def start_generation(self):
+        """
+        Make the fittest member the representative of the next generation and
+        clear the members.
+        """
+        if self.members:
+            self.representative = self.best_member()
+        self.members = []
+
+    def best_member(self) -> Optional[Genome]:
+        if not self.members:
+            return None
+        return max(self.members, key=lambda genome: genome.fitness)
@@ -0,0 +1,260 @@
+# src/successive_halving.py
+
+import math
+from collections import defaultdict
+from multiprocessing.connection import Connection
+from typing import Dict, List, Sequence, Tuple
+
+from src.genome import Genome
+from src.globals import HALVING_KEEP, HALVING_RUNGS
+from src.workers import worker_context, worker_simulation
+
+
+def _advance(run, steps: int) -> Tuple[float, int]:
+    """Advance a SimulationRun, which may end early, and report its steps."""
+    return run.advance(steps), run.steps
+
+
+def _resident_worker(connection: Connection):
+    """
+    Worker process that keeps the SimulationRuns of its genomes between
+    rungs. Messages: ("start", [(index, payload)]), ("advance", indices,
+    steps), answered with {index: (fitness, steps simulated)}, ("drop",
+    indices) and None to stop.
+    """
+    simulation = worker_simulation()
+    runs = {}
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        if message[0] == "start":
+            for index, payload in message[1]:
+                runs[index] = simulation.start(Genome.from_payload(payload))
+        elif message[0] == "advance":
+            _, indices, steps = message
+            connection.send({index: _advance(runs[index], steps) for index in indices})
+        elif message[0] == "drop":
+            for index in message[1]:
+                runs.pop(index, None)
+    connection.close()
+
+
+class _LocalRuns:
+    """Simulation runs of a population in the main process."""
+
+    def __init__(self):
+        from src.simulation import Simulation
+
+        self.simulation = Simulation()
+        self.runs = {}
+
+    def start(self, payloads: List[tuple]):
+        self.runs = {
+            index: self.simulation.start(Genome.from_payload(payload))
+            for index, payload in enumerate(payloads)
+        }
+
+    def advance(self, indices: List[int], steps: int) -> Dict[int, Tuple[float, int]]:
+        return {index: _advance(self.runs[index], steps) for index in indices}
+
+    def drop(self, indices: List[int]):
+        for index in indices:
+            self.runs.pop(index, None)
+
+    def close(self):
+        self.runs = {}
+
+
+class _ResidentRuns:
+    """
+    Simulation runs spread over worker processes. A run stays in the
+    process it was started in, since pymunk spaces and pygame surfaces
+    cannot be moved between processes; genome i lives in worker i % workers.
+    The genomes kept at a rung are therefore not rebalanced, and some
+    workers may have fewer of them, or none, in later rungs.
+    """
+
+    def __init__(self, workers: int):
+        context = worker_context()
+        self.connections = []
+        self.processes = []
+        for _ in range(workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=_resident_worker, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def _by_worker(self, indices) -> Dict[int, List[int]]:
+        groups = defaultdict(list)
+        for index in indices:
+            groups[index % len(self.connections)].append(index)
+        return groups
+
+    def start(self, payloads: List[tuple]):
+        for worker, indices in self._by_worker(range(len(payloads))).items():
+            self.connections[worker].send(
+                ("start", [(index, payloads[index]) for index in indices])
+            )
+
+    def advance(self, indices: List[int], steps: int) -> Dict[int, Tuple[float, int]]:
+        groups = self._by_worker(indices)
+        for worker, worker_indices in groups.items():
+            self.connections[worker].send(("advance", worker_indices, steps))
+        results = {}
+        for worker in groups:
+            results.update(self.connections[worker].recv())
+        return results
+
+    def drop(self, indices: List[int]):
+        for worker, worker_indices in self._by_worker(indices).items():
+            self.connections[worker].send(("drop", worker_indices))
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(None)
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+
+class SuccessiveHalvingEvaluator:
+    """
+    Multi-fidelity evaluator that stops simulating hopeless genomes early.
+
+    All genomes are simulated up to the first rung. Then only the best
+    `keep` fraction of every species, at least one genome, is simulated on
+    to the next rung, and so on up to the last rung. Runs are continued
+    where they stopped, never restarted, so a genome that reaches the last
+    rung gets exactly the fitness of a full simulation, as do genomes whose
+    simulation ended early on a termination criterion. Genomes that are
+    dropped keep the fitness they reached, lowered if needed so that they
+    rank below every genome of their species that beat them.
+
+    Every generation appends the number of simulated and saved steps to
+    `reports`.
+    """
+
+    def __init__(
+        self,
+        rungs: Sequence[int] = HALVING_RUNGS,
+        keep: float = HALVING_KEEP,
+        workers: int = 0,
+    ):
+        """
+        Args:
+            rungs: Increasing total step counts at which genomes are
+                compared, the last one being the full simulation length.
+            keep: Share of every species simulated on at each rung.
+            workers: Worker processes holding the simulation runs, 0 to
+                simulate in the main process.
+        """
+        increasing = all(low < high for low, high in zip(rungs, rungs[1:]))
+        if not rungs or rungs[0] <= 0 or not increasing:
+            raise ValueError("rungs must be positive and increasing")
+        if not 0 < keep <= 1 or workers < 0:
+            raise ValueError("keep must be in (0, 1] and workers >= 0")
+        self.rungs = list(rungs)
+        self.keep = keep
+        self.workers = workers
+        self.reports: List[dict] = []
+        self._runs = None
+
+    def _backend(self):
+        if self._runs is None:
+            self._runs = _ResidentRuns(self.workers) if self.workers else _LocalRuns()
+        return self._runs
+
+    def evaluate_population(self, genomes: List[Genome]) -> List[float]:
+        """Evaluate genomes and return their fitness values in the same order."""
+        runs = self._backend()
+        runs.start([genome.to_payload() for genome in genomes])
+        fitnesses = [0.0] * len(genomes)
+        used = [0] * len(genomes)  # Steps simulated per genome
+        active = list(range(len(genomes)))
+        survivors = []
+        cuts = []  # Per rung: (kept, dropped) genome indices of every species
+        steps_done = 0
+        for rung, horizon in enumerate(self.rungs):
+            results = runs.advance(active, horizon - steps_done)
+            for index, (fitness, steps) in results.items():
+                fitnesses[index] = fitness
+                used[index] = steps
+            steps_done = horizon
+            survivors.append(len(active))
+            if rung == len(self.rungs) - 1:
+                break
+
+            species = defaultdict(list)
+            for index in active:
+                species[genomes[index].species].append(index)
+            kept = []
+            cut = []
+            for members in species.values():
+                members.sort(key=lambda index: fitnesses[index], reverse=True)
+                count = max(1, math.ceil(self.keep * len(members)))
+                kept.extend(members[:count])
+                if count < len(members):
+                    cut.append((members[:count], members[count:]))
+            cuts.append(cut)
+            runs.drop(sorted(set(active) - set(kept)))
+            active = sorted(kept)
+        runs.drop(active)
+        self._rank_dropped(fitnesses, cuts)
+
+        simulated = sum(used)
+        full = len(genomes) * self.rungs[-1]
+        self.reports.append(
+            {
+                'survivors': survivors,  # Genomes simulated up to every rung
+                'steps': simulated,
+                'full_steps': full,
+                'saved': 1 - simulated / full if full else 0.0,
+            }
+        )
+        return fitnesses
+
+    @staticmethod
+    def _rank_dropped(fitnesses: List[float], cuts: List[list]):
+        """
+        Move the fitness of dropped genomes below that of the genomes of
+        their species that beat them, keeping their order.
+
+        A dropped genome keeps the fitness of a shorter simulation, which
+        could be higher than the full fitness of a genome that beat it,
+        e.g. if that genome walked backwards later on. Rungs are handled
+        from the last one, so the survivors already have their final rank.
+        """
+        for cut in reversed(cuts):
+            for kept, dropped in cut:
+                floor = min(fitnesses[index] for index in kept)
+                best = max(fitnesses[index] for index in dropped)
+                if best < floor:
+                    continue
+                # Small gap below the floor, so that no dropped genome ties it
+                shift = best - floor + 1e-6 * max(1.0, abs(floor))
+                for index in dropped:
+                    fitnesses[index] -= shift
+
+    def __call__(self, genome: Genome) -> float:
+        """
+        Evaluate a single genome. A genome is never dropped when it is alone
+        in its species, so this is a full simulation.
+        """
+        return self.evaluate_population([genome])[0]
+
+    def close(self):
+        """Stop the worker processes and drop the runs they hold."""
+        if self._runs is not None:
+            self._runs.close()
+            self._runs = None
+
+    def __enter__(self) -> "SuccessiveHalvingEvaluator":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,178 @@
+# src/termination.py
+
+import math
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from src.globals import (
+    EARLY_TERMINATION,
+    EXPLOSION_SPEED,
+    FALL_LIMIT,
+    MAX_TILT,
+    STALL_DISTANCE,
+    STALL_WINDOW,
+)
+
+
+class TerminationCriterion(ABC):
+    """
+    Rule that ends the simulation of a genome before its last step.
+
+    `reset` is called when a simulation starts and `check` after every step.
+    Every SimulationRun works on its own copy of the criterion, so a
+    criterion may keep per-run state in its attributes.
+    """
+
+    name = "criterion"
+    # Whether the state after the failing step is garbage, in which case the
+    # fitness of the step before it is used
+    invalidates_step = False
+
+    def reset(self, creature):
+        """Start watching a new creature."""
+
+    @abstractmethod
+    def check(self, creature) -> bool:
+        """Whether the simulation of the creature should end now."""
+        pass
+
+    @abstractmethod
+    def config(self) -> tuple:
+        """Settings of the criterion, part of the simulation config."""
+        pass
+
+
+class StallCriterion(TerminationCriterion):
+    """
+    Ends the simulation when the creature stops moving: no limb moved more
+    than `distance` during a window of `window` steps. The windows do not
+    overlap, so the check costs the same for any window length.
+    """
+
+    name = "stall"
+
+    def __init__(self, window: int = STALL_WINDOW, distance: float = STALL_DISTANCE):
+        if window < 1 or distance < 0:
+            raise ValueError("window must be >= 1 and distance >= 0")
+        self.window = window
+        self.distance = distance
+
+    def reset(self, creature):
+        self._steps = 0
+        self._low = [math.inf, math.inf] * len(creature.limbs)
+        self._high = [-math.inf, -math.inf] * len(creature.limbs)
+
+    def check(self, creature) -> bool:
+        low, high = self._low, self._high
+        for index, limb in enumerate(creature.limbs):
+            x, y = limb.body.position
+            low[2 * index] = min(low[2 * index], x)
+            high[2 * index] = max(high[2 * index], x)
+            low[2 * index + 1] = min(low[2 * index + 1], y)
+            high[2 * index + 1] = max(high[2 * index + 1], y)
+        self._steps += 1
+        if self._steps < self.window:
+            return False
+        stalled = all(top - bottom <= self.distance for bottom, top in zip(low, high))
+        self.reset(creature)
+        return stalled
+
+    def config(self) -> tuple:
+        return (self.name, self.window, self.distance)
+
+
+class OrientationCriterion(TerminationCriterion):
+    """
+    Ends the simulation when a limb is rotated more than `max_tilt` radians
+    away from its starting angle, e.g. when the creature flipped over.
+    """
+
+    name = "orientation"
+
+    def __init__(self, max_tilt: float = math.pi / 2, limb: int = 1):
+        if not 0 < max_tilt <= math.pi:
+            raise ValueError("max_tilt must be in (0, pi]")
+        self.max_tilt = max_tilt
+        self.limb = limb
+
+    def reset(self, creature):
+        self._start = creature.limbs[self.limb].body.angle
+
+    def check(self, creature) -> bool:
+        angle = creature.limbs[self.limb].body.angle - self._start
+        return abs(math.remainder(angle, 2 * math.pi)) > self.max_tilt
+
+    def config(self) -> tuple:
+        return (self.name, self.max_tilt, self.limb)
+
+
+class BoundsCriterion(TerminationCriterion):
+    """
+    Ends the simulation when a limb leaves the world: below `max_y`, i.e.
+    fallen through or off the end of the ground, or outside `min_x`/`max_x`
+    if given.
+    """
+
+    name = "bounds"
+
+    def __init__(
+        self,
+        max_y: float = FALL_LIMIT,
+        min_x: Optional[float] = None,
+        max_x: Optional[float] = None,
+    ):
+        self.max_y = max_y
+        self.min_x = -math.inf if min_x is None else min_x
+        self.max_x = math.inf if max_x is None else max_x
+
+    def check(self, creature) -> bool:
+        for limb in creature.limbs:
+            x, y = limb.body.position
+            if y > self.max_y or not self.min_x <= x <= self.max_x:
+                return True
+        return False
+
+    def config(self) -> tuple:
+        return (self.name, self.max_y, self.min_x, self.max_x)
+
+
+class ExplosionCriterion(TerminationCriterion):
+    """
+    Ends the simulation when the physics blew up: a limb position or
+    velocity is NaN or infinite, or a limb moves faster than `max_speed`
+    pixels per second. The fitness is then the one before the failing step,
+    so an explosion cannot fling a creature to a huge fitness.
+    """
+
+    name = "explosion"
+    invalidates_step = True
+
+    def __init__(self, max_speed: float = EXPLOSION_SPEED):
+        if max_speed <= 0:
+            raise ValueError("max_speed must be positive")
+        self.max_speed = max_speed
+
+    def check(self, creature) -> bool:
+        for limb in creature.limbs:
+            x, y = limb.body.position
+            vx, vy = limb.body.velocity
+            # A NaN fails every comparison, so check for the healthy case
+            healthy = math.isfinite(x) and math.isfinite(y)
+            if not (healthy and vx * vx + vy * vy <= self.max_speed**2):
+                return True
+        return False
+
+    def config(self) -> tuple:
+        return (self.name, self.max_speed)
+
+
+def default_criteria() -> List[TerminationCriterion]:
+    """The termination criteria configured in globals."""
+    if not EARLY_TERMINATION:
+        return []
+    criteria = [ExplosionCriterion(), BoundsCriterion()]
+    if STALL_WINDOW:
+        criteria.append(StallCriterion())
+    if MAX_TILT is not None:
+        criteria.append(OrientationCriterion(MAX_TILT))
+    return criteria
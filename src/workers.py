@@ -0,0 +1,36 @@
+# src/workers.py
+
+import multiprocessing
+import os
+
+from src.globals import SIMULATION_STEPS
+
+
+def worker_context():
+    """
+    Multiprocessing context for worker and island processes.
+
+    Fork is used where available, so the processes inherit the loaded
+    modules instead of importing them again.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
+
+
+def headless_display():
+    """
+    Keep pygame from opening a window. Must run before pygame is initialized,
+    i.e. before `src.simulation` is first imported in a spawned process.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+def worker_simulation(steps: int = SIMULATION_STEPS):
+    """
+    Headless Simulation for a worker process, imported only once the display
+    is set up.
+    """
+    headless_display()
+    from src.simulation import Simulation
+
+    return Simulation(steps)
@@ -0,0 +1,12 @@
+class FakeCreature:
+    """Stands in for a Creature where only the network size matters."""
+
+    def __init__(self, joints: int = 2, limbs: int = 3):
+        self.joints = joints
+        self.limbs = limbs
+
+    def get_amount_of_joints(self):
+        return self.joints
+
+    def get_amount_of_limb(self):
+        return self.limbs
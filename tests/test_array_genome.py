@@ -0,0 +1,86 @@
+import random
+
+import numpy as np
+
+from src.array_genome import ArrayGenome
+from src.genome import Genome
+from src.NEATnetwork import NEATNetwork, create_network
+
+
+def evolved_genome(seed: int) -> Genome:
+    random.seed(seed)
+    genome = Genome(seed, 13, 2)
+    for _ in range(seed % 6 * 2):
+        genome.mutate_nodes()
+        genome.mutate_connections()
+        genome.mutate_weights()
+    return genome
+
+
+def test_round_trip_through_dict_keeps_genes():
+    genome = evolved_genome(5)
+    array_genome = ArrayGenome.from_genome(genome)
+    assert list(array_genome.innovations) == sorted(
+        c.innovation_number for c in genome.connections
+    )
+    restored = array_genome.to_genome()
+    key = lambda c: c.innovation_number
+    assert sorted(restored.connections, key=key) == sorted(genome.connections, key=key)
+    assert restored.nodes == genome.nodes
+
+
+def test_distance_matches_genome():
+    genomes = [evolved_genome(seed) for seed in range(8)]
+    array_genomes = [ArrayGenome.from_genome(genome) for genome in genomes]
+    for genome, array_genome in zip(genomes, array_genomes):
+        for other, array_other in zip(genomes, array_genomes):
+            assert np.isclose(
+                array_genome.compute_compatibility_distance(array_other),
+                genome.compute_compatibility_distance(other),
+            )
+
+
+def test_network_of_array_genome_matches_genome():
+    genome = evolved_genome(4)
+    x = np.random.default_rng(0).normal(0, 100, 13)
+    np.testing.assert_allclose(
+        NEATNetwork(ArrayGenome.from_genome(genome)).forward(x),
+        NEATNetwork(genome).forward(x),
+    )
+
+
+def test_mutations_and_crossover_keep_innovation_order():
+    random.seed(1)
+    np.random.seed(1)
+    parent1 = ArrayGenome(0, 13, 2)
+    parent2 = parent1.copy()
+    for _ in range(10):
+        parent1.mutate_nodes()
+        parent1.mutate_connections()
+        parent2.mutate_nodes()
+        parent2.mutate_weights()
+
+    hidden = parent1.node_ids[parent1.node_types == 1]
+    assert len(hidden) > 0
+    child = parent1.crossover(parent2)
+    assert np.all(np.diff(child.innovations) > 0)
+    assert set(child.innovations) == set(parent1.innovations) | set(parent2.innovations)
+    assert set(child.node_ids) == set(parent1.node_ids) | set(parent2.node_ids)
+
+
+def test_feed_forward_mode_rejects_cycles():
+    random.seed(7)
+    np.random.seed(7)
+    parent1 = ArrayGenome(0, 3, 2, feed_forward=True)
+    parent2 = ArrayGenome(1, 3, 2, feed_forward=True)
+    for _ in range(60):
+        for genome in (parent1, parent2):
+            genome.mutate_connections()
+            genome.mutate_nodes()
+    for genome in (parent1, parent2, parent1.crossover(parent2)):
+        assert genome.feed_forward
+        for index in np.flatnonzero(genome.enabled):
+            assert not genome._reaches(
+                int(genome.out_nodes[index]), int(genome.in_nodes[index])
+            )
+    assert isinstance(create_network(parent1.to_genome()), NEATNetwork)
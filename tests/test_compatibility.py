@@ -0,0 +1,80 @@
+import random
+
+import numpy as np
+
+from src.array_genome import ArrayGenome
+from src.compatibility import compatibility_distances, pack_genes, select_genes
+from src.genome import Genome
+
+
+def reference_distance(genome1, genome2, c1=1.0, c2=1.0, c3=0.4) -> float:
+    """Dict based distance with the usual NEAT excess/disjoint split."""
+    conn1 = {c.innovation_number: c.weight for c in genome1.connections}
+    conn2 = {c.innovation_number: c.weight for c in genome2.connections}
+    max1, max2 = max(conn1, default=0), max(conn2, default=0)
+    matching = [i for i in conn1 if i in conn2]
+    non_matching = set(conn1).symmetric_difference(conn2)
+    excess = sum(1 for i in non_matching if i > min(max1, max2))
+    disjoint = len(non_matching) - excess
+    N = max(len(conn1), len(conn2))
+    if N < 20:
+        N = 1
+    weight_difference = (
+        sum(abs(conn1[i] - conn2[i]) for i in matching) / len(matching)
+        if matching
+        else 0
+    )
+    return c1 * excess / N + c2 * disjoint / N + c3 * weight_difference
+
+
+def population(size: int):
+    random.seed(0)
+    genomes = []
+    for genome_id in range(size):
+        genome = Genome(genome_id, 4, 3)
+        for _ in range(genome_id % 7 * 3):
+            genome.mutate()
+            genome.mutate_nodes()
+            genome.mutate_connections()
+        genomes.append(genome)
+    return genomes
+
+
+def test_distance_matches_reference_with_distinct_coefficients():
+    genomes = population(12)
+    for genome in genomes:
+        for other in genomes:
+            assert np.isclose(
+                genome.compute_compatibility_distance(other, 1.5, 0.5, 0.4),
+                reference_distance(genome, other, 1.5, 0.5, 0.4),
+            )
+
+
+def test_one_vs_many_matches_pairwise():
+    genomes = population(20)
+    packed = pack_genes(genomes[1:] + [ArrayGenome.from_genome(genomes[0])])
+    distances = compatibility_distances(*genomes[0].gene_arrays(), packed)
+    expected = [genomes[0].compute_compatibility_distance(g) for g in genomes[1:]]
+    np.testing.assert_allclose(distances, expected + [0.0])
+
+
+def test_selected_genes_match_packing_the_selection():
+    genomes = population(15)
+    packed = pack_genes(genomes)
+    indices = [9, 2, 14, 3]
+    selected = select_genes(packed, indices)
+    expected = pack_genes([genomes[index] for index in indices])
+    fields = ("innovations", "weights", "owners", "lengths", "starts", "max_innovations")
+    for field in fields:
+        np.testing.assert_array_equal(getattr(selected, field), getattr(expected, field))
+    assert len(select_genes(packed, []).lengths) == 0
+
+
+def test_gene_arrays_follow_mutations():
+    random.seed(3)
+    genome = Genome(0, 4, 3)
+    before = genome.gene_arrays()
+    genome.mutate_nodes()
+    innovations, weights = genome.gene_arrays()
+    assert len(innovations) == len(before[0]) + 2
+    assert np.all(np.diff(innovations) > 0)
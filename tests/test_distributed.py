@@ -0,0 +1,104 @@
+import os
+import random
+import threading
+from multiprocessing.connection import Client
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pytest
+
+from src.distributed import EvaluationCoordinator, run_worker
+from src.genome import Genome
+from src.simulation import Simulation
+
+STEPS = 30
+AUTHKEY = b"test"
+
+
+def population(size=4):
+    random.seed(9)
+    genomes = []
+    for genome_id in range(size):
+        genome = Genome(genome_id, 13, 2)
+        for _ in range(genome_id):
+            genome.mutate_nodes()
+        genomes.append(genome)
+    return genomes
+
+
+def coordinator(**kwargs):
+    return EvaluationCoordinator(("localhost", 0), AUTHKEY, steps=STEPS, **kwargs)
+
+
+def faulty_worker(address, config=None, close=True):
+    """Take one work item, then disconnect or go silent."""
+    connection = Client(address, authkey=AUTHKEY)
+    _, _, expected = connection.recv()
+    connection.send(("ready", config if config is not None else expected))
+    if config is None:
+        connection.recv()
+    if close:
+        connection.close()
+    return connection
+
+
+def test_local_workers_match_serial():
+    genomes = population()
+    serial = [Simulation(STEPS).evaluate(genome) for genome in genomes]
+    with coordinator(local_workers=2) as evaluator:
+        assert evaluator.evaluate_population(genomes) == serial
+        assert evaluator.evaluate_population(genomes[::-1]) == serial[::-1]
+
+
+@pytest.mark.parametrize("close", [True, False])
+def test_lost_work_items_are_retried(close):
+    genomes = population()
+    serial = [Simulation(STEPS).evaluate(genome) for genome in genomes]
+    with coordinator(heartbeat_timeout=1.0, prefetch=1) as evaluator:
+        faulty = []
+        threading.Thread(
+            target=lambda: faulty.append(faulty_worker(evaluator.address, close=close)),
+            daemon=True,
+        ).start()
+        # The real worker joins once the faulty one holds a work item
+        worker = threading.Timer(0.3, run_worker, args=(evaluator.address, AUTHKEY))
+        worker.daemon = True
+        worker.start()
+        assert evaluator.evaluate_population(genomes) == serial
+
+
+def test_workers_with_another_config_are_turned_away():
+    with coordinator(heartbeat_timeout=0.5) as evaluator:
+        threading.Thread(
+            target=faulty_worker,
+            args=(evaluator.address, ("simulation", 1)),
+            daemon=True,
+        ).start()
+        with pytest.raises(RuntimeError):
+            evaluator.evaluate_population(population(1))
+
+
+def late_worker(address):
+    """Worker that sends a wrong result of an earlier batch before every result."""
+    connection = Client(address, authkey=AUTHKEY)
+    _, steps, config = connection.recv()
+    connection.send(("ready", config))
+    simulation = Simulation(steps)
+    while True:
+        message = connection.recv()
+        if message[0] == "stop":
+            break
+        _, batch, item, payload = message
+        connection.send(("result", batch - 1, item, -1e9))
+        fitness = simulation.evaluate(Genome.from_payload(payload))
+        connection.send(("result", batch, item, fitness))
+    connection.close()
+
+
+def test_results_of_other_batches_are_ignored():
+    genomes = population()
+    serial = [Simulation(STEPS).evaluate(genome) for genome in genomes]
+    with coordinator() as evaluator:
+        threading.Thread(target=late_worker, args=(evaluator.address,), daemon=True).start()
+        assert evaluator.evaluate_population(genomes) == serial
+        assert evaluator.evaluate_population(genomes[::-1]) == serial[::-1]
@@ -0,0 +1,58 @@
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from src.array_genome import ArrayGenome
+from src.evaluation import ParallelEvaluator
+from src.genome import Genome
+from src.simulation import Simulation
+
+STEPS = 30
+
+
+def population():
+    random.seed(8)
+    genomes = []
+    for genome_id in range(6):
+        genome = Genome(genome_id, 13, 2)
+        for _ in range(genome_id):
+            genome.mutate_nodes()
+            genome.mutate_connections()
+        genomes.append(genome)
+    return genomes
+
+
+def test_payload_round_trip():
+    for genome in population():
+        payload = genome.to_payload()
+        assert Genome.from_payload(payload).to_payload() == payload
+        array_payload = ArrayGenome.from_genome(genome).to_payload()
+        assert array_payload[:5] == payload[:5]
+        assert sorted(array_payload[5]) == sorted(payload[5])
+
+
+def test_parallel_evaluation_matches_serial():
+    genomes = population()
+    serial = [Simulation(STEPS).evaluate(genome) for genome in genomes]
+    with ParallelEvaluator(workers=0, steps=STEPS) as evaluator:
+        assert evaluator.evaluate_population(genomes) == serial
+    with ParallelEvaluator(workers=2, chunk_size=2, steps=STEPS, cache_size=0) as evaluator:
+        assert evaluator.evaluate_population(genomes) == serial
+        # The workers are reused for the next generation
+        assert evaluator.evaluate_population(genomes[::-1]) == serial[::-1]
+
+
+def test_workers_report_network_stats():
+    genomes = population()
+    for workers in (0, 2):
+        with ParallelEvaluator(
+            workers=workers, chunk_size=2, steps=STEPS, cache_size=0
+        ) as evaluator:
+            evaluator.evaluate_population(genomes)
+            stats = evaluator.network_stats
+            assert stats['networks'] == len(genomes)
+            assert stats['hits'] + stats['misses'] >= len(genomes)
+            # Counts are per population, the plans stay cached in the workers
+            evaluator.evaluate_population(genomes[:2])
+            assert evaluator.network_stats['networks'] == 2
@@ -0,0 +1,57 @@
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from src.array_genome import ArrayGenome
+from src.evaluation import ParallelEvaluator
+from src.fitness_cache import FitnessCache, genome_hash
+from src.genome import Genome
+from src.simulation import Simulation
+
+STEPS = 30
+
+
+def test_hash_only_depends_on_the_network():
+    random.seed(4)
+    genome = Genome(0, 5, 2)
+    for _ in range(3):
+        genome.mutate_nodes()
+    clone = genome.copy()
+    clone.id = 99
+    clone.connections.reverse()
+    assert genome_hash(clone) == genome_hash(genome)
+    assert genome_hash(ArrayGenome.from_genome(genome)) == genome_hash(genome)
+
+    assert genome_hash(genome, ("steps", 10)) != genome_hash(genome, ("steps", 20))
+    clone.connections[0].weight += 1e-12
+    assert genome_hash(clone) != genome_hash(genome)
+
+
+def test_lru_eviction_and_stats():
+    cache = FitnessCache(maxsize=2)
+    cache.put(b"a", 1.0)
+    cache.put(b"b", 2.0)
+    assert cache.get(b"a") == 1.0
+    cache.put(b"c", 3.0)
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") == 1.0 and cache.get(b"c") == 3.0
+    assert cache.stats() == {"hits": 3, "misses": 1, "hit_rate": 0.75, "size": 2}
+
+    disabled = FitnessCache(maxsize=0)
+    disabled.put(b"a", 1.0)
+    assert disabled.get(b"a") is None
+
+
+def test_evaluator_skips_known_genomes():
+    random.seed(5)
+    genomes = [Genome(genome_id, 13, 2) for genome_id in range(3)]
+    clones = [genome.copy() for genome in genomes]
+    expected = [Simulation(STEPS).evaluate(genome) for genome in genomes]
+
+    evaluator = ParallelEvaluator(workers=0, steps=STEPS)
+    assert evaluator.evaluate_population(genomes + clones[:1]) == expected + expected[:1]
+    assert evaluator.skipped == 1
+    clones[2].mutate_nodes()
+    assert evaluator.evaluate_population(clones)[:2] == expected[:2]
+    assert evaluator.skipped == 2
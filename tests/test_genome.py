@@ -0,0 +1,99 @@
+import random
+
+from src.genome import Genome
+
+
+def assert_indexes_consistent(genome: Genome):
+    assert genome._node_index == {node.id: node for node in genome.nodes}
+    assert genome._edges == {(c.in_node, c.out_node) for c in genome.connections}
+    assert genome._next_node_id == max(node.id for node in genome.nodes) + 1
+
+
+def test_indexes_follow_mutation_crossover_and_copy():
+    random.seed(0)
+    parent1 = Genome(0, 5, 2)
+    parent2 = Genome(1, 5, 2)
+    for _ in range(30):
+        for genome in (parent1, parent2):
+            genome.mutate_nodes()
+            genome.mutate_connections()
+            assert_indexes_consistent(genome)
+
+    child = parent1.crossover(parent2)
+    assert_indexes_consistent(child)
+    clone = child.copy()
+    assert_indexes_consistent(clone)
+    clone.mutate_nodes()
+    assert_indexes_consistent(clone)
+    assert_indexes_consistent(child)
+    assert_indexes_consistent(Genome.from_dict(clone.to_dict()))
+
+
+def test_mutate_connections_never_duplicates_an_edge():
+    random.seed(1)
+    genome = Genome(0, 3, 2)
+    for _ in range(200):
+        genome.mutate_connections()
+    edges = [(c.in_node, c.out_node) for c in genome.connections]
+    assert len(edges) == len(set(edges))
+
+
+def test_crossover_child_only_has_inherited_genes():
+    random.seed(2)
+    parent1 = Genome(0, 4, 2)
+    parent2 = parent1.copy()
+    parent2.mutate_nodes()
+    child = parent1.crossover(parent2)
+    innovations = [c.innovation_number for c in child.connections]
+    assert sorted(innovations) == sorted(
+        {c.innovation_number for c in parent1.connections + parent2.connections}
+    )
+
+
+def test_copy_is_independent_of_the_original():
+    random.seed(3)
+    genome = Genome(0, 4, 2)
+    clone = genome.copy()
+    clone.mutate_weights()
+    clone.mutate_nodes()
+    assert [c.weight for c in genome.connections] != [
+        c.weight for c in clone.connections[: len(genome.connections)]
+    ]
+    assert all(c.enabled for c in genome.connections)
+    assert len(genome.nodes) == 6
+
+
+def test_node_depths_follow_mutations():
+    for feed_forward in (False, True):
+        random.seed(4)
+        genome = Genome(0, 5, 2, feed_forward=feed_forward)
+        genome.node_depths()
+        for _ in range(60):
+            genome.mutate_connections()
+            genome.mutate_nodes()
+            expected = Genome.from_dict(genome.to_dict()).node_depths()
+            assert genome.node_depths() == expected
+            assert genome.copy().node_depths() == expected
+
+
+def test_feed_forward_genomes_stay_acyclic():
+    random.seed(5)
+    parent1 = Genome(0, 3, 2, feed_forward=True)
+    parent2 = Genome(1, 3, 2, feed_forward=True)
+    for _ in range(100):
+        for genome in (parent1, parent2):
+            genome.mutate_connections()
+            genome.mutate_nodes()
+    children = [parent1.crossover(parent2), parent2.crossover(parent1)]
+    for genome in [parent1, parent2] + children:
+        assert genome.feed_forward
+        for conn in genome.connections:
+            assert conn.out_node >= genome.num_inputs
+            if conn.enabled:
+                assert not genome._creates_cycle(conn.in_node, conn.out_node)
+    # Without crossover every node is reached and one deeper than its sources
+    depths = parent1.node_depths()
+    assert len(depths) == len(parent1.nodes)
+    for conn in parent1.connections:
+        if conn.enabled:
+            assert depths[conn.out_node] > depths[conn.in_node]
@@ -0,0 +1,89 @@
+import json
+import pickle
+import random
+
+from src.array_genome import ArrayGenome
+from src.genome import Genome, Innovation
+from src.innovation import InnovationRegistry, InnovationShard
+
+
+def test_registries_are_independent():
+    registry1 = InnovationRegistry()
+    registry2 = InnovationRegistry()
+    Genome(0, 3, 2, innovation=registry1)
+    genome = Genome(1, 2, 2, innovation=registry2)
+
+    assert len(registry1) == 6
+    assert len(registry2) == 4
+    assert sorted(c.innovation_number for c in genome.connections) == [1, 2, 3, 4]
+    assert genome.copy().innovation is registry2
+    assert genome.crossover(genome.copy()).innovation is registry2
+
+
+def test_singleton_is_still_the_default():
+    genome = Genome(0, 2, 1)
+    assert genome.innovation is Innovation.get_instance()
+    assert isinstance(Innovation.get_instance(), InnovationRegistry)
+
+
+def test_merge_is_deterministic_and_shares_numbers():
+    registry = InnovationRegistry()
+    Genome(0, 2, 2, innovation=registry)
+
+    shard1 = registry.shard()
+    shard2 = registry.shard()
+    assert shard1.get_innovation_number(0, 2) == registry.history[(0, 2)]
+    assert shard1.get_innovation_number(5, 6) == -1
+    assert shard1.get_innovation_number(7, 8) == -2
+    assert shard2.get_innovation_number(7, 8) == -1
+    assert shard2.get_innovation_number(9, 10) == -2
+
+    registry.merge([shard1, shard2])
+    assert shard1.mapping == {-1: 5, -2: 6}
+    assert shard2.mapping == {-1: 6, -2: 7}
+    assert registry.counter == 7
+
+
+def test_remap_genomes_after_merge_across_processes():
+    random.seed(3)
+    registry = InnovationRegistry()
+    genomes = [Genome(0, 3, 2, innovation=registry), ArrayGenome(1, 3, 2, innovation=registry)]
+
+    shards = []
+    for genome in genomes:
+        shard = registry.shard()
+        genome.innovation = shard
+        for _ in range(5):
+            genome.mutate_nodes()
+        # Ship the shard through pickle and JSON as a worker would
+        shards.append(InnovationShard.from_dict(json.loads(json.dumps(shard.to_dict()))))
+    genomes = [pickle.loads(pickle.dumps(genome)) for genome in genomes]
+
+    registry.merge(shards)
+    for genome, shard in zip(genomes, shards):
+        shard.remap(genome)
+        assert genome.innovation is registry
+        for conn in genome.connections:
+            assert conn.innovation_number > 0
+            assert registry.history[(conn.in_node, conn.out_node)] == conn.innovation_number
+        innovations, _ = genome.gene_arrays()
+        assert list(innovations) == sorted(innovations)
+
+
+def test_serialization_round_trips():
+    registry = InnovationRegistry()
+    Genome(0, 4, 3, innovation=registry)
+    registry.get_innovation_number(10, 11)
+
+    from_json = InnovationRegistry().from_dict(json.loads(json.dumps(registry.to_dict())))
+    from_bytes = InnovationRegistry().from_bytes(registry.to_bytes())
+    for loaded in (from_json, from_bytes):
+        assert loaded.counter == registry.counter
+        assert loaded.history == registry.history
+
+    legacy = InnovationRegistry().from_dict(
+        {'_global_innovation_counter': 2, '_innovation_history': {(0, 1): 1, (1, 2): 2}}
+    )
+    assert legacy.get_innovation_number(1, 2) == 2
+    assert legacy.get_innovation_number(2, 3) == 3
+    assert InnovationRegistry().from_bytes(InnovationRegistry().to_bytes()).history == {}
@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+from src.genome import Genome
+from src.innovation import InnovationRegistry
+from src.islands import Island, IslandModel, IslandSettings, island_topology
+from tests.fakes import FakeCreature
+
+
+def fake_creature():
+    return FakeCreature(limbs=2)
+
+
+def weight_fitness(genome):
+    return sum(conn.weight for conn in genome.connections if conn.enabled)
+
+
+def weight_evaluator():
+    return weight_fitness
+
+
+def settings(**overrides):
+    values = dict(
+        population_size=20,
+        migration_interval=2,
+        migrants=2,
+        seed=1,
+        creature_factory=fake_creature,
+        evaluator_factory=weight_evaluator,
+    )
+    values.update(overrides)
+    return IslandSettings(**values)
+
+
+def test_topologies():
+    assert island_topology("ring", 3) == {0: [1], 1: [2], 2: [0]}
+    assert island_topology("bidirectional_ring", 3) == {0: [1, 2], 1: [0, 2], 2: [0, 1]}
+    assert island_topology("fully_connected", 2) == {0: [1], 1: [0]}
+    assert island_topology({0: [1]}, 2) == {0: [1], 1: []}
+    with pytest.raises(ValueError):
+        island_topology({0: [5]}, 2)
+    with pytest.raises(ValueError):
+        island_topology("star", 2)
+
+
+def test_adopt_renumbers_by_connection():
+    random.seed(2)
+    source = InnovationRegistry()
+    destination = InnovationRegistry()
+    destination.get_innovation_number(100, 101)
+    genome = Genome(0, 3, 2, innovation=source)
+    for _ in range(3):
+        genome.mutate_nodes()
+    destination.adopt(genome)
+    assert genome.innovation is destination
+    for conn in genome.connections:
+        assert destination.history[(conn.in_node, conn.out_node)] == conn.innovation_number
+    innovations, _ = genome.gene_arrays()
+    assert list(innovations) == sorted(set(innovations))
+
+
+def test_migrants_join_the_island_registry():
+    random.seed(3)
+    island1 = Island(0, settings())
+    island2 = Island(1, settings(seed=5))
+    for _ in range(3):
+        island1.ga.population[0].mutate_nodes()
+    report = island1.run_epoch([])
+    island2.receive([payload for payload, _ in report['emigrants']])
+    for genome in island2.ga.population[-2:]:
+        assert genome.innovation is island2.ga.innovation
+        for conn in genome.connections:
+            key = (conn.in_node, conn.out_node)
+            assert island2.ga.innovation.history[key] == conn.innovation_number
+    island2.run_epoch([])
+
+
+def test_local_run_is_reproducible():
+    results = []
+    for _ in range(2):
+        model = IslandModel(3, "ring", settings(), processes=False)
+        best = model.run(epochs=3)
+        assert len(model.reports) == 9
+        assert best.fitness == max(report['best_fitness'] for report in model.reports)
+        results.append([report['best_fitness'] for report in model.reports])
+    assert results[0] == results[1]
+
+
+def test_islands_in_processes():
+    model = IslandModel(2, "bidirectional_ring", settings())
+    best = model.run(epochs=2)
+    assert sorted(report['island'] for report in model.reports) == [0, 0, 1, 1]
+    assert all(report['generation'] in (2, 4) for report in model.reports)
+    assert best.fitness == max(report['best_fitness'] for report in model.reports)
+
+
+def parallel_evaluator():
+    from src.evaluation import ParallelEvaluator
+
+    return ParallelEvaluator(workers=1, steps=5, cache_size=0)
+
+
+def test_islands_can_use_evaluation_workers():
+    model = IslandModel(
+        2,
+        "ring",
+        settings(
+            population_size=4, migration_interval=1, evaluator_factory=parallel_evaluator
+        ),
+    )
+    model.run(epochs=1)
+    assert sorted(report['island'] for report in model.reports) == [0, 1]
+
+
+@pytest.mark.parametrize("processes", [True, False])
+def test_single_epoch_and_no_epochs(processes):
+    model = IslandModel(2, "ring", settings(population_size=4), processes=processes)
+    with pytest.raises(ValueError):
+        model.run(epochs=0)
+    best = model.run(epochs=1)
+    assert sorted(report['island'] for report in model.reports) == [0, 1]
+    assert best.fitness == max(report['best_fitness'] for report in model.reports)
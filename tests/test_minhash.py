@@ -0,0 +1,47 @@
+import random
+
+import numpy as np
+
+from src.compatibility import compatibility_distance
+from src.genetic_algorithm import GeneticAlgorithm
+from src.minhash import LSHIndex, MinHasher
+from tests.fakes import FakeCreature
+
+
+def test_signatures_estimate_jaccard_similarity():
+    hasher = MinHasher(256, seed=1)
+    set1 = np.arange(1, 101)
+    set2 = np.arange(51, 151)  # Jaccard similarity 1/3
+    agreement = np.mean(hasher.signature(set1) == hasher.signature(set2))
+    assert abs(agreement - 1 / 3) < 0.1
+    assert np.array_equal(hasher.signature(set1[::-1]), hasher.signature(set1))
+
+
+def test_lsh_candidates():
+    hasher = MinHasher(32)
+    index = LSHIndex(8)
+    index.add("close", hasher.signature(np.arange(1, 41)))
+    index.add("far", hasher.signature(np.arange(1000, 1040)))
+    assert index.candidates(hasher.signature(np.arange(1, 42))) == {"close"}
+    assert index.candidates(hasher.signature(np.arange(500, 540))) == set()
+
+
+def test_approximate_speciation_assigns_compatible_species():
+    random.seed(6)
+    ga = GeneticAlgorithm(
+        60, FakeCreature(), speciation_threshold=1.0, seed=6, approximate_speciation=True
+    )
+    for _ in range(4):
+        for genome in ga.population:
+            genome.fitness = random.random()
+            for _ in range(2):
+                genome.mutate_nodes()
+        ga.reassign_species()
+        for species in ga.species.values():
+            for genome in species.members:
+                distance = compatibility_distance(
+                    *genome.gene_arrays(), *species.representative.gene_arrays()
+                )
+                assert distance < 1.0 or genome is species.representative
+        ga.adjust_fitness()
+        ga.reproduce()
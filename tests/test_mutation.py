@@ -0,0 +1,62 @@
+import numpy as np
+
+from src.array_genome import ArrayGenome
+from src.genome import Genome
+from src.globals import MUTATION_RATE_WEIGHT
+from src.innovation import InnovationRegistry
+from src.mutation import _GenomeStreams, genome_rng, mutate_population, mutation_rolls
+
+
+def build_population(genome_class, size=200):
+    innovation = InnovationRegistry()
+    return [genome_class(genome_id, 6, 3, innovation=innovation) for genome_id in range(size)]
+
+
+def genes(genome):
+    return sorted(
+        (c.in_node, c.out_node, c.weight, c.enabled) for c in genome.connections
+    )
+
+
+def test_streams_match_genome_rng():
+    streams = _GenomeStreams(7, 2)
+    expected = genome_rng(7, 2, 11).random(5)
+    streams.stream(12).random(3)
+    assert np.array_equal(streams.stream(11).random(5), expected)
+    assert not np.array_equal(genome_rng(7, 3, 11).random(5), expected)
+
+
+def test_rolls_are_uniform_and_independent_of_batching():
+    rolls = mutation_rolls(1, 0, np.arange(20000))
+    assert rolls.shape == (20000, 3)
+    assert np.all((rolls >= 0) & (rolls < 1))
+    assert np.allclose(rolls.mean(axis=0), 0.5, atol=0.01)
+    assert np.array_equal(mutation_rolls(1, 0, np.arange(100, 200)), rolls[100:200])
+
+
+def test_batches_and_order_do_not_change_the_result():
+    for genome_class in (Genome, ArrayGenome):
+        serial = build_population(genome_class)
+        batched = [genome.copy() for genome in serial]
+        for generation in range(5):
+            mutate_population(serial, seed=3, generation=generation)
+            mutate_population(batched[100:][::-1], seed=3, generation=generation)
+            mutate_population(batched[:100], seed=3, generation=generation)
+        for genome1, genome2 in zip(serial, batched):
+            assert genes(genome1) == genes(genome2)
+
+
+def test_weight_mutation_rate():
+    population = build_population(Genome, size=2000)
+    before = [genome.weight_array().copy() for genome in population]
+    mutate_population(population, seed=0, generation=0)
+    changed = np.mean(
+        [
+            not np.array_equal(weights, genome.weight_array()[: len(weights)])
+            for weights, genome in zip(before, population)
+        ]
+    )
+    assert abs(changed - MUTATION_RATE_WEIGHT) < 0.03
+    for genome in population:
+        weights = dict(sorted((c.innovation_number, c.weight) for c in genome.connections))
+        assert np.array_equal(genome.gene_arrays()[1], list(weights.values()))
@@ -0,0 +1,236 @@
+import random
+
+import numpy as np
+
+from src.genome import Connection, Genome, Node
+from src.NEATnetwork import (
+    NEATNetwork,
+    NetworkBatch,
+    PlanCache,
+    RecurrentNEATNetwork,
+    create_network,
+    structure_key,
+)
+
+
+def reference_forward(genome: Genome, x: np.ndarray) -> np.ndarray:
+    """Straightforward per-node evaluation the compiled plan must reproduce."""
+    order = NEATNetwork(genome)._topological_sort()
+    node_outputs = {}
+    input_nodes = [node for node in genome.nodes if node.node_type == "input"]
+    output_nodes = [node for node in genome.nodes if node.node_type == "output"]
+    for i, node in enumerate(input_nodes):
+        node_outputs[node.id] = x[i]
+    for node_id in order:
+        if node_id in node_outputs:
+            continue
+        node_sum = 0
+        for conn in genome.connections:
+            if conn.out_node == node_id and conn.enabled:
+                node_sum += node_outputs.get(conn.in_node, 0) * conn.weight
+        node_outputs[node_id] = np.maximum(0, node_sum)
+    output = np.array([node_outputs.get(node.id, 0) for node in output_nodes])
+    return output / 200
+
+
+def random_genome(seed: int, num_inputs: int = 13, num_outputs: int = 2) -> Genome:
+    random.seed(seed)
+    genome = Genome(seed, num_inputs, num_outputs)
+    for _ in range(seed % 8 * 2):
+        genome.mutate_nodes()
+        genome.mutate_connections()
+        genome.mutate_weights()
+    return genome
+
+
+def test_compiled_forward_matches_reference():
+    rng = np.random.default_rng(0)
+    for seed in range(50):
+        genome = random_genome(seed)
+        network = NEATNetwork(genome)
+        for _ in range(5):
+            x = rng.normal(0, 100, genome.num_inputs)
+            np.testing.assert_allclose(
+                network.forward(x), reference_forward(genome, x), rtol=1e-9, atol=1e-12
+            )
+
+
+def test_unreachable_outputs_are_zero():
+    genome = Genome(0, 2, 1)
+    for conn in genome.connections:
+        conn.enabled = False
+    network = NEATNetwork(genome)
+    assert network.forward(np.array([1.0, 2.0])).tolist() == [0.0]
+
+
+def test_network_batch_matches_individual_forward():
+    networks = [NEATNetwork(random_genome(seed)) for seed in range(30)]
+    batch = NetworkBatch(networks)
+    x = np.random.default_rng(1).normal(0, 100, (len(networks), 13))
+    expected = np.array([network.forward(row) for network, row in zip(networks, x)])
+    np.testing.assert_allclose(batch.forward(x), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_forward_batch_matches_forward_per_row():
+    network = NEATNetwork(random_genome(7))
+    x = np.random.default_rng(2).normal(0, 100, (64, 13))
+    expected = np.array([network.forward(row) for row in x])
+    np.testing.assert_allclose(network.forward_batch(x), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_plan_cache_reuses_plan_for_weight_only_changes():
+    cache = PlanCache(maxsize=2)
+    parent = random_genome(6)
+    child = parent.copy()
+    child.mutate_weights()
+
+    parent_network = NEATNetwork(parent, plan_cache=cache)
+    child_network = NEATNetwork(child, plan_cache=cache)
+    assert child_network.plan is parent_network.plan
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    x = np.random.default_rng(3).normal(0, 100, 13)
+    np.testing.assert_allclose(
+        child_network.forward(x), reference_forward(child, x), rtol=1e-9, atol=1e-12
+    )
+
+
+def test_plan_cache_evicts_least_recently_used():
+    cache = PlanCache(maxsize=1)
+    first, second = random_genome(1), random_genome(2)
+    NEATNetwork(first, plan_cache=cache)
+    NEATNetwork(second, plan_cache=cache)
+    NEATNetwork(first, plan_cache=cache)
+    assert cache.stats() == {"hits": 0, "misses": 3, "hit_rate": 0.0, "size": 1}
+
+
+def test_recurrent_network_matches_forward_on_acyclic_genomes():
+    x = np.random.default_rng(4).normal(0, 100, 13)
+    for seed in range(30):
+        genome = random_genome(seed)
+        network = create_network(genome)
+        if isinstance(network, NEATNetwork):
+            np.testing.assert_allclose(
+                RecurrentNEATNetwork(genome, dtype=np.float64).forward(x),
+                network.forward(x),
+                rtol=1e-9,
+            )
+
+
+def test_recurrent_network_evaluates_self_loop():
+    genome = Genome(0, 1, 1)
+    genome.connections[0].enabled = False
+    genome.nodes.append(Node(2, "hidden"))
+    genome.connections += [
+        Connection(0, 2, 1.0, 2),
+        Connection(2, 2, 0.5, 3),
+        Connection(2, 1, 1.0, 4),
+    ]
+    assert NEATNetwork(genome).forward(np.array([10.0])).tolist() == [0.0]
+
+    network = create_network(genome, dtype=np.float64)
+    assert isinstance(network, RecurrentNEATNetwork)
+    out = np.empty(1)
+    assert network.forward(np.array([10.0]), out) is out
+    np.testing.assert_allclose(out, [10.0 / 200])
+    np.testing.assert_allclose(network.forward(np.array([10.0])), [15.0 / 200])
+    network.reset()
+    np.testing.assert_allclose(network.forward(np.array([10.0])), [10.0 / 200])
+
+    # Both plans of a cyclic structure are cached, a second network compiles nothing
+    cache = PlanCache()
+    create_network(genome, plan_cache=cache)
+    assert cache.stats()["misses"] == 2
+    assert isinstance(create_network(genome, plan_cache=cache), RecurrentNEATNetwork)
+    assert cache.stats()["misses"] == 2
+
+
+def test_pruning_removes_nodes_that_cannot_reach_outputs():
+    genome = Genome(0, 1, 1)
+    genome.nodes += [Node(2, "hidden"), Node(3, "hidden")]
+    genome.connections += [
+        Connection(0, 2, 1.0, 2),
+        Connection(0, 3, 1.0, 3, enabled=False),
+        Connection(3, 1, 1.0, 4, enabled=False),
+    ]
+    network = NEATNetwork(genome)
+    assert (network.pruning.nodes, network.pruning.edges) == (2, 1)
+    assert network.plan.edges == ((0, 1),)
+    x = np.array([50.0])
+    np.testing.assert_allclose(network.forward(x), reference_forward(genome, x))
+
+
+def test_forward_into_reuses_float32_buffers():
+    genome = random_genome(12)
+    network = NEATNetwork(genome)
+    x = np.random.default_rng(5).normal(0, 100, 13).astype(np.float32)
+    output = network.forward_into(x)
+    assert output.dtype == np.float32
+    assert network.forward_into(x) is output
+    np.testing.assert_allclose(output, network.forward(x), rtol=1e-4, atol=1e-6)
+
+    out = np.empty(2, dtype=np.float32)
+    assert network.forward_into(x, out) is out
+
+
+def test_codegen_backend_matches_matrix_backend():
+    x = np.random.default_rng(6).normal(0, 100, 13)
+    for seed in range(30):
+        genome = random_genome(seed)
+        generated = NEATNetwork(genome, backend="codegen")
+        np.testing.assert_allclose(
+            generated.forward(x), reference_forward(genome, x), rtol=1e-9, atol=1e-12
+        )
+        out = np.empty(2, dtype=np.float32)
+        assert generated.forward_into(x, out) is out
+        np.testing.assert_allclose(out, generated.forward(x), rtol=1e-5, atol=1e-6)
+
+
+def test_plans_from_genome_depths_match_sorted_plans():
+    for seed in range(40):
+        genome = random_genome(seed)
+        key, weights = structure_key(genome)
+        sorted_plan = NEATNetwork._compile(key)
+        plan = NEATNetwork._compile(key, genome.node_depths())
+        assert plan.topological_order == sorted_plan.topological_order
+        np.testing.assert_array_equal(plan.output_slots, sorted_plan.output_slots)
+        assert len(plan.layers) == len(sorted_plan.layers)
+        for layer, sorted_layer in zip(plan.layers, sorted_plan.layers):
+            np.testing.assert_array_equal(layer.sources, sorted_layer.sources)
+            np.testing.assert_array_equal(layer.edges, sorted_layer.edges)
+
+
+def test_plan_cache_hits_do_not_compute_depths():
+    cache = PlanCache()
+    genome = random_genome(3)
+    NEATNetwork(genome, plan_cache=cache)
+    child = Genome.from_dict(genome.to_dict())
+
+    def fail():
+        raise AssertionError("node_depths computed on a cache hit")
+
+    child.node_depths = fail
+    NEATNetwork(child, plan_cache=cache)
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_genome_depths_are_ignored():
+    genome = Genome(0, 1, 1)
+    genome.node_depths()
+    genome.connections[0].enabled = False
+    genome.nodes.append(Node(2, "hidden"))
+    genome.connections += [Connection(0, 2, 1.0, 2), Connection(2, 1, 1.0, 3)]
+    np.testing.assert_allclose(
+        NEATNetwork(genome, plan_cache=PlanCache()).forward(np.array([10.0])),
+        [10.0 / 200],
+    )
+
+
+def test_feed_forward_genomes_never_need_the_recurrent_network():
+    random.seed(6)
+    for genome_id in range(20):
+        genome = Genome(genome_id, 6, 2, feed_forward=True)
+        for _ in range(30):
+            genome.mutate_connections()
+            genome.mutate_nodes()
+        assert isinstance(create_network(genome), NEATNetwork)
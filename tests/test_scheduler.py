@@ -0,0 +1,55 @@
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from src.genome import Genome
+from src.scheduler import ScheduledEvaluator
+from src.simulation import Simulation
+
+STEPS = 30
+
+
+def population():
+    random.seed(10)
+    genomes = []
+    for genome_id in range(6):
+        genome = Genome(genome_id, 13, 2)
+        for _ in range(genome_id):
+            genome.mutate_nodes()
+        genomes.append(genome)
+    return genomes
+
+
+def test_scheduled_evaluation_matches_serial():
+    genomes = population()
+    serial = [Simulation(STEPS).evaluate(genome) for genome in genomes]
+    for workers in (0, 2):
+        with ScheduledEvaluator(workers=workers, steps=STEPS, cache_size=0) as evaluator:
+            assert evaluator.evaluate_population(genomes) == serial
+            assert evaluator.evaluate_population(genomes[::-1]) == serial[::-1]
+            assert len(evaluator.metrics) == 2
+            metrics = evaluator.metrics[-1]
+            assert metrics['genomes'] == len(genomes)
+            assert 0 < metrics['utilization'] <= 1
+            assert 0 <= metrics['tail'] <= metrics['wall']
+
+
+def test_costs_are_predicted_from_the_previous_generation():
+    genomes = population()
+    payloads = [genome.to_payload() for genome in genomes]
+    evaluator = ScheduledEvaluator(workers=0)
+    sizes = [ScheduledEvaluator._size(payload) for payload in payloads]
+    # Before any timing the size decides, larger genomes first
+    assert list(evaluator.predict_costs(payloads)) == sizes
+
+    evaluator._learn(payloads[1:], [0.001 * size for size in sizes[1:]])
+    predicted = evaluator.predict_costs(payloads)
+    assert abs(predicted[0] - 0.001 * sizes[0]) < 1e-9
+
+    # Known structures use their measured time, also with other weights
+    evaluator._learn(payloads, [5.0] + [0.001] * 5)
+    child = genomes[0].copy()
+    for conn in child.connections:
+        conn.weight += 1.0
+    assert evaluator.predict_costs([child.to_payload()] + payloads[1:]).argmax() == 0
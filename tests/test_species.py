@@ -0,0 +1,77 @@
+import random
+
+import src.genetic_algorithm as genetic_algorithm
+from src.genetic_algorithm import GeneticAlgorithm
+from src.genome import Genome
+from src.globals import STAGNATION_LIMIT
+from src.species import Species
+from tests.fakes import FakeCreature
+
+
+def next_generation(ga):
+    for genome in ga.population:
+        genome.fitness = random.random()
+    ga.reassign_species()
+    ga.adjust_fitness()
+    ga.reproduce()
+
+
+def test_species_persist_with_stable_ids():
+    random.seed(2)
+    ga = GeneticAlgorithm(60, FakeCreature(), speciation_threshold=1.0, seed=2)
+    seen = set()
+    for _ in range(6):
+        next_generation(ga)
+        ids = set(ga.species)
+        assert ids.isdisjoint(seen - ids) and max(ids) < ga.next_species_id
+        seen |= ids
+        for species_id, species in ga.species.items():
+            assert species.members
+            assert all(genome.species == species_id for genome in species.members)
+        assert sum(len(members) for members in ga.speciation.values()) == 60
+
+
+def test_previous_species_is_checked_first(monkeypatch):
+    random.seed(3)
+    ga = GeneticAlgorithm(50, FakeCreature(), seed=3)
+    next_generation(ga)
+    calls = []
+    original = genetic_algorithm.compatibility_distances
+    monkeypatch.setattr(
+        genetic_algorithm,
+        "compatibility_distances",
+        lambda *args: calls.append(1) or original(*args),
+    )
+    ga.reassign_species()
+    # Only genomes that left their parents' species are compared to all
+    # representatives
+    assert len(calls) < len(ga.population) // 2
+
+
+def test_stagnation():
+    genome = Genome(0, 2, 1)
+    species = Species(1, genome, generation=0)
+    species.add_member(genome)
+    genome.fitness = 1.0
+    species.update_stagnation(0)
+    genome.fitness = 0.5
+    species.update_stagnation(4)
+    assert species.stagnation(4) == 4
+    genome.fitness = 2.0
+    species.update_stagnation(5)
+    assert species.stagnation(7) == 2
+
+
+def test_stagnant_species_get_no_offspring():
+    random.seed(4)
+    ga = GeneticAlgorithm(40, FakeCreature(), speciation_threshold=0.1, seed=4)
+    for genome in ga.population:
+        genome.fitness = random.random()
+    ga.reassign_species()
+    ga.adjust_fitness()
+    best = max(ga.population, key=lambda genome: genome.fitness).species
+    ga.generation = STAGNATION_LIMIT + 1
+    counts = ga.offspring_counts()
+    assert len(counts) > 1
+    assert all(count == 0 for species_id, count in counts.items() if species_id != best)
+    assert counts[best] > 0
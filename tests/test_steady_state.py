@@ -0,0 +1,92 @@
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from src.evaluation import ParallelEvaluator
+from src.genetic_algorithm import GeneticAlgorithm
+from src.globals import STAGNATION_LIMIT
+from src.species import Species
+from src.simulation import Simulation
+from tests.fakes import FakeCreature
+
+STEPS = 30
+
+
+def weight_fitness(genome):
+    return sum(conn.weight for conn in genome.connections if conn.enabled)
+
+
+def favour_first(genome):
+    # Genome 0 is the fittest, genomes 1 to 4 are the weakest
+    if genome.id < 5:
+        return weight_fitness(genome) + (100 if genome.id == 0 else -100)
+    return weight_fitness(genome)
+
+
+def check_species(ga):
+    members = [genome for species in ga.species.values() for genome in species.members]
+    assert sorted(genome.id for genome in members) == sorted(
+        genome.id for genome in ga.population
+    )
+    for species_id, species in ga.species.items():
+        assert all(genome.species == species_id for genome in species.members)
+
+
+def test_steady_state_keeps_the_population_consistent():
+    random.seed(11)
+    ga = GeneticAlgorithm(30, FakeCreature(), speciation_threshold=1.0, seed=11)
+    ga.evaluate_population(weight_fitness)
+    initial_best = max(genome.fitness for genome in ga.population)
+
+    best = ga.evolve_steady_state(95, weight_fitness)
+    assert len(ga.population) == 30
+    assert len({genome.id for genome in ga.population}) == 30
+    assert ga.generation == 3
+    assert best.fitness >= initial_best
+    assert sum(genome.fitness for genome in ga.population) / 30 > initial_best / 2
+    check_species(ga)
+    # Incremental updates match a full recomputation of the adjusted fitness
+    adjusted = [genome.adjusted_fitness for genome in ga.population]
+    ga.adjust_fitness()
+    assert adjusted == [genome.adjusted_fitness for genome in ga.population]
+
+
+def test_steady_state_with_worker_processes():
+    random.seed(12)
+    ga = GeneticAlgorithm(6, FakeCreature(), seed=12)
+    with ParallelEvaluator(workers=2, steps=STEPS) as evaluator:
+        ga.evolve_steady_state(8, evaluator)
+    simulation = Simulation(STEPS)
+    for genome in ga.population:
+        assert genome.fitness == simulation.evaluate(genome)
+    check_species(ga)
+
+
+def test_stagnant_species_are_culled():
+    random.seed(13)
+    ga = GeneticAlgorithm(30, FakeCreature(), speciation_threshold=1.0, seed=13)
+    # Genomes 0 to 4 form their own species, which holds the fittest genome
+    # but otherwise only weak ones
+    species = Species(ga.next_species_id, ga.population[0])
+    ga.species[species.species_id] = species
+    ga.next_species_id += 1
+    for genome in ga.population[:5]:
+        ga.species[genome.species].members.remove(genome)
+        species.add_member(genome)
+    ga.evaluate_population(favour_first)
+    ga.adjust_fitness()
+    # Every species but the one of the fittest genome stopped improving
+    ga.generation = STAGNATION_LIMIT + 1
+    fittest = max(ga.population, key=lambda genome: genome.fitness)
+    for species in ga.species.values():
+        species.last_improved = 0
+    survivors = [genome for genome in ga.population if genome.species == fittest.species]
+    stagnant = len(ga.population) - len(survivors)
+    assert len(survivors) < 10 < stagnant
+
+    ga.evolve_steady_state(10, favour_first)
+    # Only members of stagnant species were replaced
+    assert all(genome in ga.population for genome in survivors)
+    assert ga._stagnant and fittest.species not in ga._stagnant
+    check_species(ga)
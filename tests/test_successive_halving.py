@@ -0,0 +1,109 @@
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pytest
+
+from src.genome import Genome
+from src.simulation import Simulation
+from src.successive_halving import SuccessiveHalvingEvaluator
+
+RUNGS = (10, 20, 40)
+
+
+def population():
+    random.seed(11)
+    genomes = []
+    for genome_id in range(8):
+        genome = Genome(genome_id, 13, 2)
+        for _ in range(genome_id % 3):
+            genome.mutate_nodes()
+        genome.species = genome_id % 2
+        genomes.append(genome)
+    return genomes
+
+
+def test_survivors_get_the_full_fitness():
+    genomes = population()
+    full = [Simulation(RUNGS[-1]).evaluate(genome) for genome in genomes]
+    partial = [Simulation(RUNGS[0]).evaluate(genome) for genome in genomes]
+    evaluator = SuccessiveHalvingEvaluator(RUNGS, keep=0.5)
+    fitnesses = evaluator.evaluate_population(genomes)
+
+    report = evaluator.reports[-1]
+    # Two species of four: 2 + 2 survive the first rung, 1 + 1 the second
+    assert report['survivors'] == [8, 4, 2]
+    assert report['steps'] == 8 * 10 + 4 * 10 + 2 * 20
+    assert report['full_steps'] == 8 * 40
+    assert report['saved'] == pytest.approx(0.5)
+    finalists = [index for index in range(8) if fitnesses[index] == full[index]]
+    assert sorted(genomes[index].species for index in finalists) == [0, 1]
+    # The best of every species after the first rung is simulated on
+    second = [Simulation(RUNGS[1]).evaluate(genome) for genome in genomes]
+    for species in (0, 1):
+        members = [index for index in range(8) if genomes[index].species == species]
+        best = max(members, key=lambda index: partial[index])
+        assert fitnesses[best] in (second[best], full[best])
+
+
+def test_keeping_everything_is_a_full_evaluation():
+    genomes = population()
+    full = [Simulation(RUNGS[-1]).evaluate(genome) for genome in genomes]
+    evaluator = SuccessiveHalvingEvaluator(RUNGS, keep=1.0)
+    assert evaluator.evaluate_population(genomes) == full
+    assert evaluator.reports[-1]['saved'] == 0.0
+    assert SuccessiveHalvingEvaluator((RUNGS[-1],)).evaluate_population(genomes) == full
+
+
+def test_workers_match_the_main_process():
+    genomes = population()
+    expected = SuccessiveHalvingEvaluator(RUNGS).evaluate_population(genomes)
+    with SuccessiveHalvingEvaluator(RUNGS, workers=2) as evaluator:
+        assert evaluator.evaluate_population(genomes) == expected
+        assert evaluator.evaluate_population(genomes) == expected
+
+
+def test_rungs_are_validated():
+    with pytest.raises(ValueError):
+        SuccessiveHalvingEvaluator((20, 10))
+    with pytest.raises(ValueError):
+        SuccessiveHalvingEvaluator(RUNGS, keep=0)
+
+
+class ScriptedRuns:
+    """Backend whose genomes reach the scripted fitness at every rung."""
+
+    def __init__(self, script):
+        self.script = script  # genome index -> fitness at every rung
+        self.rung = {}
+
+    def start(self, payloads):
+        self.rung = dict.fromkeys(range(len(payloads)), -1)
+
+    def advance(self, indices, steps):
+        for index in indices:
+            self.rung[index] += 1
+        return {index: (self.script[index][self.rung[index]], 0) for index in indices}
+
+    def drop(self, indices):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_dropped_genomes_rank_below_the_genomes_that_beat_them():
+    genomes = population()[:6]
+    for genome in genomes:
+        genome.species = 1 if genome.id < 4 else 2
+    evaluator = SuccessiveHalvingEvaluator((10, 20, 40), keep=0.5)
+    # Genome 0 wins every rung of its species but walks back in the end
+    evaluator._runs = ScriptedRuns(
+        [[4, 6, -5], [3, 5], [2], [1], [1], [8, 9, 0]]
+    )
+    fitnesses = evaluator.evaluate_population(genomes)
+    assert fitnesses[0] == -5 and fitnesses[5] == 0
+    order = sorted(range(4), key=lambda index: fitnesses[index], reverse=True)
+    assert order == [0, 1, 2, 3]
+    assert fitnesses[4] < 0
@@ -0,0 +1,101 @@
+import math
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pymunk
+import pytest
+
+from src.genome import Genome
+from src.simulation import Simulation, build_creature
+from src.termination import (
+    BoundsCriterion,
+    ExplosionCriterion,
+    OrientationCriterion,
+    StallCriterion,
+    TerminationCriterion,
+)
+
+
+class StopAfter(TerminationCriterion):
+    name = "stop_after"
+
+    def __init__(self, steps: int, invalidates_step: bool = False):
+        self.steps = steps
+        self.invalidates_step = invalidates_step
+
+    def reset(self, creature):
+        self._seen = 0
+
+    def check(self, creature) -> bool:
+        self._seen += 1
+        return self._seen >= self.steps
+
+    def config(self) -> tuple:
+        return (self.name, self.steps)
+
+
+def test_run_reports_the_steps_used():
+    genome = Genome(0, 13, 2)
+    fitness, steps = Simulation(50, criteria=[StopAfter(20)]).run(genome)
+    assert steps == 20
+    assert fitness == Simulation(20, criteria=()).evaluate(genome)
+    assert Simulation(50, criteria=()).run(genome)[1] == 50
+
+    # An invalid last step is not counted in the fitness
+    fitness, steps = Simulation(50, criteria=[StopAfter(20, True)]).run(genome)
+    assert steps == 20
+    assert fitness == Simulation(19, criteria=()).evaluate(genome)
+
+    # Criteria are copied for every run and are part of the config
+    simulation = Simulation(50, criteria=[StopAfter(20)])
+    assert simulation.run(genome)[1] == simulation.run(genome)[1] == 20
+    assert simulation.config() != Simulation(50, criteria=()).config()
+
+
+def test_criteria_detect_failures():
+    creature = build_creature(pymunk.Space())
+    body = creature.limbs[0].body
+    criteria = [
+        StallCriterion(window=3),
+        OrientationCriterion(math.pi / 2),
+        BoundsCriterion(),
+        ExplosionCriterion(),
+    ]
+    for criterion in criteria:
+        criterion.reset(creature)
+    stall, orientation, bounds, explosion = criteria
+
+    # A creature that does not move stalls after a full window
+    assert [stall.check(creature) for _ in range(3)] == [False, False, True]
+    assert not stall.check(creature)
+    body.position = (body.position.x + 10, body.position.y)
+    assert [stall.check(creature) for _ in range(2)] == [False, False]
+    assert [stall.check(creature) for _ in range(3)] == [False, False, True]
+
+    creature.limbs[1].body.angle = 3 * math.pi / 4 + 2 * math.pi
+    assert orientation.check(creature)
+    creature.limbs[1].body.angle = 2 * math.pi
+    assert not orientation.check(creature)
+
+    assert not bounds.check(creature)
+    body.position = (body.position.x, 10000)
+    assert bounds.check(creature)
+
+    assert not explosion.check(creature)
+    body.velocity = (math.nan, 0)
+    assert explosion.check(creature)
+    body.velocity = (0, 0)
+    body.position = (math.inf, 0)
+    assert explosion.check(creature)
+
+
+def test_criteria_are_validated():
+    with pytest.raises(TypeError):
+        TerminationCriterion()
+    with pytest.raises(ValueError):
+        StallCriterion(window=0)
+    with pytest.raises(ValueError):
+        OrientationCriterion(max_tilt=4)
+    with pytest.raises(ValueError):
+        ExplosionCriterion(max_speed=0)